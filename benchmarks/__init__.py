@@ -0,0 +1,23 @@
+"""
+Benchmarks for edutools-moodle.
+
+Runs every public method of MoodleCourses, MoodleGroups, MoodleAssignments,
+MoodleGrades and MoodleUsers against a synthetic Moodle backend
+(edutools_moodle.testing) at several data sizes, and reports HTTP call
+counts, wall time, bytes transferred and peak memory.
+
+Usage:
+    python -m benchmarks --sizes 100,1000 --output benchmarks/results.json
+"""
+
+from .runner import run_benchmarks, run_scenario, write_results
+from .scenarios import SCENARIOS, Fixture, Scenario
+
+__all__ = [
+    "run_benchmarks",
+    "run_scenario",
+    "write_results",
+    "SCENARIOS",
+    "Fixture",
+    "Scenario",
+]
@@ -0,0 +1,54 @@
+"""
+Command line entry point: ``python -m benchmarks``.
+
+Calls and bytes are written to the results file; wall time and peak
+memory to a companion timings file (benchmarks/results.timings.json).
+
+Example:
+    python -m benchmarks --sizes 100,1000,10000 --output benchmarks/results.json
+    python -m benchmarks --only groups.batch_enroll_users_to_groups --latency 0.02
+"""
+
+import argparse
+import json
+import os
+
+from .runner import (format_result, merge_results, run_benchmarks, timings_path,
+                     write_results, write_timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark every public method of the Moodle modules against a synthetic backend.'
+    )
+    parser.add_argument('--sizes', default='100,1000',
+                        help='Comma-separated numbers of students (default: 100,1000)')
+    parser.add_argument('--only', action='append',
+                        help='Scenario name or prefix to run (repeatable), e.g. groups.')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Simulated server latency per call in seconds (default: 0)')
+    parser.add_argument('--max-input-vars', type=int, default=1000,
+                        help="Backend's PHP max_input_vars (default: 1000)")
+    parser.add_argument('--output', default='benchmarks/results.json',
+                        help='JSON results file (default: benchmarks/results.json); '
+                             'timings go to the matching .timings.json file')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    report = run_benchmarks(sizes=sizes, only=args.only, latency=args.latency,
+                            max_input_vars=args.max_input_vars,
+                            progress=lambda result: print(format_result(result), flush=True))
+    timings_output = timings_path(args.output)
+    for path, write in ((args.output, write_results), (timings_output, write_timings)):
+        merged = report
+        if args.only and os.path.exists(path):
+            # Partial run: only replace the re-run scenarios in the file
+            with open(path, encoding='utf-8') as handle:
+                merged = merge_results(json.load(handle), report)
+        write(merged, path)
+    print(f"Results written to {args.output}, timings to {timings_output}")
+
+
+if __name__ == '__main__':
+    main()
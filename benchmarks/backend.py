@@ -0,0 +1,77 @@
+"""
+Synthetic Moodle backend for the benchmarks.
+
+The fake server runs in a child process so that the client's memory and
+CPU measurements are not mixed with the server's.
+"""
+
+import multiprocessing
+from typing import Any, Dict, Optional
+
+from edutools_moodle.testing import FakeMoodleServer, generate_site
+
+
+def site_options(size: int) -> Dict[str, Any]:
+    """
+    Options of generate_site() for a data size.
+
+    Args:
+        size: Number of students
+
+    Returns:
+        Keyword arguments for generate_site()
+    """
+    return {
+        'students': size,
+        'courses': 1,
+        'groups_per_course': max(2, size // 20),
+        'groupings_per_course': 2,
+        'assignments_per_course': 3,
+        'cohorts': 2,
+        'seed': 0,
+    }
+
+
+def _serve(conn, options: Dict[str, Any], latency: float, max_input_vars: Optional[int]):
+    server = FakeMoodleServer(generate_site(**options), latency=latency,
+                              max_input_vars=max_input_vars).start()
+    conn.send((server.url, server.token))
+    conn.recv()
+    server.stop()
+
+
+class Backend:
+    """
+    Fake Moodle server running in a child process.
+
+    Example:
+        >>> with Backend(site_options(1000)) as backend:
+        ...     moodle = MoodleAPI(backend.url, backend.token)
+    """
+
+    def __init__(self, options: Dict[str, Any], latency: float = 0.0,
+                 max_input_vars: Optional[int] = 1000):
+        self.options = options
+        self.latency = latency
+        self.max_input_vars = max_input_vars
+        self.url: Optional[str] = None
+        self.token: Optional[str] = None
+        self._conn = None
+        self._process = None
+
+    def __enter__(self) -> "Backend":
+        context = multiprocessing.get_context('spawn')
+        self._conn, child = context.Pipe()
+        self._process = context.Process(
+            target=_serve, args=(child, self.options, self.latency, self.max_input_vars),
+            daemon=True
+        )
+        self._process.start()
+        self.url, self.token = self._conn.recv()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._conn.send('stop')
+        self._process.join(10)
+        if self._process.is_alive():
+            self._process.terminate()
@@ -0,0 +1,224 @@
+"""
+Benchmark runner.
+
+Runs the scenarios against the synthetic backend at each data size and
+collects, per scenario: HTTP calls (total and per wsfunction), wall time,
+bytes sent and received, and the client's peak memory.
+"""
+
+import json
+import os
+import platform
+import time
+import tracemalloc
+from typing import Any, Dict, Iterable, List, Optional
+
+from edutools_moodle import MetricsAggregator, MoodleAPI, RetryPolicy
+from edutools_moodle.testing import generate_site
+
+from .backend import Backend, site_options
+from .scenarios import SCENARIOS, Fixture, Scenario
+
+
+MODULES = ('courses', 'groups', 'assignments', 'grades', 'users')
+
+# Result fields written to the results file: the deterministic ones, so
+# that it only changes when a method's calls or payloads change. Wall time
+# and peak memory vary between machines and runs and go to the timings file.
+RECORDED_FIELDS = ('scenario', 'size', 'calls', 'calls_by_function',
+                   'request_bytes', 'response_bytes', 'error')
+RECORDED_META = ('sizes', 'latency', 'max_input_vars')
+TIMING_FIELDS = ('scenario', 'size', 'wall_time', 'peak_memory')
+TIMING_META = ('python', 'sizes', 'latency', 'max_input_vars')
+
+
+def run_scenario(scenario: Scenario, backend: Backend, fixture: Fixture) -> Dict[str, Any]:
+    """
+    Run one scenario and measure it.
+
+    Batching support is detected before measuring, so the counts only
+    cover the calls made by the method itself.
+
+    Args:
+        scenario: Scenario to run
+        backend: Running backend
+        fixture: Description of the backend's site
+
+    Returns:
+        Result dictionary (see run_benchmarks)
+    """
+    metrics = MetricsAggregator()
+    moodle = MoodleAPI(backend.url, backend.token, hooks=[metrics],
+                       retry=RetryPolicy(max_attempts=1))
+    for module in MODULES:
+        getattr(moodle, module).supports_batching()
+    metrics.reset()
+
+    error = None
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        scenario.run(moodle, fixture)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter() - started
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    moodle.close()
+
+    snapshot = metrics.snapshot()
+    return {
+        'scenario': scenario.name,
+        'size': fixture.size,
+        'calls': sum(m['calls'] for m in snapshot.values()),
+        'calls_by_function': {name: m['calls'] for name, m in sorted(snapshot.items())},
+        'wall_time': round(elapsed, 4),
+        'request_bytes': sum(m['request_bytes'] for m in snapshot.values()),
+        'response_bytes': sum(m['response_bytes'] for m in snapshot.values()),
+        'peak_memory': peak_memory,
+        'error': error,
+    }
+
+
+def run_benchmarks(sizes: Iterable[int] = (100, 1000), only: Optional[Iterable[str]] = None,
+                   latency: float = 0.0, max_input_vars: Optional[int] = 1000,
+                   progress=None) -> Dict[str, Any]:
+    """
+    Run the scenarios at every data size.
+
+    Read-only scenarios share one backend per size; each scenario that
+    modifies data gets a fresh one.
+
+    Args:
+        sizes: Numbers of students of the generated sites
+        only: Optional scenario names or prefixes (e.g. 'groups.' or
+            'groups.batch_enroll_users_to_groups')
+        latency: Seconds of simulated server latency per call
+        max_input_vars: PHP max_input_vars of the backend
+        progress: Optional callable receiving each result as it is produced
+
+    Returns:
+        Dictionary with 'meta' and 'results' (one entry per scenario and size,
+        with scenario, size, calls, calls_by_function, wall_time,
+        request_bytes, response_bytes, peak_memory and error)
+    """
+    selected = [s for s in SCENARIOS
+                if not only or any(s.name == o or s.name.startswith(o) for o in only)]
+    sizes = list(sizes)
+    results: List[Dict[str, Any]] = []
+
+    for size in sizes:
+        options = site_options(size)
+        fixture = Fixture(generate_site(**options), size)
+
+        readers = [s for s in selected if not s.mutates]
+        if readers:
+            with Backend(options, latency, max_input_vars) as backend:
+                for scenario in readers:
+                    results.append(run_scenario(scenario, backend, fixture))
+                    if progress:
+                        progress(results[-1])
+
+        for scenario in (s for s in selected if s.mutates):
+            with Backend(options, latency, max_input_vars) as backend:
+                results.append(run_scenario(scenario, backend, fixture))
+                if progress:
+                    progress(results[-1])
+
+    results.sort(key=lambda r: (r['scenario'], r['size']))
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'sizes': sizes,
+            'latency': latency,
+            'max_input_vars': max_input_vars,
+        },
+        'results': results,
+    }
+
+
+def _write_fields(report: Dict[str, Any], path: str, fields: Iterable[str], meta: Iterable[str]):
+    """Write the given result and meta fields of a report as sorted JSON."""
+    report = {
+        'meta': {key: report['meta'][key] for key in meta if key in report['meta']},
+        'results': [{key: result[key] for key in fields if key in result}
+                    for result in report['results']],
+    }
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(report, handle, indent=2, sort_keys=True)
+        handle.write('\n')
+
+
+def write_results(report: Dict[str, Any], path: str):
+    """
+    Write a benchmark report as stable, diff-friendly JSON.
+
+    Only RECORDED_FIELDS of each result (and RECORDED_META) are written,
+    so re-running a benchmark on another machine leaves the file unchanged
+    unless the calls or bytes changed.
+
+    Args:
+        report: Value returned by run_benchmarks()
+        path: Destination file
+    """
+    _write_fields(report, path, RECORDED_FIELDS, RECORDED_META)
+
+
+def timings_path(path: str) -> str:
+    """
+    Path of the timings file matching a results file.
+
+    Example:
+        >>> timings_path('benchmarks/results.json')
+        'benchmarks/results.timings.json'
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.timings{ext or '.json'}"
+
+
+def write_timings(report: Dict[str, Any], path: str):
+    """
+    Write the wall time and peak memory of a benchmark report as JSON.
+
+    Only TIMING_FIELDS of each result (and TIMING_META, including the
+    Python version) are written. These values vary between machines and
+    runs, so they are kept apart from the results file.
+
+    Args:
+        report: Value returned by run_benchmarks()
+        path: Destination file (see timings_path())
+    """
+    _write_fields(report, path, TIMING_FIELDS, TIMING_META)
+
+
+def merge_results(previous: Dict[str, Any], report: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Update a previous report with the results of a partial run.
+
+    Entries of the previous report for the same scenario and size are
+    replaced; the others are kept, so re-running one scenario only changes
+    its own lines in the results file.
+
+    Args:
+        previous: Report loaded from the results file
+        report: Value returned by run_benchmarks()
+
+    Returns:
+        Merged report
+    """
+    rerun = {(r['scenario'], r['size']) for r in report['results']}
+    results = [r for r in previous.get('results', []) if (r['scenario'], r['size']) not in rerun]
+    results.extend(report['results'])
+    results.sort(key=lambda r: (r['scenario'], r['size']))
+    meta = dict(report['meta'])
+    meta['sizes'] = sorted({r['size'] for r in results})
+    return {'meta': meta, 'results': results}
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    """Format one result as a line of the console report."""
+    status = f"  ERROR {result['error']}" if result['error'] else ''
+    return (f"{result['scenario']:<50} n={result['size']:<6} calls={result['calls']:<6} "
+            f"{result['wall_time'] * 1000:>9.1f} ms "
+            f"{(result['request_bytes'] + result['response_bytes']) / 1024:>9.1f} KB "
+            f"peak={result['peak_memory'] / 1024:>8.1f} KB{status}")
@@ -0,0 +1,477 @@
+"""
+Benchmark scenarios, one per public method of the Moodle modules.
+
+Each scenario receives a MoodleAPI client connected to a synthetic site
+and a Fixture describing that site (the site is generated from a seed,
+so the same IDs exist in the benchmark process and in the server).
+Scenarios that modify data run against a fresh backend.
+"""
+
+from typing import Callable, Dict, List
+
+from edutools_moodle import MoodleAPI
+from edutools_moodle.testing import FakeMoodleSite
+
+
+class Fixture:
+    """
+    IDs and names of a generated site used to build method arguments.
+
+    Attributes:
+        size: Number of students
+        course_id: ID of the first course
+        student_ids: IDs of the students, in creation order
+        group_ids: IDs of the course groups, in creation order
+        group_names: Names of the course groups
+        grouping_ids: IDs of the course groupings
+        cohort_names: Names of the cohorts
+        assignment_ids: IDs of the course assignments
+        assignment_cmid: Course module ID of the first assignment
+    """
+
+    def __init__(self, site: FakeMoodleSite, size: int):
+        self.size = size
+        self.course_id = next(iter(site.courses))
+        self.student_ids = [user_id for user_id, role in site.enrolments[self.course_id].items()
+                            if role == 5]
+        self.group_ids = [g['id'] for g in site.groups.values() if g['courseid'] == self.course_id]
+        self.group_names = [site.groups[group_id]['name'] for group_id in self.group_ids]
+        self.grouping_ids = [g['id'] for g in site.groupings.values()
+                             if g['courseid'] == self.course_id]
+        self.cohort_names = [c['name'] for c in site.cohorts.values()]
+        self.assignment_ids = [a['id'] for a in site.assignments.values()
+                               if a['course'] == self.course_id]
+        self.assignment_cmid = site.assignments[self.assignment_ids[0]]['cmid']
+        self.group_of = {user_id: group_id for group_id in self.group_ids
+                         for user_id in site.group_members[group_id]}
+
+    @property
+    def rows(self) -> int:
+        """Number of rows used by bulk scenarios (a fifth of the students, at least 10)."""
+        return max(10, self.size // 5)
+
+    @property
+    def student(self) -> int:
+        """A student in the middle of the list."""
+        return self.student_ids[len(self.student_ids) // 2]
+
+
+class Scenario:
+    """
+    Benchmark of one public method.
+
+    Attributes:
+        module: MoodleAPI attribute of the module (e.g. 'groups')
+        method: Name of the benchmarked method
+        run: Callable(moodle, fixture) calling the method
+        mutates: True if the scenario modifies the site
+    """
+
+    def __init__(self, module: str, method: str, run: Callable[[MoodleAPI, Fixture], object],
+                 mutates: bool):
+        self.module = module
+        self.method = method
+        self.run = run
+        self.mutates = mutates
+
+    @property
+    def name(self) -> str:
+        return f"{self.module}.{self.method}"
+
+    def __repr__(self) -> str:
+        return f"<Scenario: {self.name}>"
+
+
+SCENARIOS: List[Scenario] = []
+
+
+def scenario(module: str, method: str, mutates: bool = False):
+    """Register the decorated function as the scenario of module.method."""
+    def register(run):
+        SCENARIOS.append(Scenario(module, method, run, mutates))
+        return run
+    return register
+
+
+def scenarios_by_name() -> Dict[str, Scenario]:
+    """Registered scenarios keyed by 'module.method'."""
+    return {s.name: s for s in SCENARIOS}
+
+
+# ========== Courses ==========
+
+@scenario('courses', 'get_user_courses')
+def _(moodle, fx):
+    moodle.courses.get_user_courses(fx.student)
+
+
+@scenario('courses', 'get_enrolled_users')
+def _(moodle, fx):
+    moodle.courses.get_enrolled_users(fx.course_id)
+
+
+@scenario('courses', 'get_course_by_field')
+def _(moodle, fx):
+    moodle.courses.get_course_by_field('id', fx.course_id)
+
+
+@scenario('courses', 'get_categories')
+def _(moodle, fx):
+    moodle.courses.get_categories()
+
+
+@scenario('courses', 'get_course_contents')
+def _(moodle, fx):
+    moodle.courses.get_course_contents(fx.course_id)
+
+
+@scenario('courses', 'get_recent_courses')
+def _(moodle, fx):
+    moodle.courses.get_recent_courses(fx.student)
+
+
+@scenario('courses', 'search_courses')
+def _(moodle, fx):
+    moodle.courses.search_courses('Course')
+
+
+@scenario('courses', 'get_enrolled_users_by_capability')
+def _(moodle, fx):
+    moodle.courses.get_enrolled_users_by_capability(fx.course_id, 'mod/assign:submit')
+
+
+@scenario('courses', 'get_course_modules')
+def _(moodle, fx):
+    moodle.courses.get_course_modules(fx.course_id)
+
+
+@scenario('courses', 'get_course_by_id')
+def _(moodle, fx):
+    moodle.courses.get_course_by_id(fx.course_id)
+
+
+# ========== Groups ==========
+
+@scenario('groups', 'get_course_groups')
+def _(moodle, fx):
+    moodle.groups.get_course_groups(fx.course_id)
+
+
+@scenario('groups', 'get_group_by_name')
+def _(moodle, fx):
+    moodle.groups.get_group_by_name(fx.course_id, fx.group_names[-1])
+
+
+@scenario('groups', 'get_group_id_by_name')
+def _(moodle, fx):
+    moodle.groups.get_group_id_by_name(fx.course_id, fx.group_names[-1])
+
+
+@scenario('groups', 'create_group', mutates=True)
+def _(moodle, fx):
+    moodle.groups.create_group(fx.course_id, 'Benchmark group')
+
+
+@scenario('groups', 'delete_group', mutates=True)
+def _(moodle, fx):
+    moodle.groups.delete_group(fx.group_ids[0])
+
+
+@scenario('groups', 'create_groups', mutates=True)
+def _(moodle, fx):
+    # One new group per ten students, plus the existing groups
+    names = fx.group_names + [f"Section {i}" for i in range(max(1, len(fx.student_ids) // 10))]
+    moodle.groups.create_groups(fx.course_id, names)
+
+
+@scenario('groups', 'delete_groups', mutates=True)
+def _(moodle, fx):
+    moodle.groups.delete_groups(fx.group_ids)
+
+
+@scenario('groups', 'add_user_to_group', mutates=True)
+def _(moodle, fx):
+    moodle.groups.add_user_to_group(fx.group_ids[0], fx.student)
+
+
+@scenario('groups', 'remove_member_from_group', mutates=True)
+def _(moodle, fx):
+    moodle.groups.remove_member_from_group(fx.group_of[fx.student], fx.student)
+
+
+@scenario('groups', 'add_members', mutates=True)
+def _(moodle, fx):
+    # Every student into the first two groups
+    moodle.groups.add_members([(group_id, user_id) for group_id in fx.group_ids[:2]
+                               for user_id in fx.student_ids])
+
+
+@scenario('groups', 'remove_members', mutates=True)
+def _(moodle, fx):
+    moodle.groups.remove_members([(fx.group_of[user_id], user_id)
+                                  for user_id in fx.student_ids[:fx.rows]])
+
+
+@scenario('groups', 'get_group_members')
+def _(moodle, fx):
+    moodle.groups.get_group_members(fx.group_ids[0])
+
+
+@scenario('groups', 'get_group_members_info')
+def _(moodle, fx):
+    moodle.groups.get_group_members_info(fx.group_ids[0])
+
+
+@scenario('groups', 'membership_index')
+def _(moodle, fx):
+    index = moodle.groups.membership_index(fx.course_id)
+    for user_id in fx.student_ids:
+        index.user_group_names(user_id)
+
+
+@scenario('groups', 'get_user_groups')
+def _(moodle, fx):
+    moodle.groups.get_user_groups(fx.course_id, fx.student)
+
+
+@scenario('groups', 'create_or_get_group', mutates=True)
+def _(moodle, fx):
+    moodle.groups.create_or_get_group(fx.course_id, 'Benchmark group')
+
+
+@scenario('groups', 'move_user_to_group', mutates=True)
+def _(moodle, fx):
+    moodle.groups.move_user_to_group(fx.course_id, fx.student, fx.group_of[fx.student],
+                                     fx.group_ids[0])
+
+
+@scenario('groups', 'move_users', mutates=True)
+def _(moodle, fx):
+    # Rebalance: a fifth of the students move to the next group
+    moves = []
+    for user_id in fx.student_ids[:fx.rows]:
+        old = fx.group_of[user_id]
+        moves.append((user_id, old, fx.group_ids[(fx.group_ids.index(old) + 1) % len(fx.group_ids)]))
+    moodle.groups.move_users(fx.course_id, moves)
+
+
+@scenario('groups', 'batch_enroll_users_to_groups', mutates=True)
+def _(moodle, fx):
+    # Half of the rows target existing groups, half new groups of 10 members
+    enrollments = []
+    for index, user_id in enumerate(fx.student_ids[:fx.rows]):
+        if index % 2:
+            group_name = fx.group_names[index % len(fx.group_names)]
+        else:
+            group_name = f"Imported {index // 20 + 1}"
+        enrollments.append({'user_id': user_id, 'group_name': group_name})
+    moodle.groups.batch_enroll_users_to_groups(fx.course_id, enrollments)
+
+
+@scenario('groups', 'sync_groups', mutates=True)
+def _(moodle, fx):
+    # Nightly re-sync: a tenth of the students change group
+    desired = {name: set() for name in fx.group_names}
+    for index, user_id in enumerate(fx.student_ids):
+        group_id = fx.group_of[user_id]
+        if index % 10 == 0:
+            group_id = fx.group_ids[(fx.group_ids.index(group_id) + 1) % len(fx.group_ids)]
+        desired[fx.group_names[fx.group_ids.index(group_id)]].add(user_id)
+    moodle.groups.sync_groups(fx.course_id, desired)
+
+
+@scenario('groups', 'send_message_to_group', mutates=True)
+def _(moodle, fx):
+    moodle.groups.send_message_to_group(fx.group_ids[0], 'Benchmark', 'Hello')
+
+
+@scenario('groups', 'send_message_to_groups', mutates=True)
+def _(moodle, fx):
+    # Announcement to every group of the course
+    moodle.groups.send_message_to_groups(fx.group_ids, 'Benchmark', 'Hello', concurrency=4)
+
+
+@scenario('groups', 'get_user_groups_with_names')
+def _(moodle, fx):
+    moodle.groups.get_user_groups_with_names(fx.course_id, fx.student)
+
+
+@scenario('groups', 'get_all_course_groups_dict')
+def _(moodle, fx):
+    moodle.groups.get_all_course_groups_dict(fx.course_id)
+
+
+@scenario('groups', 'is_user_in_group')
+def _(moodle, fx):
+    moodle.groups.is_user_in_group(fx.group_ids[0], fx.student)
+
+
+@scenario('groups', 'get_course_groupings')
+def _(moodle, fx):
+    moodle.groups.get_course_groupings(fx.course_id)
+
+
+@scenario('groups', 'get_grouping_by_name')
+def _(moodle, fx):
+    moodle.groups.get_grouping_by_name(fx.course_id, 'Grouping 2')
+
+
+@scenario('groups', 'create_or_get_grouping', mutates=True)
+def _(moodle, fx):
+    moodle.groups.create_or_get_grouping(fx.course_id, 'Benchmark grouping')
+
+
+@scenario('groups', 'get_grouping_groups')
+def _(moodle, fx):
+    moodle.groups.get_grouping_groups(fx.grouping_ids[0])
+
+
+@scenario('groups', 'get_grouping_groups_with_members')
+def _(moodle, fx):
+    moodle.groups.get_grouping_groups_with_members(fx.grouping_ids[0])
+
+
+@scenario('groups', 'assign_group_to_grouping', mutates=True)
+def _(moodle, fx):
+    moodle.groups.assign_group_to_grouping(fx.grouping_ids[1], fx.group_ids[0])
+
+
+@scenario('groups', 'unassign_group_from_grouping', mutates=True)
+def _(moodle, fx):
+    moodle.groups.unassign_group_from_grouping(fx.grouping_ids[0], fx.group_ids[0])
+
+
+@scenario('groups', 'assign_groups_to_groupings', mutates=True)
+def _(moodle, fx):
+    # Semester setup: every group into a new grouping and an existing one
+    assignments = [(grouping, group_id) for grouping in ('Semester', fx.grouping_ids[0])
+                   for group_id in fx.group_ids]
+    moodle.groups.assign_groups_to_groupings(fx.course_id, assignments)
+
+
+@scenario('groups', 'unassign_groups_from_groupings', mutates=True)
+def _(moodle, fx):
+    moodle.groups.unassign_groups_from_groupings([(grouping_id, group_id)
+                                                  for grouping_id in fx.grouping_ids
+                                                  for group_id in fx.group_ids])
+
+
+@scenario('groups', 'is_user_in_cohort')
+def _(moodle, fx):
+    moodle.groups.is_user_in_cohort(fx.student, fx.cohort_names[0])
+
+
+@scenario('groups', 'is_user_in_cohort_many')
+def _(moodle, fx):
+    # Registration workflow: one check per incoming student
+    for user_id in fx.student_ids[:fx.rows]:
+        moodle.groups.is_user_in_cohort(user_id, fx.cohort_names[0])
+
+
+@scenario('groups', 'enroll_user_in_cohort', mutates=True)
+def _(moodle, fx):
+    moodle.groups.enroll_user_in_cohort(fx.student, fx.cohort_names[-1])
+
+
+@scenario('groups', 'enroll_users_in_cohort', mutates=True)
+def _(moodle, fx):
+    # Yearly intake: every student into the second cohort (half are members already)
+    moodle.groups.enroll_users_in_cohort(fx.cohort_names[-1], fx.student_ids)
+
+
+@scenario('groups', 'remove_users_from_cohort', mutates=True)
+def _(moodle, fx):
+    moodle.groups.remove_users_from_cohort(fx.cohort_names[0], fx.student_ids[:fx.rows])
+
+
+# ========== Users ==========
+
+@scenario('users', 'get_fullname')
+def _(moodle, fx):
+    moodle.users.get_fullname(fx.student)
+
+
+@scenario('users', 'get_users_by_field')
+def _(moodle, fx):
+    moodle.users.get_users_by_field('username', 'student00001')
+
+
+@scenario('users', 'create_user', mutates=True)
+def _(moodle, fx):
+    moodle.users.create_user('benchmark', 'Pa55word!', 'Bench', 'Mark', 'bench@example.com')
+
+
+@scenario('users', 'check_username_exists')
+def _(moodle, fx):
+    moodle.users.check_username_exists('student00001')
+
+
+@scenario('users', 'send_notification', mutates=True)
+def _(moodle, fx):
+    moodle.users.send_notification(fx.student, 'Hello')
+
+
+@scenario('users', 'enroll_user_in_course', mutates=True)
+def _(moodle, fx):
+    moodle.users.enroll_user_in_course(fx.course_id, fx.student)
+
+
+@scenario('users', 'is_user_enrolled')
+def _(moodle, fx):
+    moodle.users.is_user_enrolled(fx.course_id, fx.student)
+
+
+# ========== Grades ==========
+
+@scenario('grades', 'add_grade', mutates=True)
+def _(moodle, fx):
+    moodle.grades.add_grade(fx.assignment_ids[0], fx.student, 75)
+
+
+@scenario('grades', 'add_grades', mutates=True)
+def _(moodle, fx):
+    grades = [{'userid': user_id, 'grade': 50 + index % 50}
+              for index, user_id in enumerate(fx.student_ids[:fx.rows])]
+    moodle.grades.add_grades(fx.assignment_ids[0], grades)
+
+
+@scenario('grades', 'get_grades')
+def _(moodle, fx):
+    moodle.grades.get_grades(fx.course_id)
+
+
+@scenario('grades', 'update_grade', mutates=True)
+def _(moodle, fx):
+    moodle.grades.update_grade(fx.assignment_ids[0], fx.student, 80, feedback='Good')
+
+
+@scenario('grades', 'get_course_grades')
+def _(moodle, fx):
+    moodle.grades.get_course_grades(fx.course_id, fx.student)
+
+
+@scenario('grades', 'get_grades_for_assignment')
+def _(moodle, fx):
+    moodle.grades.get_grades_for_assignment(fx.assignment_ids[0])
+
+
+# ========== Assignments ==========
+
+@scenario('assignments', 'get_assignments')
+def _(moodle, fx):
+    moodle.assignments.get_assignments(fx.course_id)
+
+
+@scenario('assignments', 'get_assignment_id_by_cmid')
+def _(moodle, fx):
+    moodle.assignments.get_assignment_id_by_cmid(fx.assignment_cmid, fx.course_id)
+
+
+@scenario('assignments', 'get_submissions')
+def _(moodle, fx):
+    moodle.assignments.get_submissions(fx.assignment_ids[0])
+
+
+@scenario('assignments', 'get_user_submission')
+def _(moodle, fx):
+    moodle.assignments.get_user_submission(fx.assignment_ids[0], fx.student)
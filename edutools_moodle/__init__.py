@@ -11,6 +11,20 @@ Main exports:
     - MoodleAssignments: Assignments handling
     - MoodleGrades: Grades management
     - MoodleUsers: User account management
+    - MoodleTransport: Pooled HTTP transport shared across modules
+    - AsyncMoodleAPI: Asyncio facade mirroring every module
+    - MoodleBatch: Several web-service calls in one HTTP round trip
+    - ResponseCache: Read-through response cache with TTL/LRU and invalidation
+    - SQLiteResponseCache: Persistent response cache shared across processes
+    - SingleFlight: Coalesces identical concurrent calls into one request
+    - RetryPolicy: Backoff and jitter for transient failures, idempotency aware
+    - RateLimiter: Token bucket capping requests per second
+    - AdaptiveConcurrencyLimiter: AIMD limit on requests in flight
+    - CallHook / CallEvent: Instrumentation hooks fired around every request
+    - MetricsAggregator: Per-wsfunction counters and latency histograms
+    - RecordingTransport / ReplayTransport: Capture real traffic and serve it offline
+    - GroupMembershipIndex: In-memory group memberships of a course, O(1) lookups
+    - CohortDirectory: Cached cohort names and member sets with a TTL
     
 Exceptions:
     - MoodleAPIError: Base exception for API errors
@@ -24,7 +38,26 @@ from .base import (
     MoodleAuthenticationError,
     MoodleResourceNotFoundError
 )
+from .transport import MoodleTransport
+from .batch import MoodleBatch, BatchCall
+from .cache import ResponseCache, SQLiteResponseCache
+from .concurrency import SingleFlight
+from .retry import RetryPolicy
+from .throttle import RateLimiter, AdaptiveConcurrencyLimiter
+from .hooks import CallHook, CallEvent
+from .metrics import MetricsAggregator
+from .recording import RecordingTransport, ReplayTransport
+from .membership import GroupMembershipIndex
+from .cohorts import CohortDirectory
 from .api import MoodleAPI
+from .aio import (
+    AsyncMoodleAPI,
+    AsyncMoodleCourses,
+    AsyncMoodleGroups,
+    AsyncMoodleAssignments,
+    AsyncMoodleGrades,
+    AsyncMoodleUsers
+)
 from .courses import MoodleCourses
 from .groups import MoodleGroups
 from .assignments import MoodleAssignments
@@ -43,6 +76,28 @@ __all__ = [
     "MoodleAssignments",
     "MoodleGrades",
     "MoodleUsers",
+    "MoodleTransport",
+    "MoodleBatch",
+    "BatchCall",
+    "ResponseCache",
+    "SQLiteResponseCache",
+    "SingleFlight",
+    "RetryPolicy",
+    "RateLimiter",
+    "AdaptiveConcurrencyLimiter",
+    "CallHook",
+    "CallEvent",
+    "MetricsAggregator",
+    "RecordingTransport",
+    "ReplayTransport",
+    "GroupMembershipIndex",
+    "CohortDirectory",
+    "AsyncMoodleAPI",
+    "AsyncMoodleCourses",
+    "AsyncMoodleGroups",
+    "AsyncMoodleAssignments",
+    "AsyncMoodleGrades",
+    "AsyncMoodleUsers",
     "MoodleAPIError",
     "MoodleAuthenticationError",
     "MoodleResourceNotFoundError",
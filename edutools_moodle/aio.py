@@ -0,0 +1,274 @@
+"""
+Asyncio client for Moodle API.
+
+Mirrors every synchronous module with coroutine methods that return the
+same result shapes. Calls run on the pooled HTTP transport through a
+bounded worker pool, so thousands of coroutines can be scheduled while
+only ``max_concurrency`` requests are in flight at once.
+"""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .api import MoodleAPI
+from .base import MoodleBase
+from .hooks import CallHook
+from .courses import MoodleCourses
+from .groups import MoodleGroups
+from .assignments import MoodleAssignments
+from .grades import MoodleGrades
+from .users import MoodleUsers
+from .transport import MoodleTransport
+
+
+async def _run_blocking(executor: ThreadPoolExecutor, limiter: "_ConcurrencyLimiter",
+                        func, *args, **kwargs) -> Any:
+    """Run a blocking callable in the worker pool under the concurrency bound."""
+    loop = asyncio.get_running_loop()
+    async with limiter.semaphore:
+        return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+class AsyncMoodleBase:
+    """
+    Async wrapper around a synchronous Moodle module.
+
+    Every public method of the wrapped module is exposed as a coroutine
+    with the same signature and return value.
+    """
+
+    _sync_class = MoodleBase
+
+    def __init__(self, module: MoodleBase, executor: ThreadPoolExecutor,
+                 limiter: "_ConcurrencyLimiter"):
+        """
+        Initialize the async module.
+
+        Args:
+            module: Synchronous module instance performing the calls
+            executor: Worker pool running the blocking HTTP calls
+            limiter: Shared bound on the number of calls in flight
+        """
+        if not isinstance(module, self._sync_class):
+            raise TypeError(
+                f"{type(self).__name__} wraps {self._sync_class.__name__}, "
+                f"received: {type(module).__name__}"
+            )
+        self._module = module
+        self._executor = executor
+        self._limiter = limiter
+
+    @property
+    def sync(self) -> MoodleBase:
+        """Underlying synchronous module."""
+        return self._module
+
+    async def _run(self, func, *args, **kwargs) -> Any:
+        """Run a blocking module method in the worker pool."""
+        return await _run_blocking(self._executor, self._limiter, func, *args, **kwargs)
+
+    async def call_api(self, function_name: str, params: Dict[str, Any] = None) -> Any:
+        """
+        Call a Moodle Web Service API function.
+
+        Args:
+            function_name: Name of the Moodle API function to call
+            params: Dictionary of parameters to pass to the API function
+
+        Returns:
+            API response (parsed JSON)
+        """
+        return await self._run(self._module.call_api, function_name, params)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        attr = getattr(self._module, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await self._run(attr, *args, **kwargs)
+
+        return method
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self._module.moodle_url}>"
+
+
+class AsyncMoodleCourses(AsyncMoodleBase):
+    """Async course operations for Moodle."""
+
+    _sync_class = MoodleCourses
+
+
+class AsyncMoodleGroups(AsyncMoodleBase):
+    """Async groups, groupings and cohorts operations for Moodle."""
+
+    _sync_class = MoodleGroups
+
+
+class AsyncMoodleAssignments(AsyncMoodleBase):
+    """Async assignment operations for Moodle."""
+
+    _sync_class = MoodleAssignments
+
+
+class AsyncMoodleGrades(AsyncMoodleBase):
+    """Async grade operations for Moodle."""
+
+    _sync_class = MoodleGrades
+
+
+class AsyncMoodleUsers(AsyncMoodleBase):
+    """Async user operations for Moodle."""
+
+    _sync_class = MoodleUsers
+
+
+class _ConcurrencyLimiter:
+    """Lazily created semaphore bound to the running event loop."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.limit)
+            self._loop = loop
+        return self._semaphore
+
+
+class AsyncMoodleAPI:
+    """
+    Asyncio facade for interacting with Moodle API.
+
+    Provides the same modules as MoodleAPI with coroutine methods:
+    - courses: Course and enrollment management
+    - groups: Group, grouping, and cohort management
+    - assignments: Assignment and submission handling
+    - grades: Grade management
+    - users: User account management
+
+    Example:
+        >>> async with AsyncMoodleAPI("https://moodle.example.com", "token") as moodle:
+        ...     groups = await asyncio.gather(
+        ...         *(moodle.groups.get_course_groups(cid) for cid in course_ids)
+        ...     )
+    """
+
+    def __init__(self, moodle_url: str, token: str, timeout: int = 30,
+                 logger: Optional[logging.Logger] = None,
+                 max_concurrency: int = 20,
+                 transport: Optional[MoodleTransport] = None,
+                 **options: Any):
+        """
+        Initialize the async Moodle API client with all modules.
+
+        Args:
+            moodle_url: Base URL of the Moodle instance (e.g., 'https://moodle.example.com')
+            token: Web service token for authentication
+            timeout: Request timeout in seconds (default: 30)
+            logger: Optional logger instance (will be shared across all modules)
+            max_concurrency: Maximum number of calls in flight at once (default: 20);
+                also sizes the connection pool of the default transport
+            transport: Optional pre-built transport
+            **options: Other MoodleAPI options (hooks, cache, retry, max_input_vars,
+                batching, coalesce_reads, rate_limiter, concurrency, pool_maxsize)
+
+        Raises:
+            ValueError: If moodle_url or token is empty, or max_concurrency < 1
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be a positive integer")
+
+        self.max_concurrency = max_concurrency
+        options.setdefault('pool_maxsize', max_concurrency)
+        self._api = MoodleAPI(moodle_url, token, timeout=timeout, logger=logger,
+                              transport=transport, **options)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency,
+                                            thread_name_prefix="moodle-async")
+        self._limiter = _ConcurrencyLimiter(max_concurrency)
+
+        shared = (self._executor, self._limiter)
+        self.courses = AsyncMoodleCourses(self._api.courses, *shared)
+        self.groups = AsyncMoodleGroups(self._api.groups, *shared)
+        self.assignments = AsyncMoodleAssignments(self._api.assignments, *shared)
+        self.grades = AsyncMoodleGrades(self._api.grades, *shared)
+        self.users = AsyncMoodleUsers(self._api.users, *shared)
+
+    @property
+    def transport(self) -> MoodleTransport:
+        """Shared HTTP transport used by all modules."""
+        return self._api.transport
+
+    @property
+    def hooks(self) -> List[CallHook]:
+        """Call hooks shared by all modules."""
+        return self._api.hooks
+
+    def add_hook(self, hook: CallHook):
+        """
+        Register a hook notified around every request of every module.
+
+        Args:
+            hook: CallHook (or any object with before_call/after_call methods)
+
+        Example:
+            >>> metrics = MetricsAggregator()
+            >>> moodle.add_hook(metrics)
+            >>> await moodle.groups.get_course_groups(12)
+            >>> print(metrics.report())
+        """
+        self._api.add_hook(hook)
+
+    async def get_site_info(self) -> dict:
+        """
+        Get information about the Moodle site including version.
+
+        Returns:
+            Dictionary containing site information (see MoodleAPI.get_site_info)
+        """
+        return await _run_blocking(self._executor, self._limiter, self._api.get_site_info)
+
+    async def check_moodle_version(self, min_version: str = "3.9") -> bool:
+        """
+        Check if the Moodle version meets the minimum requirement.
+
+        Args:
+            min_version: Minimum required version (e.g., "3.9", "4.0")
+
+        Returns:
+            True if Moodle version >= min_version, False otherwise
+        """
+        return await _run_blocking(self._executor, self._limiter,
+                                   self._api.check_moodle_version, min_version)
+
+    async def aclose(self):
+        """Shut down the worker pool and close the shared transport."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.close)
+
+    def close(self):
+        """Shut down the worker pool and close the shared transport (blocking)."""
+        self._executor.shutdown(wait=True)
+        self._api.close()
+
+    async def __aenter__(self) -> "AsyncMoodleAPI":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    def __repr__(self) -> str:
+        """String representation of the AsyncMoodleAPI instance."""
+        return (f"<AsyncMoodleAPI: courses, groups, assignments, grades, users "
+                f"(max_concurrency={self.max_concurrency})>")
@@ -6,12 +6,17 @@ This is a facade pattern that aggregates specialized modules.
 """
 
 import logging
-from typing import Optional
+from typing import List, Optional
 from .groups import MoodleGroups
 from .assignments import MoodleAssignments
 from .grades import MoodleGrades
 from .users import MoodleUsers
 from .courses import MoodleCourses
+from .transport import MoodleTransport
+from .cache import ResponseCache
+from .retry import RetryPolicy
+from .throttle import AdaptiveConcurrencyLimiter, RateLimiter
+from .hooks import CallHook
 
 
 class MoodleAPI:
@@ -34,7 +39,17 @@ class MoodleAPI:
     """
 
     def __init__(self, moodle_url: str, token: str, timeout: int = 30,
-                 logger: Optional[logging.Logger] = None):
+                 logger: Optional[logging.Logger] = None,
+                 pool_maxsize: int = 10,
+                 transport: Optional[MoodleTransport] = None,
+                 batching: Optional[bool] = None,
+                 max_input_vars: Optional[int] = 1000,
+                 cache: Optional[ResponseCache] = None,
+                 coalesce_reads: bool = True,
+                 retry: Optional[RetryPolicy] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 concurrency: Optional[AdaptiveConcurrencyLimiter] = None,
+                 hooks: Optional[List[CallHook]] = None):
         """
         Initialize the Moodle API client with all modules.
 
@@ -43,6 +58,24 @@ class MoodleAPI:
             token: Web service token for authentication
             timeout: Request timeout in seconds (default: 30)
             logger: Optional logger instance (will be shared across all modules)
+            pool_maxsize: Maximum number of keep-alive connections to the Moodle
+                host (default: 10); size it to the number of worker threads
+            transport: Optional pre-built transport (overrides pool_maxsize,
+                rate_limiter and concurrency)
+            batching: Whether calls may be batched with tool_mobile_call_external_functions
+                (default: None, detected from the site info)
+            max_input_vars: PHP max_input_vars of the Moodle server (default: 1000);
+                longer list parameters are split across requests, None disables it
+            cache: Optional response cache shared by all modules (e.g. ResponseCache())
+            coalesce_reads: Share one request between identical read calls made
+                concurrently from several threads (default: True)
+            retry: Retry policy shared by all modules (default: RetryPolicy(), which
+                retries read functions on timeouts, dropped connections and 5xx)
+            rate_limiter: Optional token bucket capping requests per second
+                (e.g. RateLimiter(rate=20))
+            concurrency: Optional AIMD limiter adapting the number of requests in
+                flight to the server's health (e.g. AdaptiveConcurrencyLimiter(max_limit=pool_maxsize))
+            hooks: Optional call hooks shared by all modules (e.g. [MetricsAggregator()])
 
         Raises:
             ValueError: If moodle_url or token is empty
@@ -50,16 +83,60 @@ class MoodleAPI:
         if not moodle_url or not token:
             raise ValueError("Both moodle_url and token are required")
 
-        # Initialize all specialized modules with shared logger
-        self.courses = MoodleCourses(moodle_url, token, timeout=timeout, logger=logger)
-        self.groups = MoodleGroups(moodle_url, token, timeout=timeout, logger=logger)
-        self.assignments = MoodleAssignments(moodle_url, token, timeout=timeout, logger=logger)
-        self.grades = MoodleGrades(moodle_url, token, timeout=timeout, logger=logger)
-        self.users = MoodleUsers(moodle_url, token, timeout=timeout, logger=logger)
+        # One pooled transport shared by every module
+        self._owns_transport = transport is None
+        self.transport = transport or MoodleTransport(
+            pool_maxsize=pool_maxsize, logger=logger,
+            rate_limiter=rate_limiter, concurrency=concurrency
+        )
+
+        # One retry policy, so its counters cover every module
+        self.retry = retry or RetryPolicy()
+
+        # One hook list, so hooks added later reach every module
+        self.hooks: List[CallHook] = list(hooks or [])
+
+        # Initialize all specialized modules with shared logger and transport
+        shared = {'timeout': timeout, 'logger': logger, 'transport': self.transport,
+                  'batching': batching, 'max_input_vars': max_input_vars, 'cache': cache,
+                  'coalesce_reads': coalesce_reads, 'retry': self.retry,
+                  'hooks': self.hooks}
+        self.courses = MoodleCourses(moodle_url, token, **shared)
+        self.groups = MoodleGroups(moodle_url, token, **shared)
+        self.assignments = MoodleAssignments(moodle_url, token, **shared)
+        self.grades = MoodleGrades(moodle_url, token, **shared)
+        self.users = MoodleUsers(moodle_url, token, **shared)
 
         # Store base module for direct API access
         self._base = self.groups  # Reuse base from one of the modules
 
+    def batch(self, max_calls: int = 50):
+        """
+        Start a batch of web-service calls sent in a single HTTP round trip.
+
+        Args:
+            max_calls: Maximum number of calls sent in one request (default: 50)
+
+        Returns:
+            MoodleBatch to use as a context manager; calls are sent on exit
+        """
+        return self._base.batch(max_calls=max_calls)
+
+    def add_hook(self, hook: CallHook):
+        """
+        Register a hook notified around every request of every module.
+
+        Args:
+            hook: CallHook (or any object with before_call/after_call methods)
+
+        Example:
+            >>> metrics = MetricsAggregator()
+            >>> moodle.add_hook(metrics)
+            >>> moodle.groups.get_course_groups(12)
+            >>> print(metrics.report())
+        """
+        self.hooks.append(hook)
+
     def get_site_info(self) -> dict:
         """
         Get information about the Moodle site including version.
@@ -173,6 +250,7 @@ class MoodleAPI:
         required_permissions = {
             'core': [
                 ('core_webservice_get_site_info', 'Get site information'),
+                ('tool_mobile_call_external_functions', 'Batch calls in one request'),
             ],
             'courses': [
                 ('core_enrol_get_users_courses', 'Get user courses'),
@@ -186,6 +264,7 @@ class MoodleAPI:
             'groups': [
                 ('core_group_get_course_groups', 'Get course groups'),
                 ('core_group_get_group_members', 'Get group members'),
+                ('core_group_get_course_user_groups', 'Get user groups'),
                 ('core_group_add_group_members', 'Add users to group'),
                 ('core_group_delete_group_members', 'Remove users from group'),
                 ('core_group_create_groups', 'Create groups'),
@@ -335,6 +414,17 @@ class MoodleAPI:
         
         return results
 
+    def close(self):
+        """Close the shared transport and release pooled connections."""
+        if self._owns_transport:
+            self.transport.close()
+
+    def __enter__(self) -> "MoodleAPI":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def __repr__(self) -> str:
         """String representation of the MoodleAPI instance."""
         return f"<MoodleAPI: courses, groups, assignments, grades, users>"
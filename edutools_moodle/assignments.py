@@ -25,7 +25,7 @@ class MoodleAssignments(MoodleBase):
             List of assignment dictionaries
         """
         params = {
-            'courseids[0]': course_id,
+            'courseids': [course_id],
             'includenotenrolledcourses': 1 if include_not_enrolled else 0
         }
         response = self.call_api('mod_assign_get_assignments', params)
@@ -77,7 +77,7 @@ class MoodleAssignments(MoodleBase):
             List of student submissions
         """
         params = {
-            "assignmentids[0]": assignment_id,
+            "assignmentids": [assignment_id],
             "status": status,
             "since": since,
             "before": before
@@ -4,15 +4,40 @@ Base class for Moodle API interactions.
 Provides core functionality for making API calls to Moodle Web Services.
 """
 
+import hashlib
+import time
 import requests
 import logging
-from typing import Dict, Any, Optional
+from urllib.parse import quote_plus
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
+from .transport import MoodleTransport
+from .chunking import RESERVED_INPUT_VARS, merge_responses, split_key, split_params
+from .params import ParamEncoder, count_leaves, default_encoder, make_call_key
+from .functions import is_read_function
+from .cache import ResponseCache
+from .retry import RetryPolicy
+from .hooks import CallEvent, CallHook
+
+if TYPE_CHECKING:
+    from .batch import MoodleBatch
+
+
+FORM_HEADERS = {'Content-Type': 'application/x-www-form-urlencoded'}
 
 
 # Custom exceptions
 class MoodleAPIError(Exception):
-    """Base exception for Moodle API errors"""
-    pass
+    """
+    Base exception for Moodle API errors
+
+    Attributes:
+        errorcode: Moodle error code when Moodle itself rejected the call
+            (e.g. 'invalidparameter'), None for transport and HTTP errors
+    """
+
+    def __init__(self, message: str = '', errorcode: Optional[str] = None):
+        super().__init__(message)
+        self.errorcode = errorcode
 
 
 class MoodleAuthenticationError(MoodleAPIError):
@@ -32,7 +57,14 @@ class MoodleBase:
     """
 
     def __init__(self, moodle_url: str, token: str, timeout: int = 30, 
-                 logger: Optional[logging.Logger] = None):
+                 logger: Optional[logging.Logger] = None,
+                 transport: Optional[MoodleTransport] = None,
+                 batching: Optional[bool] = None,
+                 max_input_vars: Optional[int] = 1000,
+                 cache: Optional[ResponseCache] = None,
+                 coalesce_reads: bool = True,
+                 retry: Optional[RetryPolicy] = None,
+                 hooks: Optional[List[CallHook]] = None):
         """
         Initialize the Moodle API base client.
 
@@ -41,36 +73,152 @@ class MoodleBase:
             token: Web service token for authentication
             timeout: Request timeout in seconds (default: 30)
             logger: Optional logger instance (will create one if not provided)
+            transport: Optional shared HTTP transport (a private one is created
+                if not provided; a shared transport is never closed by this module)
+            batching: Whether tool_mobile_call_external_functions may be used to
+                batch calls (default: None, detected from the site info)
+            max_input_vars: PHP max_input_vars of the Moodle server (default: 1000);
+                longer list parameters are split across requests, None disables it
+            cache: Optional response cache (may be shared between modules)
+            coalesce_reads: Share one request between identical read calls made
+                concurrently through the same transport (default: True)
+            retry: Retry policy for transient failures (default: RetryPolicy(),
+                reads retried up to 3 attempts; RetryPolicy(max_attempts=1) disables it)
+            hooks: Optional list of CallHook notified around every request; the
+                list is used as-is, so modules given the same list share hooks
 
         Raises:
             ValueError: If moodle_url or token is empty
         """
         if not moodle_url or not token:
             raise ValueError("Both moodle_url and token are required")
+        if max_input_vars is not None and max_input_vars <= RESERVED_INPUT_VARS:
+            raise ValueError(f"max_input_vars must be greater than {RESERVED_INPUT_VARS}")
 
         self.moodle_url = moodle_url.rstrip('/')
         self.token = token
         self.timeout = timeout
         self.logger = logger or logging.getLogger(__name__)
-        self._session: Optional[requests.Session] = None
+        self._owns_transport = transport is None
+        self.transport = transport or MoodleTransport(logger=self.logger)
+        self._batching_supported = batching
+        self.max_input_vars = max_input_vars
+        self.encoder: ParamEncoder = default_encoder
+        self.cache = cache
+        self.coalesce_reads = coalesce_reads
+        self.retry = retry or RetryPolicy()
+        self.hooks: List[CallHook] = hooks if hooks is not None else []
+        self._token_id = hashlib.sha1(token.encode('utf-8')).hexdigest()[:12]
+        # Identity of the caller in shared caches and coalesced reads
+        self._scope = f"{self.moodle_url}|{self._token_id}"
+        self._auth_body = f"wstoken={quote_plus(token)}&moodlewsrestformat=json&wsfunction="
 
     @property
     def session(self) -> requests.Session:
         """
-        Lazy-loaded session for connection pooling and better performance.
+        Session of the underlying transport, kept for backward compatibility.
         
         Returns:
             Configured requests Session instance
         """
-        if self._session is None:
-            self._session = requests.Session()
-            self.logger.debug("Created new HTTP session for connection pooling")
-        return self._session
+        return self.transport.session
 
     def call_api(self, function_name: str, params: Dict[str, Any] = None) -> Any:
         """
         Call a Moodle Web Service API function.
 
+        Parameters may be given as natural nested dictionaries and lists
+        (e.g. {'members': [{'groupid': 3, 'userid': 7}]}) or as flat PHP form
+        keys (e.g. {'members[0][groupid]': 3}). Calls whose list parameters
+        would exceed the max_input_vars budget are split into several requests
+        and their responses merged. When a cache is configured, read functions
+        are served from it and mutating functions invalidate what they touch.
+        Identical read calls made concurrently from several threads share one
+        request.
+
+        Args:
+            function_name: Name of the Moodle API function to call
+            params: Dictionary of parameters to pass to the API function
+
+        Returns:
+            API response (parsed JSON)
+
+        Raises:
+            MoodleAuthenticationError: If authentication fails
+            MoodleAPIError: For Moodle-specific errors, or a call over the
+                max_input_vars budget that cannot be split
+            TimeoutError: If request times out
+        """
+        cache = self.cache
+        if cache is not None:
+            hit, cached = cache.get(function_name, params, self._scope)
+            if hit:
+                return cached
+
+        inflight = getattr(self.transport, 'inflight', None) if self.coalesce_reads else None
+        if inflight is not None and is_read_function(function_name):
+            key = f"{self._scope}|{make_call_key(function_name, params)}"
+            response, shared = inflight.do(
+                key, lambda: self._execute(function_name, params)
+            )
+            if shared:
+                return response
+        else:
+            try:
+                response = self._execute(function_name, params)
+            finally:
+                if cache is not None:
+                    cache.invalidate(function_name, params, self.moodle_url)
+
+        if cache is not None:
+            cache.set(function_name, params, response, self._scope)
+        return response
+
+    def _execute(self, function_name: str, params: Dict[str, Any] = None) -> Any:
+        """
+        Send a call, split into several requests if it exceeds max_input_vars.
+
+        Args:
+            function_name: Name of the Moodle API function to call
+            params: Dictionary of parameters to pass to the API function
+
+        Returns:
+            API response (parsed JSON), merged across requests
+
+        Raises:
+            MoodleAPIError: If the call exceeds max_input_vars and cannot be
+                split (no list parameter, or one list item over the budget),
+                since PHP would silently truncate it
+        """
+        if params and self.max_input_vars:
+            size = count_leaves(params)
+            if size > self._input_vars_budget:
+                chunks = split_params(params, self._input_vars_budget)
+                if not chunks:
+                    raise MoodleAPIError(
+                        f"{function_name} needs {size} input variables and cannot be split "
+                        f"under max_input_vars={self.max_input_vars}; the server would truncate it"
+                    )
+                self.logger.debug(
+                    f"Splitting {function_name} into {len(chunks)} requests "
+                    f"(max_input_vars={self.max_input_vars})"
+                )
+                return merge_responses([self._request(function_name, chunk) for chunk in chunks],
+                                       split_key(chunks))
+
+        return self._request(function_name, params)
+
+    @property
+    def _input_vars_budget(self) -> int:
+        """Number of form variables available for function parameters."""
+        return self.max_input_vars - RESERVED_INPUT_VARS
+
+    def _request(self, function_name: str, params: Dict[str, Any] = None) -> Any:
+        """
+        Send a single HTTP request for a web-service function.
+
+        Transient failures are retried according to the retry policy.
+
         Args:
             function_name: Name of the Moodle API function to call
             params: Dictionary of parameters to pass to the API function
@@ -85,38 +233,183 @@ class MoodleBase:
         """
         endpoint = f"{self.moodle_url}/webservice/rest/server.php"
 
-        # Build the payload with authentication and format
-        payload = {
-            'wstoken': self.token,
-            'moodlewsrestformat': 'json',
-            'wsfunction': function_name,
-        }
+        # Build the form body with authentication, format and function parameters
+        payload = self._auth_body + quote_plus(function_name)
+        encoded_params = self.encoder.encode(function_name, params)
+        if encoded_params:
+            payload = f"{payload}&{encoded_params}"
 
-        # Add function-specific parameters
-        if params:
-            payload.update(params)
+        if not self.hooks:
+            return self._send(endpoint, function_name, payload, params=params)
 
+        event = CallEvent(function_name, count_leaves(params) if params else 0, len(payload))
+        self._emit('before_call', event)
         try:
-            response = self.session.post(endpoint, data=payload, timeout=self.timeout)
-            response.raise_for_status()
-            
-            json_response = response.json()
-            
+            result = self._send(endpoint, function_name, payload, event, params)
+        except Exception as e:
+            event._finish(e)
+            self._emit('after_call', event)
+            raise
+        event._finish()
+        self._emit('after_call', event)
+        return result
+
+    def _send(self, endpoint: str, function_name: str, payload: str,
+              event: Optional[CallEvent] = None, params: Dict[str, Any] = None) -> Any:
+        """
+        Post an encoded body, retrying transient failures, and validate the response.
+
+        Args:
+            endpoint: REST endpoint URL
+            function_name: Name of the Moodle API function to call
+            payload: Encoded form body
+            event: Optional event updated with the status, size and retries
+            params: Call parameters, to decide whether a retry is safe
+
+        Returns:
+            API response (parsed JSON)
+        """
+        attempt = 1
+        while True:
+            try:
+                response = self.transport.post(endpoint, data=payload, timeout=self.timeout,
+                                               headers=FORM_HEADERS, function_name=function_name)
+                if event is not None:
+                    event.status = response.status_code
+                    content = getattr(response, 'content', None)
+                    if isinstance(content, (bytes, bytearray)):
+                        event.response_bytes = len(content)
+                response.raise_for_status()
+                json_response = response.json()
+            except requests.exceptions.RequestException as e:
+                if not self.retry.should_retry(function_name, e, attempt, params):
+                    if attempt > 1:
+                        self.retry.record_outcome(False)
+                    self._raise_request_error(function_name, e)
+                delay = self.retry.delay(attempt, e)
+                self.logger.warning(
+                    f"Attempt {attempt} of {function_name} failed ({e}), retrying in {delay:.2f}s"
+                )
+                self.retry.record_retry(function_name)
+                if event is not None:
+                    event.retries += 1
+                    event.status = None
+                    event.response_bytes = None
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            if attempt > 1:
+                self.retry.record_outcome(True)
             # Validate and check for Moodle-specific errors
             return self._validate_response(json_response, function_name)
-            
-        except requests.exceptions.Timeout:
+
+    def _emit(self, name: str, event: CallEvent):
+        """Notify every hook, logging (not raising) hook failures."""
+        for hook in self.hooks:
+            method = getattr(hook, name, None)
+            if method is None:
+                continue
+            try:
+                method(event)
+            except Exception:
+                self.logger.exception(f"Hook {hook!r} failed in {name} for {event.function_name}")
+
+    def add_hook(self, hook: CallHook):
+        """
+        Register a hook notified before and after every request.
+
+        Args:
+            hook: CallHook (or any object with before_call/after_call methods)
+
+        Example:
+            >>> metrics = MetricsAggregator()
+            >>> moodle.groups.add_hook(metrics)
+        """
+        self.hooks.append(hook)
+
+    def _raise_request_error(self, function_name: str, error: Exception):
+        """
+        Raise the client exception matching a transport error.
+
+        Args:
+            function_name: Name of the function that was called
+            error: Exception raised by the transport
+
+        Raises:
+            MoodleAuthenticationError: If authentication fails
+            MoodleAPIError: For HTTP and connection errors
+            TimeoutError: If request times out
+        """
+        if isinstance(error, requests.exceptions.Timeout):
             self.logger.error(f"Timeout calling {function_name}")
             raise TimeoutError(f"Request to Moodle API timed out for function: {function_name}")
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 401:
+        if isinstance(error, requests.exceptions.HTTPError):
+            if error.response is not None and error.response.status_code == 401:
                 self.logger.error(f"Authentication failed for {function_name}")
                 raise MoodleAuthenticationError("Invalid Moodle token or unauthorized access")
-            self.logger.error(f"HTTP error calling {function_name}: {e}")
-            raise MoodleAPIError(f"HTTP error calling '{function_name}': {e}")
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"Request error calling {function_name}: {e}")
-            raise MoodleAPIError(f"Error calling Moodle API function '{function_name}': {e}")
+            self.logger.error(f"HTTP error calling {function_name}: {error}")
+            raise MoodleAPIError(f"HTTP error calling '{function_name}': {error}")
+        self.logger.error(f"Request error calling {function_name}: {error}")
+        raise MoodleAPIError(f"Error calling Moodle API function '{function_name}': {error}")
+
+    def supports_batching(self) -> bool:
+        """
+        Check whether calls can be batched with tool_mobile_call_external_functions.
+
+        The check is done from the site info and remembered on the transport,
+        so modules sharing a transport probe once per site and token. A failed
+        probe is only remembered when the token may not read the site info;
+        after other errors batching is skipped for this call and probed again
+        on the next one.
+
+        Returns:
+            True if the batch function is enabled for the web service
+        """
+        if self._batching_supported is not None:
+            return self._batching_supported
+        detected = getattr(self.transport, 'batching_support', None)
+        if detected is not None and self._scope in detected:
+            return detected[self._scope]
+
+        from .batch import BATCH_FUNCTION
+        try:
+            info = self.call_api('core_webservice_get_site_info')
+        except MoodleAuthenticationError as e:
+            self.logger.debug(f"Could not detect batching support: {e}")
+            supported = False
+        except (MoodleAPIError, TimeoutError) as e:
+            self.logger.debug(f"Could not detect batching support, will retry: {e}")
+            return False
+        else:
+            functions = info.get('functions', []) if isinstance(info, dict) else []
+            supported = any(
+                f.get('name') == BATCH_FUNCTION for f in functions if isinstance(f, dict)
+            )
+        if detected is not None:
+            detected[self._scope] = supported
+        else:
+            self._batching_supported = supported
+        return supported
+
+    def batch(self, max_calls: int = 50) -> "MoodleBatch":
+        """
+        Start a batch of web-service calls sent in a single HTTP round trip.
+
+        Args:
+            max_calls: Maximum number of calls sent in one request (default: 50)
+
+        Returns:
+            MoodleBatch to use as a context manager; calls are sent on exit
+
+        Example:
+            >>> with moodle.groups.batch() as batch:
+            ...     groups = batch.call_api('core_group_get_course_groups', {'courseid': 12})
+            ...     groupings = batch.call_api('core_group_get_course_groupings', {'courseid': 12})
+            >>> groups.result()
+        """
+        from .batch import MoodleBatch
+        return MoodleBatch(self, max_calls=max_calls)
 
     def _validate_response(self, response: Any, function_name: str) -> Any:
         """
@@ -151,8 +444,8 @@ class MoodleBase:
                 self.logger.error(f"{function_name} returned error: {full_error_msg} (code: {error_code})")
                 
                 if 'invalidtoken' in error_code or 'accessexception' in error_code:
-                    raise MoodleAuthenticationError(f"{function_name}: {full_error_msg}")
-                raise MoodleAPIError(f"{function_name}: {full_error_msg}")
+                    raise MoodleAuthenticationError(f"{function_name}: {full_error_msg}", error_code)
+                raise MoodleAPIError(f"{function_name}: {full_error_msg}", error_code)
             
             # Log warnings if present but DON'T fail
             if 'warnings' in response and response.get('warnings'):
@@ -174,7 +467,6 @@ class MoodleBase:
         return response
 
     def close(self):
-        """Close the session and cleanup resources."""
-        if self._session:
-            self._session.close()
-            self._session = None
+        """Close the session and cleanup resources (unless the transport is shared)."""
+        if self._owns_transport:
+            self.transport.close()
@@ -0,0 +1,213 @@
+"""
+Batched web-service calls for Moodle API.
+
+Collects several web-service calls and sends them in a single HTTP round
+trip through ``tool_mobile_call_external_functions`` (Moodle 3.7+). When
+the function is not available the calls are sent one by one, so callers
+can use the same code path on every site.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+from .base import MoodleAPIError
+from .params import normalize_params
+
+if TYPE_CHECKING:
+    from .base import MoodleBase
+
+
+BATCH_FUNCTION = 'tool_mobile_call_external_functions'
+
+
+class BatchCall:
+    """
+    Pending result of a call queued in a MoodleBatch.
+
+    Attributes:
+        function_name: Name of the queued web-service function
+        params: Parameters of the call
+        error: Exception raised by the call, if it failed
+    """
+
+    def __init__(self, function_name: str, params: Dict[str, Any]):
+        self.function_name = function_name
+        self.params = params
+        self.error: Optional[Exception] = None
+        self.done = False
+        self._result: Any = None
+
+    def _resolve(self, result: Any = None, error: Optional[Exception] = None):
+        self._result = result
+        self.error = error
+        self.done = True
+
+    @property
+    def ok(self) -> bool:
+        """True if the call completed without error."""
+        return self.done and self.error is None
+
+    def result(self) -> Any:
+        """
+        Get the parsed response of the call.
+
+        Returns:
+            API response (parsed JSON)
+
+        Raises:
+            MoodleAPIError: If the batch has not been executed yet
+            Exception: The error raised by the call, if it failed
+        """
+        if not self.done:
+            raise MoodleAPIError(f"Batch call to '{self.function_name}' has not been executed")
+        if self.error is not None:
+            raise self.error
+        return self._result
+
+    def __repr__(self) -> str:
+        state = 'pending' if not self.done else ('ok' if self.error is None else 'error')
+        return f"<BatchCall: {self.function_name} ({state})>"
+
+
+class MoodleBatch:
+    """
+    Collects web-service calls and sends them in as few requests as possible.
+
+    Example:
+        >>> with moodle.groups.batch() as batch:
+        ...     groups = batch.call_api('core_group_get_course_groups', {'courseid': 12})
+        ...     groupings = batch.call_api('core_group_get_course_groupings', {'courseid': 12})
+        >>> groups.result(), groupings.result()
+    """
+
+    def __init__(self, client: "MoodleBase", max_calls: int = 50):
+        """
+        Initialize the batch.
+
+        Args:
+            client: Module used to send the requests
+            max_calls: Maximum number of calls sent in one request
+
+        Raises:
+            ValueError: If max_calls is not a positive integer
+        """
+        if max_calls < 1:
+            raise ValueError("max_calls must be a positive integer")
+        self.client = client
+        self.max_calls = max_calls
+        self.calls: List[BatchCall] = []
+
+    def call_api(self, function_name: str, params: Dict[str, Any] = None) -> BatchCall:
+        """
+        Queue a web-service call.
+
+        Args:
+            function_name: Name of the Moodle API function to call
+            params: Dictionary of parameters to pass to the API function
+
+        Returns:
+            BatchCall whose result is available once the batch is executed
+        """
+        call = BatchCall(function_name, dict(params or {}))
+        self.calls.append(call)
+        return call
+
+    def execute(self) -> List[BatchCall]:
+        """
+        Send all pending calls.
+
+        Errors are recorded on each BatchCall rather than raised, so one
+        failing call does not hide the results of the others.
+
+        Returns:
+            List of executed BatchCall objects, in queue order
+        """
+        pending = [call for call in self.calls if not call.done]
+        if not pending:
+            return self.calls
+
+        if len(pending) > 1 and self.client.supports_batching():
+            cache = self.client.cache
+            if cache is not None:
+                for call in pending:
+                    hit, cached = cache.get(call.function_name, call.params, self.client._scope)
+                    if hit:
+                        call._resolve(cached)
+                pending = [call for call in pending if not call.done]
+
+            for start in range(0, len(pending), self.max_calls):
+                self._send(pending[start:start + self.max_calls])
+
+            if cache is not None:
+                for call in pending:
+                    cache.invalidate(call.function_name, call.params, self.client.moodle_url)
+                    if call.ok:
+                        cache.set(call.function_name, call.params, call._result, self.client._scope)
+        else:
+            for call in pending:
+                try:
+                    call._resolve(self.client.call_api(call.function_name, call.params))
+                except Exception as e:
+                    call._resolve(error=e)
+
+        return self.calls
+
+    def _send(self, calls: List[BatchCall]):
+        """Send one chunk of calls through tool_mobile_call_external_functions."""
+        params = {
+            'requests': [
+                {
+                    'function': call.function_name,
+                    'arguments': json.dumps(normalize_params(call.params)),
+                    'settingraw': 0,
+                    'settingfilter': 0,
+                    'settingfileurl': 1,
+                }
+                for call in calls
+            ]
+        }
+
+        try:
+            response = self.client.call_api(BATCH_FUNCTION, params)
+        except Exception as e:
+            for call in calls:
+                call._resolve(error=e)
+            return
+
+        responses = response.get('responses', []) if isinstance(response, dict) else []
+        for i, call in enumerate(calls):
+            if i >= len(responses):
+                call._resolve(error=MoodleAPIError(
+                    f"{call.function_name}: no response returned by {BATCH_FUNCTION}"
+                ))
+                continue
+            call._resolve(*self._parse(call, responses[i]))
+
+    def _parse(self, call: BatchCall, item: Dict[str, Any]):
+        """Decode one entry of the batch response into (result, error)."""
+        try:
+            if item.get('error'):
+                exception = item.get('exception')
+                if isinstance(exception, str):
+                    exception = json.loads(exception)
+                if not isinstance(exception, dict) or 'exception' not in exception:
+                    exception = {'exception': 'moodle_exception',
+                                 'message': str(exception or 'Unknown error')}
+                self.client._validate_response(exception, call.function_name)
+                return None, MoodleAPIError(f"{call.function_name}: Unknown error")
+
+            data = item.get('data')
+            result = json.loads(data) if isinstance(data, str) else data
+            return self.client._validate_response(result, call.function_name), None
+        except Exception as e:
+            return None, e
+
+    def __enter__(self) -> "MoodleBatch":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
+
+    def __len__(self) -> int:
+        return len(self.calls)
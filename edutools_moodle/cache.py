@@ -0,0 +1,528 @@
+"""
+Response cache for Moodle API calls.
+
+Read-through cache for web-service read functions, keyed by function name
+and normalized parameters, with per-function TTLs, LRU eviction and
+automatic invalidation when a mutating function touches the same course,
+group, grouping, assignment or cohort. Responses are kept in memory, or
+in a SQLite file shared by several processes.
+"""
+
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from .params import make_call_key, normalize_params
+
+
+# Read functions cached by default, with their time-to-live in seconds
+DEFAULT_TTLS: Dict[str, float] = {
+    'core_webservice_get_site_info': 3600,
+    'core_course_get_categories': 3600,
+    'core_course_get_courses_by_field': 600,
+    'core_course_get_contents': 600,
+    'core_enrol_get_enrolled_users': 120,
+    'core_group_get_course_groups': 300,
+    'core_group_get_course_groupings': 300,
+    'core_group_get_groupings': 300,
+    'core_group_get_group_members': 120,
+    'core_group_get_course_user_groups': 120,
+    'core_cohort_get_cohorts': 600,
+    'core_cohort_get_cohort_members': 120,
+    'mod_assign_get_assignments': 600,
+}
+
+# Read functions whose cached responses a mutating function makes stale
+DEFAULT_INVALIDATIONS: Dict[str, Tuple[str, ...]] = {
+    'core_group_create_groups': (
+        'core_group_get_course_groups',
+    ),
+    'core_group_update_groups': (
+        'core_group_get_course_groups', 'core_group_get_groupings',
+        'core_group_get_course_user_groups',
+    ),
+    'core_group_delete_groups': (
+        'core_group_get_course_groups', 'core_group_get_group_members',
+        'core_group_get_groupings', 'core_group_get_course_user_groups',
+    ),
+    'core_group_add_group_members': (
+        'core_group_get_group_members', 'core_group_get_course_user_groups',
+    ),
+    'core_group_delete_group_members': (
+        'core_group_get_group_members', 'core_group_get_course_user_groups',
+    ),
+    'core_group_create_groupings': (
+        'core_group_get_course_groupings', 'core_group_get_groupings',
+    ),
+    'core_group_update_groupings': (
+        'core_group_get_course_groupings', 'core_group_get_groupings',
+    ),
+    'core_group_delete_groupings': (
+        'core_group_get_course_groupings', 'core_group_get_groupings',
+    ),
+    'core_group_assign_grouping': (
+        'core_group_get_groupings',
+    ),
+    'core_group_unassign_grouping': (
+        'core_group_get_groupings',
+    ),
+    'core_cohort_create_cohorts': (
+        'core_cohort_get_cohorts',
+    ),
+    'core_cohort_update_cohorts': (
+        'core_cohort_get_cohorts',
+    ),
+    'core_cohort_delete_cohorts': (
+        'core_cohort_get_cohorts', 'core_cohort_get_cohort_members',
+    ),
+    'core_cohort_add_cohort_members': (
+        'core_cohort_get_cohort_members',
+    ),
+    'core_cohort_delete_cohort_members': (
+        'core_cohort_get_cohort_members',
+    ),
+    'enrol_manual_enrol_users': (
+        'core_enrol_get_enrolled_users', 'core_enrol_get_users_courses',
+    ),
+    'enrol_manual_unenrol_users': (
+        'core_enrol_get_enrolled_users', 'core_enrol_get_users_courses',
+        'core_group_get_group_members', 'core_group_get_course_user_groups',
+    ),
+    'mod_assign_save_grade': (
+        'mod_assign_get_grades', 'gradereport_user_get_grade_items',
+    ),
+    'mod_assign_save_grades': (
+        'mod_assign_get_grades', 'gradereport_user_get_grade_items',
+    ),
+    'core_user_create_users': (
+        'core_user_get_users', 'core_user_get_users_by_field',
+    ),
+    'core_user_update_users': (
+        'core_user_get_users', 'core_user_get_users_by_field',
+    ),
+}
+
+# Parameter names identifying the scope touched by a call
+_SCOPE_KEYS = {
+    'courseid': 'course', 'courseids': 'course',
+    'groupid': 'group', 'groupids': 'group',
+    'groupingid': 'grouping', 'groupingids': 'grouping',
+    'assignmentid': 'assignment', 'assignmentids': 'assignment', 'assignid': 'assignment',
+    'cohortid': 'cohort', 'cohortids': 'cohort',
+}
+
+Tag = Tuple[str, str]
+
+
+def extract_tags(params: Optional[Dict[str, Any]]) -> FrozenSet[Tag]:
+    """
+    Collect the (scope, id) pairs referenced by call parameters.
+
+    Args:
+        params: Call parameters (flat PHP form keys or nested structures)
+
+    Returns:
+        Frozen set of tags such as {('course', '12'), ('group', '5')}
+    """
+    tags = set()
+
+    def visit(value: Any, scope: Optional[str]):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                visit(item, _SCOPE_KEYS.get(key))
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                visit(item, scope)
+        elif scope is not None and value is not None:
+            tags.add((scope, str(value)))
+
+    if params:
+        visit(normalize_params(params), None)
+    return frozenset(tags)
+
+
+def tags_overlap(entry_tags: Iterable[Tag], mutation_tags: Iterable[Tag]) -> bool:
+    """
+    Decide whether a mutation may have changed a cached entry.
+
+    When both sides name ids of the same scope (e.g. both reference groups),
+    the entry is stale only if they share an id. Otherwise the relationship
+    cannot be established from the parameters and the entry is treated as
+    stale.
+
+    Args:
+        entry_tags: Tags of the cached read call
+        mutation_tags: Tags of the mutating call
+
+    Returns:
+        True if the cached entry must be invalidated
+    """
+    entry_by_scope: Dict[str, set] = {}
+    for scope, value in entry_tags:
+        entry_by_scope.setdefault(scope, set()).add(value)
+    mutation_by_scope: Dict[str, set] = {}
+    for scope, value in mutation_tags:
+        mutation_by_scope.setdefault(scope, set()).add(value)
+
+    common = set(entry_by_scope) & set(mutation_by_scope)
+    if not common:
+        return True
+    return any(entry_by_scope[scope] & mutation_by_scope[scope] for scope in common)
+
+
+class ResponseCache:
+    """
+    In-memory read-through cache for Moodle API responses.
+
+    Thread-safe; responses are copied on the way in and out so callers may
+    modify what they receive. A single instance can be shared by every
+    module of a MoodleAPI client, and by clients of different sites or
+    tokens: MoodleBase passes a scope (site URL and token digest) that is
+    part of every key, so clients never see each other's responses.
+
+    Example:
+        >>> cache = ResponseCache(ttls={'core_group_get_course_groups': 60})
+        >>> moodle = MoodleAPI("https://moodle.example.com", "token", cache=cache)
+        >>> moodle.groups.get_group_id_by_name(12, "Group A")  # fetched
+        >>> moodle.groups.get_group_id_by_name(12, "Group B")  # served from cache
+    """
+
+    def __init__(self, max_entries: int = 1024,
+                 ttls: Optional[Dict[str, float]] = None,
+                 invalidations: Optional[Dict[str, Iterable[str]]] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached responses (least recently
+                used entries are evicted first)
+            ttls: Per-function time-to-live in seconds, merged over DEFAULT_TTLS;
+                a TTL of 0 or None disables caching for that function
+            invalidations: Mutating function to stale read functions mapping,
+                merged over DEFAULT_INVALIDATIONS
+
+        Raises:
+            ValueError: If max_entries is not a positive integer
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be a positive integer")
+
+        self.max_entries = max_entries
+        self.ttls: Dict[str, float] = {**DEFAULT_TTLS, **(ttls or {})}
+        self.invalidations: Dict[str, Tuple[str, ...]] = {
+            **DEFAULT_INVALIDATIONS,
+            **{name: tuple(functions) for name, functions in (invalidations or {}).items()}
+        }
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[str, Tuple[float, str, FrozenSet[Tag], Any]]" = OrderedDict()
+
+    # ---------- Policy ----------
+
+    def ttl_for(self, function_name: str) -> Optional[float]:
+        """Time-to-live of a function's responses, or None if it is not cached."""
+        return self.ttls.get(function_name) or None
+
+    def is_mutation(self, function_name: str) -> bool:
+        """True if the function invalidates cached responses."""
+        return function_name in self.invalidations
+
+    @staticmethod
+    def make_key(function_name: str, params: Optional[Dict[str, Any]], scope: str = '') -> str:
+        """
+        Build the cache key of a call.
+
+        Flat and nested forms of the same parameters produce the same key.
+        The scope of the caller ("<site URL>|<token digest>") prefixes the key.
+        """
+        key = make_call_key(function_name, params)
+        return f"{scope}|{key}" if scope else key
+
+    @staticmethod
+    def _scope_prefix(site: str) -> str:
+        """Prefix shared by the keys of a site's scopes ('' matches every key)."""
+        return f"{site}|" if site else ''
+
+    # ---------- Public API ----------
+
+    def get(self, function_name: str, params: Optional[Dict[str, Any]] = None,
+            scope: str = '') -> Tuple[bool, Any]:
+        """
+        Look up a cached response.
+
+        Args:
+            function_name: Name of the web-service function
+            params: Call parameters
+            scope: Identity of the caller (site URL and token digest)
+
+        Returns:
+            Tuple (hit, response); response is None on a miss
+        """
+        if self.ttl_for(function_name) is None:
+            return False, None
+
+        key = self.make_key(function_name, params, scope)
+        with self._lock:
+            found, value = self._load(key, time.time())
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return found, value
+
+    def set(self, function_name: str, params: Optional[Dict[str, Any]], response: Any,
+            scope: str = ''):
+        """
+        Store a response if the function is cacheable.
+
+        Args:
+            function_name: Name of the web-service function
+            params: Call parameters
+            response: Parsed response to cache
+            scope: Identity of the caller (site URL and token digest)
+        """
+        ttl = self.ttl_for(function_name)
+        if ttl is None:
+            return
+
+        key = self.make_key(function_name, params, scope)
+        with self._lock:
+            self._store(key, function_name, extract_tags(params), response, time.time() + ttl)
+
+    def invalidate(self, function_name: str, params: Optional[Dict[str, Any]] = None,
+                   site: str = '') -> int:
+        """
+        Drop cached responses made stale by a mutating call.
+
+        A mutation changes the site for every token, so the responses of
+        all scopes of the site are dropped, and those of other sites kept.
+
+        Args:
+            function_name: Name of the mutating web-service function
+            params: Parameters of the mutating call
+            site: Moodle URL of the caller ('' drops matching responses of every site)
+
+        Returns:
+            Number of cached responses removed
+        """
+        stale_functions = self.invalidations.get(function_name)
+        if not stale_functions:
+            return 0
+        with self._lock:
+            return self._delete_matching(stale_functions, extract_tags(params),
+                                         self._scope_prefix(site))
+
+    def invalidate_function(self, function_name: str) -> int:
+        """
+        Drop every cached response of a read function.
+
+        Args:
+            function_name: Name of the read web-service function
+
+        Returns:
+            Number of cached responses removed
+        """
+        with self._lock:
+            return self._delete_matching((function_name,), None)
+
+    def clear(self):
+        """Drop every cached response."""
+        with self._lock:
+            self._clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._size()
+
+    # ---------- Storage (overridden by persistent caches) ----------
+
+    def _load(self, key: str, now: float) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires, _function, _tags, value = entry
+        if expires <= now:
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, copy.deepcopy(value)
+
+    def _store(self, key: str, function_name: str, tags: FrozenSet[Tag],
+               value: Any, expires: float):
+        self._entries[key] = (expires, function_name, tags, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _delete_matching(self, functions: Iterable[str],
+                         tags: Optional[FrozenSet[Tag]], prefix: str = '') -> int:
+        functions = set(functions)
+        stale: List[str] = [
+            key for key, (_expires, function, entry_tags, _value) in self._entries.items()
+            if function in functions and key.startswith(prefix)
+            and (tags is None or tags_overlap(entry_tags, tags))
+        ]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def _clear(self):
+        self._entries.clear()
+
+    def _size(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {len(self)} entries, {self.hits} hits, {self.misses} misses>"
+
+
+class SQLiteResponseCache(ResponseCache):
+    """
+    Persistent response cache stored in a SQLite file.
+
+    Responses are stored as compressed JSON with their creation, expiry and
+    last access timestamps. The database runs in WAL mode, so several
+    processes on the same host (e.g. successive cron jobs or parallel
+    workers) can read and write the same file concurrently and start warm.
+    Keys carry the site URL and a token digest, so workers of different
+    sites or tokens can share the file safely.
+
+    Example:
+        >>> cache = SQLiteResponseCache("/var/cache/edutools/moodle.sqlite3")
+        >>> moodle = MoodleAPI("https://moodle.example.com", "token", cache=cache)
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            function TEXT NOT NULL,
+            tags TEXT NOT NULL,
+            value BLOB NOT NULL,
+            created REAL NOT NULL,
+            expires REAL NOT NULL,
+            accessed REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS responses_function ON responses (function);
+        CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000,
+                 ttls: Optional[Dict[str, float]] = None,
+                 invalidations: Optional[Dict[str, Iterable[str]]] = None,
+                 busy_timeout: float = 30.0, compression_level: int = 6):
+        """
+        Initialize the cache and create the database if needed.
+
+        Args:
+            path: Path of the SQLite database file
+            max_entries: Maximum number of cached responses (least recently
+                used entries are evicted first)
+            ttls: Per-function time-to-live in seconds, merged over DEFAULT_TTLS
+            invalidations: Mutating function to stale read functions mapping,
+                merged over DEFAULT_INVALIDATIONS
+            busy_timeout: Seconds to wait for a lock held by another process
+            compression_level: zlib compression level (0-9)
+
+        Raises:
+            ValueError: If max_entries is not a positive integer
+            sqlite3.Error: If the database cannot be opened
+        """
+        super().__init__(max_entries=max_entries, ttls=ttls, invalidations=invalidations)
+        self.path = os.fspath(path)
+        self.busy_timeout = busy_timeout
+        self.compression_level = compression_level
+        self._local = threading.local()
+        self._writes = 0
+
+        connection = self._connection
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(self._SCHEMA)
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread, in autocommit mode."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout,
+                                         isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _encode(self, value: Any) -> bytes:
+        return zlib.compress(json.dumps(value).encode('utf-8'), self.compression_level)
+
+    @staticmethod
+    def _decode(blob: bytes) -> Any:
+        return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+    def _load(self, key: str, now: float) -> Tuple[bool, Any]:
+        connection = self._connection
+        row = connection.execute(
+            "SELECT value, expires FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return False, None
+        if row[1] <= now:
+            connection.execute("DELETE FROM responses WHERE key = ? AND expires <= ?", (key, now))
+            return False, None
+        connection.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        return True, self._decode(row[0])
+
+    def _store(self, key: str, function_name: str, tags: FrozenSet[Tag],
+               value: Any, expires: float):
+        now = time.time()
+        connection = self._connection
+        connection.execute(
+            "INSERT OR REPLACE INTO responses "
+            "(key, function, tags, value, created, expires, accessed) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, function_name, json.dumps(sorted(tags)), self._encode(value), now, expires, now)
+        )
+
+        self._writes += 1
+        if self._writes % 100 == 0:
+            connection.execute("DELETE FROM responses WHERE expires <= ?", (now,))
+        excess = self._size() - self.max_entries
+        if excess > 0:
+            connection.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed LIMIT ?)", (excess,)
+            )
+
+    def _delete_matching(self, functions: Iterable[str],
+                         tags: Optional[FrozenSet[Tag]], prefix: str = '') -> int:
+        functions = list(functions)
+        connection = self._connection
+        placeholders = ', '.join('?' for _ in functions)
+        rows = connection.execute(
+            f"SELECT key, tags FROM responses WHERE function IN ({placeholders}) "
+            f"AND substr(key, 1, ?) = ?", functions + [len(prefix), prefix]
+        ).fetchall()
+        stale = [
+            (key,) for key, entry_tags in rows
+            if tags is None or tags_overlap((tuple(tag) for tag in json.loads(entry_tags)), tags)
+        ]
+        if stale:
+            connection.executemany("DELETE FROM responses WHERE key = ?", stale)
+        return len(stale)
+
+    def _clear(self):
+        self._connection.execute("DELETE FROM responses")
+
+    def _size(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        """Close the connection of the calling thread."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
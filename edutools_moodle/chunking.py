@@ -0,0 +1,180 @@
+"""
+Payload chunking for Moodle API calls.
+
+PHP silently drops request variables beyond ``max_input_vars`` (1000 by
+default), so a long list flattened into ``key[i][field]`` form fields is
+truncated without any error. These helpers split such a call into several
+requests that each stay within the budget, and merge the responses back.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from .params import count_leaves, normalize_params
+
+
+# wstoken, wsfunction and moodlewsrestformat are sent with every request
+RESERVED_INPUT_VARS = 3
+
+
+def split_params(params: Dict[str, Any], max_vars: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Split list-valued parameters so each request stays within max_vars variables.
+
+    The largest list is spread over as many requests as needed; every other
+    parameter is repeated in each request.
+
+    Args:
+        params: Call parameters (flat PHP form keys or nested structures)
+        max_vars: Maximum number of form variables per request, excluding
+            the authentication and format variables
+
+    Returns:
+        List of nested parameter dictionaries, or None if no split is needed or
+        possible (no list parameter, or a single list item over the budget)
+    """
+    nested = normalize_params(params)
+    total = count_leaves(nested)
+    if total <= max_vars:
+        return None
+
+    candidates: List[Tuple[int, str]] = [
+        (count_leaves(value), key) for key, value in nested.items()
+        if isinstance(value, list) and len(value) > 1
+    ]
+    if not candidates:
+        return None
+
+    list_size, list_key = max(candidates)
+    budget = max_vars - (total - list_size)
+
+    chunks: List[List[Any]] = []
+    current: List[Any] = []
+    used = 0
+    for item in nested[list_key]:
+        size = count_leaves(item)
+        if size > budget:
+            return None
+        if current and used + size > budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += size
+    chunks.append(current)
+
+    if len(chunks) < 2:
+        return None
+    return [{**nested, list_key: chunk} for chunk in chunks]
+
+
+def split_key(chunks: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Name of the list parameter spread over the chunks of split_params().
+
+    Args:
+        chunks: Parameter dictionaries returned by split_params()
+
+    Returns:
+        Parameter name, or None for fewer than two chunks
+    """
+    if len(chunks) < 2:
+        return None
+    return next((key for key, value in chunks[0].items() if value is not chunks[1].get(key)), None)
+
+
+# ID fields of the records that hold a list in a response and have no 'id'
+# of their own, such as {'assignmentid': 3, 'grades': [...]}, in order of
+# preference
+ENTITY_KEYS = ('assignmentid', 'courseid', 'cohortid', 'groupid', 'groupingid')
+
+
+def _entity_key(item: Any, skip: Optional[str]) -> Optional[Tuple[str, Any]]:
+    """
+    Identify a record whose list a split call may have spread over several responses.
+
+    A call split on a filter parameter (e.g. 'userids') returns the same
+    record from every request, each with part of its list. A call split on
+    the records' own IDs (e.g. 'groupids' for groupid records) returns each
+    record once per requested ID, so those are kept as they are, and so are
+    records without a list value. Records with an 'id' of their own (e.g. a
+    grouping with its 'courseid') are distinct entities and never combined.
+    """
+    if not isinstance(item, dict) or 'id' in item:
+        return None
+    if not any(isinstance(value, list) for value in item.values()):
+        return None
+    for name in ENTITY_KEYS:
+        if item.get(name) is not None:
+            return None if skip == name + 's' else (name, item[name])
+    return None
+
+
+def _merge_lists(lists: List[List[Any]], skip: Optional[str] = None) -> List[Any]:
+    """Concatenate lists, combining the records that share an entity key."""
+    merged: List[Any] = []
+    parts: Dict[Tuple[str, Any], List[Dict[str, Any]]] = {}
+    positions: Dict[int, Tuple[str, Any]] = {}
+    for items in lists:
+        for item in items:
+            key = _entity_key(item, skip)
+            if key is None:
+                merged.append(item)
+            elif key in parts:
+                parts[key].append(item)
+            else:
+                parts[key] = [item]
+                positions[len(merged)] = key
+                merged.append(item)
+    for position, key in positions.items():
+        merged[position] = _merge_dicts(parts[key], skip)
+    return merged
+
+
+def _merge_dicts(dicts: List[Dict[str, Any]], skip: Optional[str] = None) -> Dict[str, Any]:
+    """Merge list values key by key; other values come from the first dict that has them."""
+    if len(dicts) == 1:
+        return dicts[0]
+    merged: Dict[str, Any] = {}
+    lists: Dict[str, List[List[Any]]] = {}
+    for response in dicts:
+        for key, value in response.items():
+            if isinstance(value, list) and (merged.get(key) is None or key in lists):
+                lists.setdefault(key, []).append(value)
+                merged[key] = None
+            elif merged.get(key) is None and key not in lists:
+                merged[key] = value
+    for key, values in lists.items():
+        merged[key] = _merge_lists(values, skip)
+    return merged
+
+
+def merge_responses(responses: List[Any], split_key: Optional[str] = None) -> Any:
+    """
+    Merge the responses of a chunked call into one response.
+
+    Lists are concatenated. For dictionaries, list values (e.g. 'warnings',
+    'courses') are concatenated key by key and other values are taken from
+    the first response that has them. Records without an 'id' of their own
+    that hold a list and appear in several responses with the same entity ID
+    (e.g. the 'assignments' entry of mod_assign_get_grades split on 'userids',
+    keyed by 'assignmentid') are combined into one record
+    whose lists are merged the same way, unless the call was split on the
+    IDs of those records (then a repeated record is a repeated request ID).
+
+    Args:
+        responses: Parsed responses, in request order
+        split_key: Name of the list parameter the call was split on
+
+    Returns:
+        Merged response
+    """
+    present = [response for response in responses if response is not None]
+    if not present:
+        return None
+
+    if all(isinstance(response, list) for response in present):
+        return _merge_lists(present, split_key)
+
+    if all(isinstance(response, dict) for response in present):
+        return _merge_dicts(present, split_key)
+
+    return present[-1]
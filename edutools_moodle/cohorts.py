@@ -0,0 +1,230 @@
+"""
+Cohort directory for Moodle sites.
+
+CohortDirectory remembers the cohort name -> ID table and the member set
+of each cohort it has looked up, with a time-to-live, so checking cohort
+membership for thousands of users costs no request once the cohort is
+loaded. Listing every cohort of the site to resolve one name, and
+downloading a cohort's member list for every check, is what makes these
+checks slow otherwise.
+"""
+
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .groups import MoodleGroups
+
+
+class CohortDirectory:
+    """
+    Cached cohort names and member sets.
+
+    The name table is loaded with one core_cohort_get_cohorts call and the
+    members of a cohort with one core_cohort_get_cohort_members call (or one
+    call for several cohorts with preload()); both are reused until ttl
+    seconds have passed. Member additions and removals made through
+    MoodleGroups are applied to the cached sets as well.
+
+    Attributes:
+        ttl: Seconds a loaded table or member set is reused (None: until refresh())
+
+    Example:
+        >>> directory = moodle.groups.cohort_directory
+        >>> directory.preload(['IIR2425'])
+        >>> [user_id for user_id in applicants if directory.is_member(user_id, 'IIR2425')]
+    """
+
+    def __init__(self, groups: "MoodleGroups", ttl: Optional[float] = 300):
+        """
+        Create an empty directory; data is loaded on first use.
+
+        Args:
+            groups: MoodleGroups module used to fetch the data
+            ttl: Seconds a loaded table or member set is reused (default: 300)
+        """
+        self._client = groups
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._cohorts: Dict[int, Dict[str, Any]] = {}
+        self._by_name: Dict[str, int] = {}
+        self._loaded_at: Optional[float] = None
+        self._members: Dict[int, Tuple[FrozenSet[int], float]] = {}
+
+    def _fresh(self, loaded_at: Optional[float]) -> bool:
+        if loaded_at is None:
+            return False
+        return self.ttl is None or time.monotonic() - loaded_at < self.ttl
+
+    def _load_cohorts(self):
+        response = self._client.call_api('core_cohort_get_cohorts', {})
+        if not isinstance(response, list):
+            self._client.logger.error(f"Unexpected response for core_cohort_get_cohorts: {response}")
+            response = []
+        cohorts = {cohort['id']: cohort for cohort in response
+                   if isinstance(cohort, dict) and 'id' in cohort}
+        by_name: Dict[str, int] = {}
+        for cohort_id, cohort in cohorts.items():
+            # Names are not unique in Moodle: keep the first, like a linear search would
+            by_name.setdefault(cohort.get('name'), cohort_id)
+        self._cohorts = cohorts
+        self._by_name = by_name
+        self._loaded_at = time.monotonic()
+
+    @property
+    def cohorts(self) -> Dict[int, Dict[str, Any]]:
+        """Cohort dictionaries of the site, keyed by cohort ID."""
+        with self._lock:
+            if not self._fresh(self._loaded_at):
+                self._load_cohorts()
+            return self._cohorts
+
+    def cohort_id(self, cohort_name: str) -> Optional[int]:
+        """
+        Resolve a cohort name to its ID.
+
+        Args:
+            cohort_name: Name of the cohort
+
+        Returns:
+            Cohort ID if found, None otherwise
+        """
+        with self._lock:
+            if not self._fresh(self._loaded_at):
+                self._load_cohorts()
+            return self._by_name.get(cohort_name)
+
+    def _resolve(self, cohort: Any) -> Optional[int]:
+        """Cohort ID from an ID or a name."""
+        if isinstance(cohort, int):
+            return cohort
+        return self.cohort_id(cohort)
+
+    def preload(self, cohorts: Iterable[Any]) -> int:
+        """
+        Load the members of several cohorts in one request.
+
+        Cohorts whose member set is still fresh are skipped.
+
+        Args:
+            cohorts: Cohort IDs or names
+
+        Returns:
+            Number of cohorts loaded
+        """
+        with self._lock:
+            cohort_ids = []
+            for cohort in cohorts:
+                cohort_id = self._resolve(cohort)
+                if cohort_id is not None and not self._fresh(self._members.get(cohort_id, (None, None))[1]):
+                    cohort_ids.append(cohort_id)
+            cohort_ids = list(dict.fromkeys(cohort_ids))
+            if not cohort_ids:
+                return 0
+
+            response = self._client.call_api('core_cohort_get_cohort_members', {'cohortids': cohort_ids})
+            if not isinstance(response, list):
+                self._client.logger.error(
+                    f"Unexpected response for core_cohort_get_cohort_members: {response}"
+                )
+                return 0
+            now = time.monotonic()
+            for entry in response:
+                self._members[entry.get('cohortid')] = (frozenset(entry.get('userids', [])), now)
+            return len(cohort_ids)
+
+    def members(self, cohort: Any) -> FrozenSet[int]:
+        """
+        Get the user IDs of a cohort's members.
+
+        Args:
+            cohort: Cohort ID or name
+
+        Returns:
+            Frozen set of user IDs (empty for an unknown cohort)
+        """
+        with self._lock:
+            cohort_id = self._resolve(cohort)
+            if cohort_id is None:
+                return frozenset()
+            self.preload([cohort_id])
+            return self._members.get(cohort_id, (frozenset(), None))[0]
+
+    def is_member(self, user_id: int, cohort: Any) -> bool:
+        """
+        Check if a user is a member of a cohort.
+
+        Args:
+            user_id: ID of the user
+            cohort: Cohort ID or name
+
+        Returns:
+            True if the user is in the cohort
+        """
+        return user_id in self.members(cohort)
+
+    def record_members(self, cohort_id: int, added: Iterable[int] = (), removed: Iterable[int] = ()):
+        """
+        Apply membership changes to a cached member set.
+
+        Called by MoodleGroups after successful writes so that the directory
+        stays accurate without reloading. Nothing is done if the cohort's
+        members are not loaded.
+
+        Args:
+            cohort_id: ID of the cohort
+            added: IDs of the users added
+            removed: IDs of the users removed
+        """
+        with self._lock:
+            if cohort_id in self._members:
+                members, loaded_at = self._members[cohort_id]
+                self._members[cohort_id] = ((members | frozenset(added)) - frozenset(removed), loaded_at)
+
+    def invalidate(self, cohort: Any = None):
+        """
+        Forget cached data so it is reloaded on next use.
+
+        Args:
+            cohort: Cohort ID or name whose member set to drop; None drops
+                the name table and every member set
+        """
+        with self._lock:
+            if cohort is None:
+                self._cohorts, self._by_name, self._loaded_at = {}, {}, None
+                self._members.clear()
+            else:
+                cohort_id = self._resolve(cohort)
+                self._members.pop(cohort_id, None)
+
+    def refresh(self, cohorts: Optional[Iterable[Any]] = None) -> "CohortDirectory":
+        """
+        Reload the name table and member sets from Moodle.
+
+        Cached responses of the cohort listing functions are dropped first,
+        so a configured ResponseCache cannot serve stale data.
+
+        Args:
+            cohorts: Cohorts whose members to reload (default: those loaded so far)
+
+        Returns:
+            The directory itself
+        """
+        with self._lock:
+            reload: List[Any] = list(cohorts) if cohorts is not None else list(self._members)
+            cache = self._client.cache
+            if cache is not None:
+                cache.invalidate_function('core_cohort_get_cohorts')
+                cache.invalidate_function('core_cohort_get_cohort_members')
+            self.invalidate()
+            self._load_cohorts()
+            self.preload(reload)
+            return self
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __repr__(self) -> str:
+        return (f"<{type(self).__name__}: {len(self._cohorts)} cohorts, "
+                f"{len(self._members)} member sets, ttl={self.ttl}>")
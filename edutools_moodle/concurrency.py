@@ -0,0 +1,94 @@
+"""
+Concurrency helpers for Moodle API calls.
+
+Provides request coalescing ("singleflight"): when several threads make
+the same read call at the same time, only one HTTP request is sent and
+every caller receives its parsed result.
+"""
+
+import copy
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+
+class _Flight:
+    """A call in progress and the callers waiting for it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait and receive a copy of its result (or its exception).
+    Nothing is remembered once the call completes.
+
+    Example:
+        >>> flights = SingleFlight()
+        >>> result, shared = flights.do("core_group_get_course_groups:12", fetch)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: str, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run func once for all concurrent callers using the same key.
+
+        Args:
+            key: Identity of the call (e.g. function name plus parameters)
+            func: Callable performing the call
+
+        Returns:
+            Tuple (result, shared); shared is True for callers that received
+            the result of another caller's execution
+
+        Raises:
+            Exception: Whatever func raised, re-raised for every caller
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result), True
+
+        try:
+            flight.result = func()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                waiters = flight.waiters
+            flight.done.set()
+
+        # Waiters copy the shared result, so the leader must not hand it out
+        if waiters:
+            return copy.deepcopy(flight.result), False
+        return flight.result, False
+
+    def __len__(self) -> int:
+        """Number of calls currently in flight."""
+        with self._lock:
+            return len(self._flights)
@@ -100,9 +100,9 @@ class MoodleCourses(MoodleBase):
         params = {'courseid': course_id}
         
         if options:
-            for idx, option in enumerate(options):
-                params[f'options[{idx}][name]'] = option['name']
-                params[f'options[{idx}][value]'] = option['value']
+            params['options'] = [
+                {'name': option['name'], 'value': option['value']} for option in options
+            ]
         
         return self.call_api('core_enrol_get_enrolled_users', params)
     
@@ -156,9 +156,9 @@ class MoodleCourses(MoodleBase):
         params = {}
         
         if criteria:
-            for idx, criterion in enumerate(criteria):
-                params[f'criteria[{idx}][key]'] = criterion['key']
-                params[f'criteria[{idx}][value]'] = criterion['value']
+            params['criteria'] = [
+                {'key': criterion['key'], 'value': criterion['value']} for criterion in criteria
+            ]
         
         return self.call_api('core_course_get_categories', params)
     
@@ -0,0 +1,26 @@
+"""
+Classification of Moodle web-service functions.
+
+Moodle names its read-only functions consistently
+(``core_group_get_course_groups``, ``core_course_search_courses``,
+``gradereport_user_get_grade_items``...), which lets the client decide
+which calls are safe to share, repeat or cache.
+"""
+
+import re
+
+
+_READ_FUNCTION = re.compile(r'_(get|search)_')
+
+
+def is_read_function(function_name: str) -> bool:
+    """
+    Check whether a web-service function only reads data.
+
+    Args:
+        function_name: Name of the Moodle API function
+
+    Returns:
+        True for get/search functions, False for anything that may modify data
+    """
+    return bool(_READ_FUNCTION.search(function_name))
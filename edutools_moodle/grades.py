@@ -46,20 +46,28 @@ class MoodleGrades(MoodleBase):
         except ValueError:
             raise ValueError(f"The grade provided ({grade}) is not a valid number.")
 
-        params = {
-            'assignmentid': assignment_id,
-            'applytoall': 1,
-            'grades[0][userid]': user_id,
-            'grades[0][grade]': grade,
-            'grades[0][attemptnumber]': attempt_number,
-            'grades[0][addattempt]': add_attempt,
-            'grades[0][workflowstate]': workflow_state,
+        grade_entry = {
+            'userid': user_id,
+            'grade': grade,
+            'attemptnumber': attempt_number,
+            'addattempt': add_attempt,
+            'workflowstate': workflow_state,
         }
 
         # Add feedback comment if provided
         if feedback_comment:
-            params['grades[0][plugindata][assignfeedbackcomments_editor][text]'] = feedback_comment
-            params['grades[0][plugindata][assignfeedbackcomments_editor][format]'] = 1  # HTML format
+            grade_entry['plugindata'] = {
+                'assignfeedbackcomments_editor': {
+                    'text': feedback_comment,
+                    'format': 1  # HTML format
+                }
+            }
+
+        params = {
+            'assignmentid': assignment_id,
+            'applytoall': 1,
+            'grades': [grade_entry],
+        }
 
         return self.call_api('mod_assign_save_grades', params)
 
@@ -107,16 +115,19 @@ class MoodleGrades(MoodleBase):
         # Build parameters for API
         params = {
             'assignmentid': assignment_id,
-            'applytoall': applytoall
+            'applytoall': applytoall,
+            'grades': [
+                {
+                    'userid': grade_entry['userid'],
+                    'grade': grade_entry['grade'],
+                    'attemptnumber': attemptnumber,
+                    'addattempt': addattempt,
+                    'workflowstate': workflowstate,
+                }
+                for grade_entry in grades
+            ]
         }
 
-        for index, grade_entry in enumerate(grades):
-            params[f'grades[{index}][userid]'] = grade_entry['userid']
-            params[f'grades[{index}][grade]'] = grade_entry['grade']
-            params[f'grades[{index}][attemptnumber]'] = attemptnumber
-            params[f'grades[{index}][addattempt]'] = addattempt
-            params[f'grades[{index}][workflowstate]'] = workflowstate
-
         return self.call_api('mod_assign_save_grades', params)
 
     def get_grades(
@@ -205,14 +216,20 @@ class MoodleGrades(MoodleBase):
         params = {
             'assignmentid': assignment_id,
             'applytoall': 1,
-            'grades[0][userid]': user_id,
-            'grades[0][grade]': grade,
-            'grades[0][attemptnumber]': attempt_number,
-            'grades[0][addattempt]': add_attempt,
-            'grades[0][workflowstate]': workflow_state,
-            # Always include feedback structure to avoid NULL errors
-            'grades[0][plugindata][assignfeedbackcomments_editor][text]': feedback,
-            'grades[0][plugindata][assignfeedbackcomments_editor][format]': 1  # HTML format
+            'grades': [{
+                'userid': user_id,
+                'grade': grade,
+                'attemptnumber': attempt_number,
+                'addattempt': add_attempt,
+                'workflowstate': workflow_state,
+                # Always include feedback structure to avoid NULL errors
+                'plugindata': {
+                    'assignfeedbackcomments_editor': {
+                        'text': feedback,
+                        'format': 1  # HTML format
+                    }
+                }
+            }]
         }
 
         return self.call_api('mod_assign_save_grades', params)
@@ -255,18 +272,19 @@ class MoodleGrades(MoodleBase):
         Returns:
             List of grade dictionaries for the assignment
         """
-        params = {'assignmentids[0]': assignment_id}
+        params = {'assignmentids': [assignment_id]}
         
         if user_ids:
-            for i, user_id in enumerate(user_ids):
-                params[f'userids[{i}]'] = user_id
+            params['userids'] = list(user_ids)
         
         response = self.call_api('mod_assign_get_grades', params)
         
+        grades: List[Dict[str, Any]] = []
         if isinstance(response, dict) and 'assignments' in response:
-            assignments = response.get('assignments', [])
-            if assignments:
-                return assignments[0].get('grades', [])
+            # A call split on userids may list the assignment once per request
+            for assignment in response.get('assignments') or []:
+                if assignment.get('assignmentid', assignment_id) == assignment_id:
+                    grades.extend(assignment.get('grades', []))
         
-        return []
+        return grades
 
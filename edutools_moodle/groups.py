@@ -4,8 +4,42 @@ Groups management module for Moodle API.
 Handles operations related to groups, groupings, and cohorts.
 """
 
-from .base import MoodleBase
-from typing import List, Dict, Any, Optional
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from .base import MoodleBase, MoodleAPIError, MoodleAuthenticationError, MoodleResourceNotFoundError
+from .membership import GroupMembershipIndex
+from .cohorts import CohortDirectory
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple, Union
+
+
+# Upper bound on list items (members, group IDs) per bulk write request,
+# so a call stays reasonably small even when max_input_vars is disabled
+MAX_ITEMS_PER_REQUEST = 500
+
+# Moodle error codes that blame one item of a list rather than the whole
+# request (unknown group or user, invalid value such as a user not enrolled
+# in the course): only chunks rejected with these are bisected; others
+# (e.g. nopermissions) fail the chunk
+ITEM_ERROR_CODES = frozenset({
+    'invalidparameter', 'invalidrecord', 'invalidrecordunknown', 'usernotincourse',
+})
+
+# Warnings of core_cohort_add_cohort_members, which name the user or cohort
+# that does not exist ("user id=5 not exists") or the existing membership
+# ("record already exists: cohort(id:3) user(id:5)")
+MISSING_USER_WARNING = re.compile(r'\buser id=(\d+) not exists')
+MISSING_COHORT_WARNING = re.compile(r'\bcohort id=(\d+) not exists')
+EXISTING_MEMBER_WARNING = re.compile(r'already exists: cohort\(id:(\d+)\) user\(id:(\d+)\)')
+
+# Moodle delivers each instant message (and its notifications) before
+# answering, so message requests are kept smaller to stay within timeouts
+MESSAGES_PER_REQUEST = 100
+
+
+def _member_key(member: Dict[str, int]) -> Tuple[int, int]:
+    """(group or cohort ID, user ID) of a member dictionary."""
+    return member.get('groupid', member.get('cohortid')), member['userid']
 
 
 class MoodleGroups(MoodleBase):
@@ -13,6 +47,8 @@ class MoodleGroups(MoodleBase):
     Class for managing groups, groupings, and cohorts in Moodle.
     """
 
+    _cohort_directory: Optional[CohortDirectory] = None
+
     # ========== Groups Methods ==========
 
     def get_course_groups(self, course_id: int) -> List[Dict[str, Any]]:
@@ -77,12 +113,13 @@ class MoodleGroups(MoodleBase):
         Returns:
             API response with created group information
         """
-        params = {
-            'groups[0][courseid]': course_id,
-            'groups[0][name]': group_name,
+        group = {
+            'courseid': course_id,
+            'name': group_name,
         }
         if description:
-            params['groups[0][description]'] = description
+            group['description'] = description
+        params = {'groups': [group]}
 
         return self.call_api('core_group_create_groups', params)
 
@@ -99,9 +136,107 @@ class MoodleGroups(MoodleBase):
         Raises:
             Exception: If the deletion operation fails
         """
-        params = {'groupids[0]': group_id}
+        params = {'groupids': [group_id]}
         return self.call_api('core_group_delete_groups', params)
 
+    def create_groups(
+        self,
+        course_id: int,
+        groups: Iterable[Union[str, Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Create many groups in a course, skipping those that already exist.
+
+        The course groups are listed once; the missing groups are then created
+        with one core_group_create_groups call, split into chunks by
+        max_input_vars. Groups are matched by name, so running the same call
+        again creates nothing and returns the same mapping.
+
+        Args:
+            course_id: ID of the course
+            groups: Group names, or dicts with 'name' and optional 'description'
+                and 'idnumber'
+
+        Returns:
+            Dictionary with:
+                - groups: Dictionary mapping each requested group name that
+                  exists (created or found) to its ID
+                - errors: List of {'group_name', 'error'} dicts for the groups
+                  that could not be created
+
+        Raises:
+            ValueError: If a group has no name
+
+        Example:
+            >>> moodle.groups.create_groups(course_id, [
+            ...     'Group A',
+            ...     {'name': 'Lab 1', 'idnumber': 'LAB1', 'description': 'Monday lab'},
+            ... ])
+            {'groups': {'Group A': 12, 'Lab 1': 13}, 'errors': []}
+        """
+        specs: Dict[str, Dict[str, Any]] = {}
+        for group in groups:
+            spec = {'name': group} if isinstance(group, str) else dict(group)
+            if not spec.get('name'):
+                raise ValueError(f"Group without a name: {group!r}")
+            specs.setdefault(spec['name'], spec)
+        if not specs:
+            return {'groups': {}, 'errors': []}
+
+        group_ids = self.get_all_course_groups_dict(course_id)
+        missing = [spec for name, spec in specs.items() if name not in group_ids]
+        errors: Dict[str, str] = {}
+        if missing:
+            created, errors = self._create_groups(course_id, missing)
+            group_ids.update(created)
+            if errors:
+                self.logger.warning(f"Failed to create {len(errors)} of {len(missing)} groups "
+                                    f"in course {course_id}")
+
+        self.logger.info(f"Created {len(missing) - len(errors)} of {len(specs)} groups "
+                         f"in course {course_id}")
+        return {
+            'groups': {name: group_ids[name] for name in specs if name in group_ids},
+            'errors': [{'group_name': name, 'error': error} for name, error in errors.items()],
+        }
+
+    def delete_groups(self, group_ids: Iterable[int]) -> Dict[str, Any]:
+        """
+        Delete many groups.
+
+        core_group_delete_groups silently skips the IDs of groups that do
+        not exist, so the IDs are first looked up with core_group_get_groups,
+        which rejects a whole call for one unknown ID: a rejected chunk is
+        split until the unknown IDs are isolated. The existing groups are
+        then deleted in chunks.
+
+        Args:
+            group_ids: IDs of the groups to delete
+
+        Returns:
+            Dictionary with:
+                - deleted: IDs of the deleted groups
+                - errors: List of {'group_id', 'error'} dicts, for unknown
+                  groups and groups Moodle refused to delete
+
+        Example:
+            >>> moodle.groups.delete_groups([12, 13, 999])
+            {'deleted': [12, 13], 'errors': [{'group_id': 999, 'error': '...'}]}
+        """
+        group_ids = list(dict.fromkeys(group_ids))
+        failures = self._send_chunks('core_group_get_groups', 'groupids', group_ids,
+                                     key=int, leaves_per_item=1)
+        existing = [group_id for group_id in group_ids if group_id not in failures]
+        failures.update(self._send_chunks('core_group_delete_groups', 'groupids', existing,
+                                          key=int, leaves_per_item=1))
+        deleted = [group_id for group_id in group_ids if group_id not in failures]
+        if failures:
+            self.logger.warning(f"Failed to delete {len(failures)} of {len(group_ids)} groups")
+        return {
+            'deleted': deleted,
+            'errors': [{'group_id': group_id, 'error': error} for group_id, error in failures.items()],
+        }
+
     def add_user_to_group(self, group_id: int, user_id: int) -> Dict[str, Any]:
         """
         Add a user to a group.
@@ -114,8 +249,7 @@ class MoodleGroups(MoodleBase):
             API response
         """
         params = {
-            'members[0][groupid]': group_id,
-            'members[0][userid]': user_id,
+            'members': [{'groupid': group_id, 'userid': user_id}]
         }
         return self.call_api('core_group_add_group_members', params)
 
@@ -131,11 +265,89 @@ class MoodleGroups(MoodleBase):
             API response
         """
         params = {
-            'members[0][groupid]': group_id,
-            'members[0][userid]': user_id,
+            'members': [{'groupid': group_id, 'userid': user_id}]
         }
         return self.call_api('core_group_delete_group_members', params)
 
+    def add_members(
+        self,
+        pairs: Iterable[Tuple[int, int]],
+        concurrency: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Add many users to groups.
+
+        Pairs are sent in core_group_add_group_members calls sized to
+        max_input_vars. A chunk rejected by Moodle (e.g. a user not enrolled
+        in the course) is split until the failing pairs are isolated, so the
+        valid pairs are still added.
+
+        Args:
+            pairs: (group_id, user_id) pairs, possibly across groups and courses
+            concurrency: Number of chunks sent at once (default: 1, sequential)
+
+        Returns:
+            Dictionary with 'success' count and 'errors' list (one dict with
+            'group_id', 'user_id' and 'error' per failed pair)
+
+        Raises:
+            ValueError: If concurrency < 1
+            MoodleAuthenticationError: If the token is rejected
+
+        Example:
+            >>> result = moodle.groups.add_members([(12, 101), (12, 102), (13, 103)])
+            >>> result['errors']
+            []
+        """
+        return self._bulk_members('core_group_add_group_members', pairs, concurrency)
+
+    def remove_members(
+        self,
+        pairs: Iterable[Tuple[int, int]],
+        concurrency: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Remove many users from groups.
+
+        Works like add_members() with core_group_delete_group_members.
+        Removing a user who is not a member of the group is not an error.
+
+        Args:
+            pairs: (group_id, user_id) pairs
+            concurrency: Number of chunks sent at once (default: 1, sequential)
+
+        Returns:
+            Dictionary with 'success' count and 'errors' list (one dict with
+            'group_id', 'user_id' and 'error' per failed pair)
+
+        Raises:
+            ValueError: If concurrency < 1
+            MoodleAuthenticationError: If the token is rejected
+        """
+        return self._bulk_members('core_group_delete_group_members', pairs, concurrency)
+
+    def _bulk_members(
+        self,
+        function_name: str,
+        pairs: Iterable[Tuple[int, int]],
+        concurrency: int
+    ) -> Dict[str, Any]:
+        """Send (group_id, user_id) pairs and build the add/remove_members() result."""
+        if concurrency < 1:
+            raise ValueError("concurrency must be a positive integer")
+
+        unique = list(dict.fromkeys((group_id, user_id) for group_id, user_id in pairs))
+        members = [{'groupid': group_id, 'userid': user_id} for group_id, user_id in unique]
+        failures = self._change_members(function_name, members, concurrency)
+
+        return {
+            'success': len(unique) - len(failures),
+            'errors': [
+                {'group_id': group_id, 'user_id': user_id, 'error': error}
+                for (group_id, user_id), error in failures.items()
+            ]
+        }
+
     def get_group_members(self, group_id: int) -> List[int]:
         """
         Get all members of a group.
@@ -146,7 +358,7 @@ class MoodleGroups(MoodleBase):
         Returns:
             List of user IDs in the group
         """
-        params = {'groupids[0]': group_id}
+        params = {'groupids': [group_id]}
         response = self.call_api('core_group_get_group_members', params)
 
         user_ids = []
@@ -173,15 +385,36 @@ class MoodleGroups(MoodleBase):
             return []
         
         # Get detailed info for each user
-        params = {}
-        params['field'] = 'id'
-        for i, user_id in enumerate(user_ids):
-            params[f'values[{i}]'] = user_id
+        params = {
+            'field': 'id',
+            'values': user_ids
+        }
         
         users_info = self.call_api('core_user_get_users_by_field', params)
         
         return users_info if isinstance(users_info, list) else []
 
+    def membership_index(self, course_id: int, fresh: bool = False) -> GroupMembershipIndex:
+        """
+        Load every group membership of a course into an in-memory index.
+
+        Two requests build the index; lookups for any user or group then
+        make no further calls. Prefer it over get_user_groups() and
+        is_user_in_group() when answering many questions about one course.
+
+        Args:
+            course_id: ID of the course
+            fresh: Bypass cached responses when building the index (default: False)
+
+        Returns:
+            GroupMembershipIndex of the course (call refresh() to reload it)
+
+        Example:
+            >>> index = moodle.groups.membership_index(course_id)
+            >>> {user_id: index.user_group_names(user_id) for user_id in student_ids}
+        """
+        return GroupMembershipIndex(self, course_id, fresh=fresh)
+
     def get_user_groups(self, course_id: int, user_id: int) -> List[Dict[str, Any]]:
         """
         Get all groups that a user belongs to in a specific course.
@@ -192,17 +425,40 @@ class MoodleGroups(MoodleBase):
 
         Returns:
             List of group dictionaries the user is a member of
+
+        Note:
+            Every call fetches the course groups and memberships; for many
+            lookups in one course use membership_index().
         """
-        # Get all groups in the course
-        all_groups = self.get_course_groups(course_id)
+        if self.supports_batching():
+            # Fetch the course groups and the user's groups in one round trip;
+            # Moodle rejects the whole batch when the token's service lacks one
+            # of the functions, so failed calls are redone without batching
+            with self.batch() as batch:
+                groups_call = batch.call_api('core_group_get_course_groups', {'courseid': course_id})
+                user_groups_call = batch.call_api('core_group_get_course_user_groups', {
+                    'courseid': course_id,
+                    'userid': user_id
+                })
+
+            if groups_call.ok:
+                all_groups = groups_call.result()
+            else:
+                self.logger.debug(f"Batched groups lookup failed, retrying alone: {groups_call.error}")
+                all_groups = self.get_course_groups(course_id)
+            if user_groups_call.ok:
+                response = user_groups_call.result()
+                user_group_ids = {group.get('id') for group in response.get('groups', [])}
+                return [group for group in all_groups if group.get('id') in user_group_ids]
+        else:
+            # Get all groups in the course
+            all_groups = self.get_course_groups(course_id)
         
         if not all_groups:
             return []
         
         # Get members of all groups in one API call
-        params = {}
-        for i, group in enumerate(all_groups):
-            params[f'groupids[{i}]'] = group['id']
+        params = {'groupids': [group['id'] for group in all_groups]}
         
         members_response = self.call_api('core_group_get_group_members', params)
         
@@ -288,6 +544,88 @@ class MoodleGroups(MoodleBase):
         except Exception as e:
             raise Exception(f"Error moving user {user_id} to group {new_group_id}: {e}")
 
+    def move_users(
+        self,
+        course_id: int,
+        moves: Iterable[Tuple[int, Optional[int], int]],
+        concurrency: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Move many users from one group to another.
+
+        The course groups are listed once and moves from or to a group of
+        another course are not sent. All additions are sent first in chunked
+        core_group_add_group_members calls, then the users that were added
+        are removed from their old group with chunked
+        core_group_delete_group_members calls. A user whose addition fails
+        stays in the old group, so nobody is left without a group by a
+        partial failure.
+
+        Args:
+            course_id: ID of the course every old and new group must belong to
+            moves: (user_id, old_group_id, new_group_id) triples; old_group_id
+                can be None for users not in a group yet
+            concurrency: Number of chunks sent at once (default: 1, sequential)
+
+        Returns:
+            Dictionary with 'success' count and 'errors' list (one dict with
+            'user_id', 'old_group_id', 'new_group_id', 'step' ('course',
+            'add' or 'remove') and 'error' per failed move)
+
+        Raises:
+            ValueError: If concurrency < 1
+
+        Example:
+            >>> moodle.groups.move_users(12, [(101, 5, 6), (102, 5, 7), (103, None, 6)])
+            {'success': 3, 'errors': []}
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be a positive integer")
+
+        course_groups = {group['id'] for group in self.get_course_groups(course_id)}
+        results = {'success': 0, 'errors': []}
+        valid = []
+        for user_id, old, new in moves:
+            outside = [group_id for group_id in (old, new)
+                       if group_id is not None and group_id not in course_groups]
+            if outside:
+                results['errors'].append({
+                    'user_id': user_id,
+                    'old_group_id': old,
+                    'new_group_id': new,
+                    'step': 'course',
+                    'error': f"Group {outside[0]} is not in course {course_id}"
+                })
+            else:
+                valid.append((user_id, old, new))
+
+        moves = valid
+        additions = [{'groupid': new, 'userid': user_id} for user_id, old, new in moves if old != new]
+        add_failures = self._change_members('core_group_add_group_members', additions, concurrency)
+
+        removals = [{'groupid': old, 'userid': user_id} for user_id, old, new in moves
+                    if old is not None and old != new and (new, user_id) not in add_failures]
+        remove_failures = self._change_members('core_group_delete_group_members', removals, concurrency)
+
+        for user_id, old, new in moves:
+            step, error = None, None
+            if old != new:
+                step, error = 'add', add_failures.get((new, user_id))
+                if error is None and old is not None:
+                    step, error = 'remove', remove_failures.get((old, user_id))
+            if error:
+                results['errors'].append({
+                    'user_id': user_id,
+                    'old_group_id': old,
+                    'new_group_id': new,
+                    'step': step,
+                    'error': error
+                })
+            else:
+                results['success'] += 1
+
+        return results
+
     def batch_enroll_users_to_groups(
         self,
         course_id: int,
@@ -296,12 +634,21 @@ class MoodleGroups(MoodleBase):
         """
         Enroll multiple users to groups in batch.
 
+        The course groups are listed once, every missing group is created in
+        one core_group_create_groups call and the members are added with
+        chunked core_group_add_group_members calls, so the number of requests
+        does not grow with the number of rows. When Moodle rejects a chunk
+        (it adds a chunk's members all-or-nothing), the chunk is split until
+        the failing rows are isolated and the other rows still succeed.
+
         Args:
             course_id: ID of the course
             enrollments: List of dicts with 'user_id', 'group_name' keys
 
         Returns:
-            Dictionary with 'success' count and 'errors' list
+            Dictionary with 'success' count, 'errors' list (one dict with
+            'user_id', 'group_name' and 'error' per failed row) and
+            'created_groups' (names of the groups that were created)
 
         Example:
             enrollments = [
@@ -309,29 +656,326 @@ class MoodleGroups(MoodleBase):
                 {'user_id': 456, 'group_name': 'Group B'}
             ]
         """
-        results = {'success': 0, 'errors': []}
+        results = {'success': 0, 'errors': [], 'created_groups': []}
 
+        rows = []
         for enrollment in enrollments:
             user_id = enrollment.get('user_id')
             group_name = enrollment.get('group_name')
-
-            try:
-                # Get or create group
-                group_id = self.create_or_get_group(course_id, group_name)
-                
-                # Add user to group
-                self.add_user_to_group(group_id, user_id)
-                results['success'] += 1
-
-            except Exception as e:
+            if user_id is None or not group_name:
+                results['errors'].append({
+                    'user_id': user_id,
+                    'group_name': group_name,
+                    'error': "Both 'user_id' and 'group_name' are required"
+                })
+            else:
+                rows.append((user_id, group_name))
+
+        if not rows:
+            return results
+
+        # One listing for all rows, then one creation call for the missing groups
+        group_ids = self.get_all_course_groups_dict(course_id)
+        missing = list(dict.fromkeys(name for _, name in rows if name not in group_ids))
+        group_errors: Dict[str, str] = {}
+        if missing:
+            created, group_errors = self._create_groups(
+                course_id, [{'name': name, 'description': name} for name in missing]
+            )
+            group_ids.update(created)
+            results['created_groups'] = [name for name in missing if name in created]
+
+        members = [
+            {'groupid': group_ids[group_name], 'userid': user_id}
+            for user_id, group_name in dict.fromkeys(rows)
+            if group_name not in group_errors
+        ]
+        failures = self._change_members('core_group_add_group_members', members)
+
+        for user_id, group_name in rows:
+            error = group_errors.get(group_name) or failures.get((group_ids.get(group_name), user_id))
+            if error:
                 results['errors'].append({
                     'user_id': user_id,
                     'group_name': group_name,
-                    'error': str(e)
+                    'error': error
                 })
+            else:
+                results['success'] += 1
 
         return results
 
+    def sync_groups(
+        self,
+        course_id: int,
+        desired: Dict[str, Iterable[int]],
+        delete_unlisted_groups: bool = False,
+        dry_run: bool = False,
+        concurrency: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Make the course groups match a desired group -> members state.
+
+        The current state is read in bulk (see membership_index()) and only
+        the difference is applied: missing groups are created in one call,
+        then extra members are removed and missing members added in chunked
+        calls. Groups not listed in desired are left alone unless
+        delete_unlisted_groups is True. Re-running a sync that is already
+        applied makes no write call.
+
+        Args:
+            course_id: ID of the course
+            desired: Group name -> user IDs that should be its exact members
+            delete_unlisted_groups: Delete course groups missing from desired
+            dry_run: Only compute and return the plan, without writing anything
+            concurrency: Number of member chunks sent at once (default: 1)
+
+        Returns:
+            Dictionary with the plan and its outcome:
+            - 'create_groups': names of the groups to create
+            - 'add' / 'remove': (group_name, user_id) memberships to add / remove
+            - 'delete_groups': names of the groups to delete
+            - 'estimated_calls': number of write requests the plan needs
+            - 'dry_run': True if nothing was applied
+            - 'errors': failed operations, each a dict with 'action'
+              ('create', 'add', 'remove' or 'delete'), 'group_name', 'user_id'
+              (None for group operations) and 'error'
+
+        Raises:
+            ValueError: If concurrency < 1
+
+        Example:
+            >>> plan = moodle.groups.sync_groups(12, {'Lab A': [101, 102], 'Lab B': [103]},
+            ...                                  dry_run=True)
+            >>> plan['add'], plan['estimated_calls']
+            ([('Lab B', 103)], 1)
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be a positive integer")
+
+        # The diff must start from Moodle's current state, not a cached one
+        index = self.membership_index(course_id, fresh=True)
+        target = {name: set(user_ids) for name, user_ids in desired.items()}
+
+        create = [name for name in target if index.group_id(name) is None]
+        add: List[Tuple[str, int]] = []
+        remove: List[Tuple[str, int]] = []
+        for name, user_ids in target.items():
+            current = index.members(index.group_id(name)) if name not in create else frozenset()
+            add.extend((name, user_id) for user_id in sorted(user_ids - current))
+            remove.extend((name, user_id) for user_id in sorted(current - user_ids))
+        delete_ids = []
+        if delete_unlisted_groups:
+            delete_ids = [group_id for group_id, group in index.groups.items()
+                          if group.get('name') not in target]
+        member_chunk = self._chunk_size()
+
+        plan = {
+            'create_groups': create,
+            'add': add,
+            'remove': remove,
+            'delete_groups': [index.groups[group_id].get('name') for group_id in delete_ids],
+            'estimated_calls': (
+                self._estimate_requests(len(create), 3)
+                + math.ceil(len(remove) / member_chunk)
+                + math.ceil(len(add) / member_chunk)
+                + math.ceil(len(delete_ids) / self._chunk_size(1))
+            ),
+            'dry_run': dry_run,
+            'errors': [],
+        }
+        if dry_run:
+            return plan
+
+        errors = plan['errors']
+        group_ids = {name: index.group_id(name) for name in target if name not in create}
+        group_errors: Dict[str, str] = {}
+        if create:
+            created, group_errors = self._create_groups(
+                course_id, [{'name': name, 'description': name} for name in create]
+            )
+            group_ids.update(created)
+            errors.extend({'action': 'create', 'group_name': name, 'user_id': None, 'error': error}
+                          for name, error in group_errors.items())
+
+        for action, function_name, memberships in (
+            ('remove', 'core_group_delete_group_members', remove),
+            ('add', 'core_group_add_group_members', add),
+        ):
+            members = [{'groupid': group_ids[name], 'userid': user_id}
+                       for name, user_id in memberships if name in group_ids]
+            failures = self._change_members(function_name, members, concurrency)
+            for name, user_id in memberships:
+                if name in group_errors:
+                    error = f"Group '{name}' could not be created: {group_errors[name]}"
+                else:
+                    error = failures.get((group_ids[name], user_id))
+                if error:
+                    errors.append({'action': action, 'group_name': name,
+                                   'user_id': user_id, 'error': error})
+
+        if delete_ids:
+            failures = self._send_chunks('core_group_delete_groups', 'groupids', delete_ids,
+                                         key=int, leaves_per_item=1)
+            errors.extend({'action': 'delete', 'group_name': index.groups[group_id].get('name'),
+                           'user_id': None, 'error': error} for group_id, error in failures.items())
+
+        return plan
+
+    def _estimate_requests(self, items: int, leaves_per_item: int) -> int:
+        """Number of requests call_api needs to send a list of items."""
+        if not items:
+            return 0
+        if not self.max_input_vars:
+            return 1
+        per_request = max(1, self._input_vars_budget // leaves_per_item)
+        return math.ceil(items / per_request)
+
+    def _create_groups(
+        self,
+        course_id: int,
+        specs: List[Dict[str, Any]]
+    ) -> Tuple[Dict[str, int], Dict[str, str]]:
+        """
+        Create groups in one call, isolating the groups Moodle rejects.
+
+        Args:
+            course_id: ID of the course
+            specs: Group dicts with 'name' and optional 'description' and 'idnumber'
+
+        Returns:
+            Tuple of (name -> ID of the created groups, name -> error message)
+        """
+        groups = [{'courseid': course_id, **spec} for spec in specs]
+        try:
+            response = self.call_api('core_group_create_groups', {'groups': groups})
+            # Moodle returns the groups in request order, with trimmed names
+            return {spec['name']: group['id'] for spec, group in zip(specs, response)}, {}
+        except MoodleAuthenticationError:
+            raise
+        except Exception as e:
+            if len(specs) == 1:
+                return {}, {specs[0]['name']: str(e)}
+            error = e
+
+        # Moodle creates a request's groups all-or-nothing, but earlier chunks
+        # of a split call may have gone through: relist, then retry one by one
+        self.logger.warning(f"Bulk group creation failed ({error}), creating groups one by one")
+        existing = self.get_all_course_groups_dict(course_id)
+        created: Dict[str, int] = {}
+        errors: Dict[str, str] = {}
+        for spec in specs:
+            group_id = existing.get(spec['name'], existing.get(spec['name'].strip()))
+            if group_id is not None:
+                created[spec['name']] = group_id
+                continue
+            spec_created, spec_errors = self._create_groups(course_id, [spec])
+            created.update(spec_created)
+            errors.update(spec_errors)
+        return created, errors
+
+    def _chunk_size(self, leaves_per_item: int = 2) -> int:
+        """Number of list items (of leaves_per_item form variables each) that fit in one request."""
+        if not self.max_input_vars:
+            return MAX_ITEMS_PER_REQUEST
+        return max(1, min(MAX_ITEMS_PER_REQUEST, self._input_vars_budget // leaves_per_item))
+
+    def _change_members(
+        self,
+        function_name: str,
+        members: List[Dict[str, int]],
+        concurrency: int = 1
+    ) -> Dict[Tuple[int, int], str]:
+        """
+        Send group (or cohort) member additions or removals in chunks.
+
+        Args:
+            function_name: core_group_add_group_members, core_group_delete_group_members
+                or core_cohort_delete_cohort_members
+            members: List of {'groupid': ..., 'userid': ...} dicts
+                ({'cohortid': ..., 'userid': ...} for cohorts)
+            concurrency: Number of chunks sent at once
+
+        Returns:
+            Error message per failed (group_id or cohort_id, user_id) pair
+        """
+        return self._send_chunks(function_name, 'members', members, _member_key,
+                                 concurrency=concurrency)
+
+    def _send_chunks(
+        self,
+        function_name: str,
+        param: str,
+        items: List[Any],
+        key: Callable[[Any], Any],
+        leaves_per_item: int = 2,
+        concurrency: int = 1
+    ) -> Dict[Any, str]:
+        """
+        Send a list parameter in chunks, isolating the items Moodle rejects.
+
+        Args:
+            function_name: Name of the function (a write function, or a read
+                function rejecting unknown IDs, such as core_group_get_groups)
+            param: Name of the list parameter (e.g. 'members', 'groupids')
+            items: Items of the list
+            key: Identifies an item in the returned failures
+            leaves_per_item: Form variables per item, to size the chunks
+            concurrency: Number of chunks sent at once
+
+        Returns:
+            Error message per key of failed item
+        """
+        size = self._chunk_size(leaves_per_item)
+        chunks = [items[start:start + size] for start in range(0, len(items), size)]
+
+        failures: Dict[Any, str] = {}
+        if concurrency > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(chunks))) as executor:
+                futures = [executor.submit(self._send_bisecting, function_name, param, chunk, key)
+                           for chunk in chunks]
+                for future in futures:
+                    failures.update(future.result())
+        else:
+            for chunk in chunks:
+                failures.update(self._send_bisecting(function_name, param, chunk, key))
+        return failures
+
+    def _send_bisecting(
+        self,
+        function_name: str,
+        param: str,
+        items: List[Any],
+        key: Callable[[Any], Any]
+    ) -> Dict[Any, str]:
+        """
+        Send one chunk, bisecting it when Moodle rejects it.
+
+        A Moodle exception fails the whole request (the group and cohort
+        write functions run in a transaction), so the chunk is split in
+        halves until each rejected item is identified. Adding an existing
+        member or removing a missing one is a no-op, so resending is safe.
+        Only errors in ITEM_ERROR_CODES are bisected: request-wide errors
+        (missing capability, disabled function) and transport errors
+        (timeouts, HTTP errors) fail the whole chunk in one request.
+
+        Returns:
+            Error message per key of failed item
+        """
+        try:
+            self.call_api(function_name, {param: items})
+            return {}
+        except MoodleAuthenticationError:
+            raise
+        except Exception as e:
+            if (isinstance(e, MoodleAPIError) and e.errorcode in ITEM_ERROR_CODES
+                    and len(items) > 1):
+                middle = len(items) // 2
+                failures = self._send_bisecting(function_name, param, items[:middle], key)
+                failures.update(self._send_bisecting(function_name, param, items[middle:], key))
+                return failures
+            return {key(item): str(e) for item in items}
+
     def send_message_to_group(self, group_id: int, subject: str, message: str) -> Dict[str, Any]:
         """
         Send a message to all members of a group.
@@ -347,21 +991,134 @@ class MoodleGroups(MoodleBase):
         Raises:
             Exception: If the group has no members or message sending fails
         """
-        members = self.get_group_members_info(group_id)
+        # Only the member IDs are needed: no profile lookup
+        members = self.get_group_members(group_id)
 
         if not members:
             raise Exception(f"Group {group_id} has no members")
 
         full_message = f"<strong>{subject}</strong><br>{message}"
 
-        params = {}
-        for i, member in enumerate(members):
-            params[f'messages[{i}][touserid]'] = member['id']
-            params[f'messages[{i}][text]'] = full_message
-            params[f'messages[{i}][textformat]'] = '1'  # HTML format
+        params = {
+            'messages': [
+                {
+                    'touserid': user_id,
+                    'text': full_message,
+                    'textformat': 1  # HTML format
+                }
+                for user_id in members
+            ]
+        }
 
         return self.call_api('core_message_send_instant_messages', params)
 
+    def send_message_to_groups(
+        self,
+        group_ids: Iterable[int],
+        subject: str,
+        message: str,
+        concurrency: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Send a message to the members of several groups, once per user.
+
+        The members of all groups are fetched with one
+        core_group_get_group_members call and deduplicated, so a user in
+        several groups receives the message once. Messages are sent in
+        core_message_send_instant_messages calls of at most
+        MESSAGES_PER_REQUEST recipients (fewer if max_input_vars requires it),
+        several at a time with concurrency > 1. A failed request is not
+        resent, since Moodle may have delivered part of it.
+
+        Args:
+            group_ids: IDs of the groups
+            subject: Subject of the message
+            message: Content of the message (HTML supported)
+            concurrency: Number of requests sent at once (default: 1, sequential)
+
+        Returns:
+            Dictionary with:
+                - sent: Dictionary mapping each reached user ID to its message ID
+                - errors: List of {'user_id', 'error'} dicts
+
+        Raises:
+            ValueError: If concurrency < 1
+            MoodleAuthenticationError: If the token is rejected
+
+        Example:
+            >>> result = moodle.groups.send_message_to_groups([12, 13], 'Exam', 'Room B12', concurrency=4)
+            >>> len(result['sent']), result['errors']
+            (58, [])
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be a positive integer")
+
+        group_ids = list(dict.fromkeys(group_ids))
+        recipients: List[int] = []
+        if group_ids:
+            response = self.call_api('core_group_get_group_members', {'groupids': group_ids})
+            recipients = list(dict.fromkeys(user_id for entry in response or []
+                                            for user_id in entry.get('userids', [])))
+
+        results: Dict[str, Any] = {'sent': {}, 'errors': []}
+        if not recipients:
+            self.logger.warning(f"No members to message in groups {group_ids}")
+            return results
+
+        full_message = f"<strong>{subject}</strong><br>{message}"
+        size = min(MESSAGES_PER_REQUEST, self._chunk_size(leaves_per_item=3))
+        chunks = [recipients[start:start + size] for start in range(0, len(recipients), size)]
+
+        if concurrency > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(chunks))) as executor:
+                outcomes = list(executor.map(lambda chunk: self._send_messages(chunk, full_message),
+                                             chunks))
+        else:
+            outcomes = [self._send_messages(chunk, full_message) for chunk in chunks]
+
+        for sent, errors in outcomes:
+            results['sent'].update(sent)
+            results['errors'].extend(errors)
+
+        self.logger.info(f"Sent message to {len(results['sent'])} of {len(recipients)} members "
+                         f"of {len(group_ids)} groups")
+        return results
+
+    def _send_messages(
+        self,
+        user_ids: List[int],
+        text: str
+    ) -> Tuple[Dict[int, int], List[Dict[str, Any]]]:
+        """
+        Send one core_message_send_instant_messages request.
+
+        Returns:
+            Tuple of (user ID -> message ID, list of {'user_id', 'error'} dicts)
+        """
+        messages = [{'touserid': user_id, 'text': text, 'textformat': 1} for user_id in user_ids]
+        try:
+            response = self.call_api('core_message_send_instant_messages', {'messages': messages})
+        except MoodleAuthenticationError:
+            raise
+        except Exception as e:
+            return {}, [{'user_id': user_id, 'error': str(e)} for user_id in user_ids]
+
+        if not isinstance(response, list) or len(response) != len(user_ids):
+            error = f"Unexpected response for core_message_send_instant_messages: {response}"
+            self.logger.error(error)
+            return {}, [{'user_id': user_id, 'error': error} for user_id in user_ids]
+
+        sent: Dict[int, int] = {}
+        errors: List[Dict[str, Any]] = []
+        # Moodle answers one entry per message, in order
+        for user_id, entry in zip(user_ids, response):
+            if entry.get('msgid', -1) > 0:
+                sent[user_id] = entry['msgid']
+            else:
+                errors.append({'user_id': user_id,
+                               'error': entry.get('errormessage') or 'Message not sent'})
+        return sent, errors
+
     def get_user_groups_with_names(self, course_id: int, user_id: int) -> List[str]:
         """
         Get list of group names that a user belongs to in a course.
@@ -400,6 +1157,10 @@ class MoodleGroups(MoodleBase):
 
         Returns:
             True if user is in the group, False otherwise
+
+        Note:
+            Every call downloads the group's member list; for many lookups
+            in one course use membership_index().
         """
         try:
             members = self.get_group_members(group_id)
@@ -468,11 +1229,13 @@ class MoodleGroups(MoodleBase):
 
             # Create grouping if it doesn't exist
             params_create = {
-                'groupings[0][courseid]': course_id,
-                'groupings[0][name]': grouping_name,
-                'groupings[0][idnumber]': grouping_name,
-                'groupings[0][description]': description,
-                'groupings[0][descriptionformat]': 1,  # HTML format
+                'groupings': [{
+                    'courseid': course_id,
+                    'name': grouping_name,
+                    'idnumber': grouping_name,
+                    'description': description,
+                    'descriptionformat': 1,  # HTML format
+                }]
             }
             response_create = self.call_api('core_group_create_groupings', params_create)
 
@@ -499,7 +1262,7 @@ class MoodleGroups(MoodleBase):
             List of group dictionaries that belong to the grouping
         """
         params = {
-            'groupingids[0]': grouping_id,
+            'groupingids': [grouping_id],
             'returngroups': 1
         }
         
@@ -516,28 +1279,44 @@ class MoodleGroups(MoodleBase):
 
     def get_grouping_groups_with_members(
         self, 
-        grouping_id: int
+        grouping_id: int,
+        include_members: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Get all groups in a grouping WITH their member count.
         
         This is useful for identifying class groups or filtering by size.
+        The members of every group are fetched in one core_group_get_group_members
+        request (split only if it exceeds max_input_vars).
 
         Args:
             grouping_id: ID of the grouping
+            include_members: Also add a 'members' key with the user IDs of each group
 
         Returns:
             List of group dictionaries with added 'member_count' key
+            (and 'members' if include_members is True)
+
+        Raises:
+            MoodleAPIError: If the groups or their members cannot be retrieved
         """
         groups = self.get_grouping_groups(grouping_id)
-        
-        # Enrich each group with member count
+        if not groups:
+            return groups
+
+        response = self.call_api('core_group_get_group_members', {
+            'groupids': [group['id'] for group in groups]
+        })
+        members = {
+            entry.get('groupid'): entry.get('userids', [])
+            for entry in response or []
+        }
+
         for group in groups:
-            try:
-                members = self.get_group_members([group['id']])
-                group['member_count'] = len(members)
-            except Exception:
-                group['member_count'] = 0
+            user_ids = members.get(group['id'], [])
+            group['member_count'] = len(user_ids)
+            if include_members:
+                group['members'] = list(user_ids)
         
         return groups
 
@@ -558,8 +1337,7 @@ class MoodleGroups(MoodleBase):
             Exception: If the API call fails
         """
         params = {
-            'groupingid': grouping_id,
-            'groupid': group_id
+            'assignments': [{'groupingid': grouping_id, 'groupid': group_id}]
         }
         
         try:
@@ -586,8 +1364,7 @@ class MoodleGroups(MoodleBase):
             Exception: If the API call fails
         """
         params = {
-            'groupingid': grouping_id,
-            'groupid': group_id
+            'unassignments': [{'groupingid': grouping_id, 'groupid': group_id}]
         }
         
         try:
@@ -597,12 +1374,196 @@ class MoodleGroups(MoodleBase):
         except Exception as e:
             raise Exception(f"Failed to unassign group {group_id} from grouping {grouping_id}: {e}")
 
+    def assign_groups_to_groupings(
+        self,
+        course_id: int,
+        assignments: Iterable[Tuple[Union[int, str], int]],
+        concurrency: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Assign many groups to groupings of a course.
+
+        Groupings may be given by ID or by name. Names are resolved with one
+        listing of the course groupings, and the missing ones are created with
+        one core_group_create_groupings call. The (grouping, group) links are
+        then sent in core_group_assign_grouping calls sized to max_input_vars;
+        a chunk rejected by Moodle is split until the failing links are
+        isolated. Assigning a group already in the grouping is a no-op.
+
+        Requires permission: moodle/course:managegroups
+
+        Args:
+            course_id: ID of the course
+            assignments: (grouping ID or name, group_id) pairs
+            concurrency: Number of chunks sent at once (default: 1, sequential)
+
+        Returns:
+            Dictionary with 'success' count, 'errors' list (one dict with
+            'grouping_id', 'group_id' and 'error' per failed link; 'grouping_id'
+            is None and 'grouping_name' set when the grouping could not be
+            created) and 'created_groupings' (names of the groupings created)
+
+        Raises:
+            ValueError: If concurrency < 1
+            MoodleAuthenticationError: If the token is rejected
+
+        Example:
+            >>> moodle.groups.assign_groups_to_groupings(course_id, [
+            ...     ('Semester 1', 12), ('Semester 1', 13), (7, 14),
+            ... ])
+            {'success': 3, 'errors': [], 'created_groupings': ['Semester 1']}
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be a positive integer")
+
+        unique = list(dict.fromkeys(assignments))
+        results: Dict[str, Any] = {'success': 0, 'errors': [], 'created_groupings': []}
+
+        names = list(dict.fromkeys(grouping for grouping, _ in unique if isinstance(grouping, str)))
+        grouping_ids: Dict[str, int] = {}
+        if names:
+            existing = {grouping.get('name'): grouping['id']
+                        for grouping in self.get_course_groupings(course_id) or []}
+            grouping_ids = {name: existing[name] for name in names if name in existing}
+            missing = [name for name in names if name not in existing]
+            if missing:
+                created, grouping_errors = self._create_groupings(course_id, missing)
+                grouping_ids.update(created)
+                results['created_groupings'] = list(created)
+                for grouping, group_id in unique:
+                    if grouping in grouping_errors:
+                        results['errors'].append({'grouping_id': None, 'grouping_name': grouping,
+                                                  'group_id': group_id,
+                                                  'error': grouping_errors[grouping]})
+
+        links = list(dict.fromkeys(
+            (grouping_ids[grouping] if isinstance(grouping, str) else grouping, group_id)
+            for grouping, group_id in unique
+            if not isinstance(grouping, str) or grouping in grouping_ids
+        ))
+        result = self._bulk_groupings('core_group_assign_grouping', 'assignments', links, concurrency)
+        results['success'] = result['success']
+        results['errors'].extend(result['errors'])
+
+        self.logger.info(f"Assigned {results['success']} groups to groupings in course {course_id} "
+                         f"({len(results['errors'])} errors)")
+        return results
+
+    def unassign_groups_from_groupings(
+        self,
+        assignments: Iterable[Tuple[int, int]],
+        concurrency: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Remove many groups from groupings.
+
+        Works like assign_groups_to_groupings() with core_group_unassign_grouping;
+        groupings must be given by ID. Removing a group that is not in the
+        grouping is a no-op.
+
+        Requires permission: moodle/course:managegroups
+
+        Args:
+            assignments: (grouping_id, group_id) pairs
+            concurrency: Number of chunks sent at once (default: 1, sequential)
+
+        Returns:
+            Dictionary with 'success' count and 'errors' list (one dict with
+            'grouping_id', 'group_id' and 'error' per failed link)
+
+        Raises:
+            ValueError: If concurrency < 1
+            MoodleAuthenticationError: If the token is rejected
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be a positive integer")
+        links = list(dict.fromkeys(assignments))
+        return self._bulk_groupings('core_group_unassign_grouping', 'unassignments', links, concurrency)
+
+    def _bulk_groupings(
+        self,
+        function_name: str,
+        param: str,
+        links: List[Tuple[int, int]],
+        concurrency: int
+    ) -> Dict[str, Any]:
+        """Send (grouping_id, group_id) links and build the (un)assign result."""
+        items = [{'groupingid': grouping_id, 'groupid': group_id} for grouping_id, group_id in links]
+        failures = self._send_chunks(function_name, param, items,
+                                     key=lambda item: (item['groupingid'], item['groupid']),
+                                     concurrency=concurrency)
+        return {
+            'success': len(links) - len(failures),
+            'errors': [
+                {'grouping_id': grouping_id, 'group_id': group_id, 'error': error}
+                for (grouping_id, group_id), error in failures.items()
+            ]
+        }
+
+    def _create_groupings(
+        self,
+        course_id: int,
+        names: List[str]
+    ) -> Tuple[Dict[str, int], Dict[str, str]]:
+        """
+        Create groupings in one call, like create_or_get_grouping() does for one.
+
+        Args:
+            course_id: ID of the course
+            names: Names of the groupings to create
+
+        Returns:
+            Tuple of (name -> ID of the created groupings, name -> error message)
+        """
+        groupings = [{'courseid': course_id, 'name': name, 'idnumber': name,
+                      'description': '', 'descriptionformat': 1} for name in names]
+        try:
+            response = self.call_api('core_group_create_groupings', {'groupings': groupings})
+            return {grouping['name']: grouping['id'] for grouping in response}, {}
+        except MoodleAuthenticationError:
+            raise
+        except Exception as e:
+            if len(names) == 1:
+                return {}, {names[0]: str(e)}
+            error = e
+
+        # Earlier chunks of a split call may have gone through: relist, then retry one by one
+        self.logger.warning(f"Bulk grouping creation failed ({error}), creating groupings one by one")
+        existing = {grouping.get('name'): grouping['id']
+                    for grouping in self.get_course_groupings(course_id) or []}
+        created: Dict[str, int] = {}
+        errors: Dict[str, str] = {}
+        for name in names:
+            if name in existing:
+                created[name] = existing[name]
+                continue
+            name_created, name_errors = self._create_groupings(course_id, [name])
+            created.update(name_created)
+            errors.update(name_errors)
+        return created, errors
+
     # ========== Cohorts Methods ==========
 
+    @property
+    def cohort_directory(self) -> CohortDirectory:
+        """
+        Cached cohort names and member sets, shared by the cohort methods.
+
+        Created on first use with a 300 second TTL; set
+        cohort_directory.ttl to change it or call cohort_directory.refresh()
+        to reload.
+        """
+        if self._cohort_directory is None:
+            self._cohort_directory = CohortDirectory(self)
+        return self._cohort_directory
+
     def is_user_in_cohort(self, user_id: int, cohort_name: str = "IIR2425") -> bool:
         """
         Check if a user is enrolled in a specific cohort.
 
+        The cohort name and members come from cohort_directory, so repeated
+        checks make no request until its TTL expires.
+
         Args:
             user_id: ID of the user in Moodle
             cohort_name: Name of the cohort to check
@@ -610,42 +1571,19 @@ class MoodleGroups(MoodleBase):
         Returns:
             True if the user is in the cohort, False otherwise
         """
-        response = self.call_api("core_cohort_get_cohorts", {})
-
-        if not isinstance(response, list):
-            self.logger.error(f"Unexpected response for core_cohort_get_cohorts: {response}")
-            return False
-
-        # Find the cohort by name
-        cohort_id = None
-        for cohort in response:
-            if isinstance(cohort, dict) and cohort.get("name") == cohort_name:
-                cohort_id = cohort.get("id")
-                break
-
-        if not cohort_id:
+        cohort_id = self.cohort_directory.cohort_id(cohort_name)
+        if cohort_id is None:
             self.logger.warning(f"Cohort '{cohort_name}' not found")
             return False
 
-        # Get cohort members
-        params = {'cohortids[0]': cohort_id}
-        members_response = self.call_api("core_cohort_get_cohort_members", params)
-
-        if not isinstance(members_response, list):
-            self.logger.error(f"Unexpected response for core_cohort_get_cohort_members: {members_response}")
-            return False
-
-        # Check if user is in the members list
-        for cohort_data in members_response:
-            if cohort_data.get('cohortid') == cohort_id:
-                return user_id in cohort_data.get('userids', [])
-
-        return False
+        return self.cohort_directory.is_member(user_id, cohort_id)
 
     def enroll_user_in_cohort(self, user_id: int, cohort_name: str = "IIR2425") -> bool:
         """
         Enroll a user in a specific cohort.
 
+        The cohort name is resolved through cohort_directory.
+
         Args:
             user_id: ID of the user in Moodle
             cohort_name: Name of the cohort to enroll the user in
@@ -653,14 +1591,7 @@ class MoodleGroups(MoodleBase):
         Returns:
             True if enrollment succeeds, False otherwise
         """
-        response = self.call_api("core_cohort_get_cohorts", {})
-        cohort_id = None
-
-        # Find cohort ID
-        for cohort in response:
-            if cohort.get("name") == cohort_name:
-                cohort_id = cohort.get("id")
-                break
+        cohort_id = self.cohort_directory.cohort_id(cohort_name)
 
         if cohort_id is None:
             self.logger.warning(f"Cohort '{cohort_name}' not found")
@@ -668,10 +1599,10 @@ class MoodleGroups(MoodleBase):
 
         # Enroll user
         enroll_response = self.call_api("core_cohort_add_cohort_members", {
-            "members[0][cohorttype][type]": "id",
-            "members[0][cohorttype][value]": cohort_id,
-            "members[0][usertype][type]": "id",
-            "members[0][usertype][value]": user_id
+            "members": [{
+                "cohorttype": {"type": "id", "value": cohort_id},
+                "usertype": {"type": "id", "value": user_id}
+            }]
         })
 
         # Check for Moodle warnings
@@ -679,4 +1610,165 @@ class MoodleGroups(MoodleBase):
             self.logger.warning(f"Warnings during enrollment: {enroll_response['warnings']}")
             return False
 
+        self.cohort_directory.record_members(cohort_id, added=[user_id])
         return True
+
+    def enroll_users_in_cohort(self, cohort: Union[int, str], user_ids: Iterable[int]) -> Dict[str, Any]:
+        """
+        Add many users to a cohort.
+
+        The cohort is resolved and its members loaded once through
+        cohort_directory; users already in the cohort are skipped and the
+        others are sent in chunked core_cohort_add_cohort_members calls.
+        Moodle reports users it could not add as warnings naming the user,
+        so each warning is reported for that user only. Only when a warning
+        cannot be parsed are the cohort members reloaded (one request) to
+        tell who was added.
+
+        Args:
+            cohort: Cohort ID or name
+            user_ids: IDs of the users to add
+
+        Returns:
+            Dictionary with 'added' (user IDs), 'already_member' (user IDs)
+            and 'errors' (one dict with 'user_id' and 'error' per failed user)
+
+        Raises:
+            MoodleResourceNotFoundError: If the cohort does not exist
+
+        Example:
+            >>> result = moodle.groups.enroll_users_in_cohort('IIR2425', new_student_ids)
+            >>> len(result['added']), result['errors']
+            (3000, [])
+        """
+        cohort_id = self._require_cohort(cohort)
+        current = self.cohort_directory.members(cohort_id)
+        user_ids = list(dict.fromkeys(user_ids))
+        to_add = [user_id for user_id in user_ids if user_id not in current]
+        result = {
+            'added': [],
+            'already_member': [user_id for user_id in user_ids if user_id in current],
+            'errors': []
+        }
+
+        size = self._chunk_size(leaves_per_item=4)
+        unresolved: List[int] = []
+        unparsed: List[str] = []
+        for start in range(0, len(to_add), size):
+            chunk = to_add[start:start + size]
+            try:
+                response = self.call_api('core_cohort_add_cohort_members', {
+                    'members': [{
+                        'cohorttype': {'type': 'id', 'value': cohort_id},
+                        'usertype': {'type': 'id', 'value': user_id}
+                    } for user_id in chunk]
+                })
+            except MoodleAuthenticationError:
+                raise
+            except Exception as e:
+                result['errors'].extend({'user_id': user_id, 'error': str(e)} for user_id in chunk)
+                continue
+            warnings = (response.get('warnings') if isinstance(response, dict) else None) or []
+            pending, messages = self._apply_cohort_warnings(cohort_id, chunk, warnings, result)
+            if messages:
+                unresolved.extend(pending)
+                unparsed.extend(messages)
+            else:
+                result['added'].extend(pending)
+
+        if unresolved:
+            # Fallback for warnings naming no user: compare with the reloaded members
+            self.cohort_directory.invalidate(cohort_id)
+            members = self.cohort_directory.members(cohort_id)
+            error = '; '.join(dict.fromkeys(unparsed))
+            for user_id in unresolved:
+                if user_id in members:
+                    result['added'].append(user_id)
+                else:
+                    result['errors'].append({'user_id': user_id, 'error': error})
+        self.cohort_directory.record_members(cohort_id, added=result['added'] + result['already_member'])
+
+        return result
+
+    def remove_users_from_cohort(self, cohort: Union[int, str], user_ids: Iterable[int]) -> Dict[str, Any]:
+        """
+        Remove many users from a cohort.
+
+        The cohort is resolved and its members loaded once through
+        cohort_directory; users not in the cohort are skipped and the others
+        are sent in chunked core_cohort_delete_cohort_members calls. Moodle
+        rejects a whole request if one user does not exist, so a rejected
+        chunk is split until the failing users are isolated.
+
+        Args:
+            cohort: Cohort ID or name
+            user_ids: IDs of the users to remove
+
+        Returns:
+            Dictionary with 'removed' (user IDs), 'not_member' (user IDs)
+            and 'errors' (one dict with 'user_id' and 'error' per failed user)
+
+        Raises:
+            MoodleResourceNotFoundError: If the cohort does not exist
+        """
+        cohort_id = self._require_cohort(cohort)
+        current = self.cohort_directory.members(cohort_id)
+        user_ids = list(dict.fromkeys(user_ids))
+        to_remove = [user_id for user_id in user_ids if user_id in current]
+
+        failures = self._change_members('core_cohort_delete_cohort_members', [
+            {'cohortid': cohort_id, 'userid': user_id} for user_id in to_remove
+        ])
+        removed = [user_id for user_id in to_remove if (cohort_id, user_id) not in failures]
+        self.cohort_directory.record_members(cohort_id, removed=removed)
+
+        return {
+            'removed': removed,
+            'not_member': [user_id for user_id in user_ids if user_id not in current],
+            'errors': [{'user_id': user_id, 'error': error}
+                       for (_, user_id), error in failures.items()]
+        }
+
+    def _apply_cohort_warnings(self, cohort_id: int, chunk: List[int], warnings: List[Any],
+                               result: Dict[str, Any]) -> Tuple[List[int], List[str]]:
+        """
+        Record the users of one core_cohort_add_cohort_members chunk that
+        Moodle warned about in result's 'errors' or 'already_member'.
+
+        Returns the users of the chunk no warning named and the messages of
+        warnings that could not be parsed; while there are any, those users
+        cannot be assumed added.
+        """
+        unparsed = []
+        pending = dict.fromkeys(chunk)
+        for warning in warnings:
+            message = self._warning_message(warning)
+            missing_user = MISSING_USER_WARNING.search(message)
+            missing_cohort = MISSING_COHORT_WARNING.search(message)
+            existing = EXISTING_MEMBER_WARNING.search(message)
+            if missing_user and int(missing_user.group(1)) in pending:
+                del pending[int(missing_user.group(1))]
+                result['errors'].append({'user_id': int(missing_user.group(1)), 'error': message})
+            elif existing and int(existing.group(2)) in pending:
+                del pending[int(existing.group(2))]
+                result['already_member'].append(int(existing.group(2)))
+            elif missing_cohort and int(missing_cohort.group(1)) == cohort_id:
+                result['errors'].extend({'user_id': user_id, 'error': message} for user_id in pending)
+                pending.clear()
+            else:
+                unparsed.append(message)
+        return list(pending), unparsed
+
+    def _require_cohort(self, cohort: Union[int, str]) -> int:
+        """Resolve a cohort ID or name, raising if the cohort does not exist."""
+        cohort_id = self.cohort_directory.cohort_id(cohort) if isinstance(cohort, str) else cohort
+        if cohort_id is None or cohort_id not in self.cohort_directory.cohorts:
+            raise MoodleResourceNotFoundError(f"Cohort '{cohort}' not found")
+        return cohort_id
+
+    @staticmethod
+    def _warning_message(warning: Any) -> str:
+        """Text of a Moodle warning (dict or string)."""
+        if isinstance(warning, dict):
+            return str(warning.get('message', warning.get('warningmessage', warning)))
+        return str(warning)
@@ -0,0 +1,78 @@
+"""
+Instrumentation hooks for Moodle API calls.
+
+Hooks registered on a module (or on MoodleAPI, which shares them with all
+of its modules) are notified before and after every HTTP request sent for
+a web-service function, with its size, duration, status and outcome.
+"""
+
+import time
+from typing import Optional
+
+
+class CallEvent:
+    """
+    Description of one web-service request, filled in as it progresses.
+
+    Attributes:
+        function_name: Name of the web-service function
+        param_count: Number of form variables sent for the function parameters
+        request_bytes: Size of the encoded request body
+        response_bytes: Size of the response body (None if no response)
+        status: HTTP status of the last attempt (None if no response)
+        retries: Number of retries made by the retry policy
+        elapsed: Wall time in seconds, retries and backoff included
+        outcome: 'pending', then 'ok', 'timeout' or 'error'
+        error: Exception raised by the call, if it failed
+    """
+
+    def __init__(self, function_name: str, param_count: int, request_bytes: int):
+        self.function_name = function_name
+        self.param_count = param_count
+        self.request_bytes = request_bytes
+        self.response_bytes: Optional[int] = None
+        self.status: Optional[int] = None
+        self.retries = 0
+        self.elapsed = 0.0
+        self.outcome = 'pending'
+        self.error: Optional[Exception] = None
+        self._started = time.perf_counter()
+
+    def _finish(self, error: Optional[Exception] = None):
+        self.elapsed = time.perf_counter() - self._started
+        self.error = error
+        if error is None:
+            self.outcome = 'ok'
+        elif isinstance(error, TimeoutError):
+            self.outcome = 'timeout'
+        else:
+            self.outcome = 'error'
+
+    @property
+    def ok(self) -> bool:
+        """True if the call completed without error."""
+        return self.outcome == 'ok'
+
+    def __repr__(self) -> str:
+        return f"<CallEvent: {self.function_name} ({self.outcome}, {self.elapsed * 1000:.1f} ms)>"
+
+
+class CallHook:
+    """
+    Base class for call hooks; override the methods you need.
+
+    Exceptions raised by a hook are logged and never reach the caller.
+
+    Example:
+        >>> class SlowCallLogger(CallHook):
+        ...     def after_call(self, event):
+        ...         if event.elapsed > 5:
+        ...             print(f"{event.function_name} took {event.elapsed:.1f}s")
+        >>> moodle.add_hook(SlowCallLogger())
+    """
+
+    def before_call(self, event: CallEvent):
+        """Called before the first attempt of a request is sent."""
+
+    def after_call(self, event: CallEvent):
+        """Called once the request succeeded or finally failed."""
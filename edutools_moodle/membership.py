@@ -0,0 +1,189 @@
+"""
+Group membership index for Moodle courses.
+
+GroupMembershipIndex loads every group of a course and all their members
+with two requests, then answers "which groups is this user in?" and
+"is this user in that group?" from memory, in O(1) and without further
+calls. Per-user dashboards that would otherwise list the course groups
+and their members on every lookup build one index per course instead.
+"""
+
+import time
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, List, Optional
+
+if TYPE_CHECKING:
+    from .groups import MoodleGroups
+
+
+_EMPTY: FrozenSet[int] = frozenset()
+
+
+class GroupMembershipIndex:
+    """
+    Group memberships of one course, indexed both ways.
+
+    Built from one core_group_get_course_groups call and one
+    core_group_get_group_members call (chunked by max_input_vars on large
+    courses). Member lists are kept as frozensets of user IDs: group ID ->
+    members and user ID -> group IDs. The index is a snapshot; call
+    refresh() to pick up changes made since it was built.
+
+    Attributes:
+        course_id: ID of the course
+        groups: Group dictionaries of the course, keyed by group ID
+        built_at: time.time() of the last (re)build
+
+    Example:
+        >>> index = moodle.groups.membership_index(course_id)
+        >>> index.is_member(group_id, user_id)
+        True
+        >>> index.user_group_names(user_id)
+        ['Group A', 'Lab 3']
+    """
+
+    def __init__(self, groups: "MoodleGroups", course_id: int, fresh: bool = False):
+        """
+        Build the index.
+
+        Args:
+            groups: MoodleGroups module used to fetch the data
+            course_id: ID of the course
+            fresh: Read from Moodle even for the first build, bypassing
+                cached responses (default: False)
+        """
+        self._client = groups
+        self.course_id = course_id
+        self.groups: Dict[int, Dict[str, Any]] = {}
+        self.built_at: Optional[float] = None
+        self._members: Dict[int, FrozenSet[int]] = {}
+        self._user_groups: Dict[int, FrozenSet[int]] = {}
+        self._by_name: Dict[str, int] = {}
+        self._order: Dict[int, int] = {}
+        self._fresh = fresh
+        self.refresh()
+
+    def refresh(self) -> "GroupMembershipIndex":
+        """
+        Rebuild the index from Moodle.
+
+        Cached responses of the two listing functions are dropped first, so
+        a configured ResponseCache cannot serve stale memberships.
+
+        Returns:
+            The index itself
+        """
+        cache = self._client.cache
+        if cache is not None and (self.built_at is not None or self._fresh):
+            cache.invalidate_function('core_group_get_course_groups')
+            cache.invalidate_function('core_group_get_group_members')
+
+        groups = {group['id']: group for group in self._client.get_course_groups(self.course_id) or []}
+        members: Dict[int, FrozenSet[int]] = {}
+        if groups:
+            response = self._client.call_api('core_group_get_group_members',
+                                             {'groupids': list(groups)})
+            for entry in response or []:
+                members[entry.get('groupid')] = frozenset(entry.get('userids', []))
+
+        user_groups: Dict[int, set] = {}
+        for group_id, user_ids in members.items():
+            for user_id in user_ids:
+                user_groups.setdefault(user_id, set()).add(group_id)
+
+        self.groups = groups
+        self._members = members
+        self._user_groups = {user_id: frozenset(ids) for user_id, ids in user_groups.items()}
+        self._by_name = {group.get('name'): group_id for group_id, group in groups.items()}
+        self._order = {group_id: position for position, group_id in enumerate(groups)}
+        self.built_at = time.time()
+        return self
+
+    @property
+    def age(self) -> float:
+        """Seconds since the index was built."""
+        return time.time() - self.built_at
+
+    def members(self, group_id: int) -> FrozenSet[int]:
+        """
+        Get the user IDs of a group's members.
+
+        Args:
+            group_id: ID of the group
+
+        Returns:
+            Frozen set of user IDs (empty for an unknown group)
+        """
+        return self._members.get(group_id, _EMPTY)
+
+    def is_member(self, group_id: int, user_id: int) -> bool:
+        """
+        Check if a user is a member of a group.
+
+        Args:
+            group_id: ID of the group
+            user_id: ID of the user
+
+        Returns:
+            True if the user is in the group
+        """
+        return user_id in self._members.get(group_id, _EMPTY)
+
+    def user_group_ids(self, user_id: int) -> FrozenSet[int]:
+        """
+        Get the IDs of the groups a user belongs to.
+
+        Args:
+            user_id: ID of the user
+
+        Returns:
+            Frozen set of group IDs (empty if the user is in no group)
+        """
+        return self._user_groups.get(user_id, _EMPTY)
+
+    def user_groups(self, user_id: int) -> List[Dict[str, Any]]:
+        """
+        Get the groups a user belongs to.
+
+        Args:
+            user_id: ID of the user
+
+        Returns:
+            Group dictionaries, in the order Moodle lists the course groups
+        """
+        group_ids = sorted(self._user_groups.get(user_id, _EMPTY), key=self._order.__getitem__)
+        return [self.groups[group_id] for group_id in group_ids]
+
+    def user_group_names(self, user_id: int) -> List[str]:
+        """
+        Get the names of the groups a user belongs to.
+
+        Args:
+            user_id: ID of the user
+
+        Returns:
+            List of group names
+        """
+        return [group.get('name') for group in self.user_groups(user_id) if 'name' in group]
+
+    def group_id(self, group_name: str) -> Optional[int]:
+        """
+        Get the ID of a group from its name.
+
+        Args:
+            group_name: Name of the group
+
+        Returns:
+            Group ID if found, None otherwise
+        """
+        return self._by_name.get(group_name)
+
+    def __contains__(self, user_id: int) -> bool:
+        """True if the user belongs to at least one group of the course."""
+        return user_id in self._user_groups
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
+    def __repr__(self) -> str:
+        return (f"<{type(self).__name__}: course {self.course_id}, {len(self.groups)} groups, "
+                f"{len(self._user_groups)} users>")
@@ -0,0 +1,193 @@
+"""
+In-process metrics for Moodle API calls.
+
+MetricsAggregator is a ready-made call hook that keeps per-wsfunction
+counters and latency histograms, for finding the calls that dominate
+traffic and wall time.
+"""
+
+import bisect
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .hooks import CallEvent, CallHook
+
+
+# Upper bounds (seconds) of the latency buckets, the last bucket is unbounded
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class FunctionMetrics:
+    """
+    Counters and latency histogram of one web-service function.
+
+    Attributes:
+        calls: Number of requests
+        errors: Number of failed requests
+        timeouts: Number of requests that timed out
+        retries: Number of retries
+        request_bytes: Total size of the request bodies
+        response_bytes: Total size of the response bodies
+        total_time: Sum of the wall times in seconds
+        max_time: Slowest wall time in seconds
+        buckets: Request counts per latency bucket
+        statuses: Request counts per HTTP status
+    """
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.buckets: List[int] = [0] * (len(bounds) + 1)
+        self.statuses: Dict[Optional[int], int] = {}
+
+    def observe(self, event: CallEvent):
+        """Add one finished call."""
+        self.calls += 1
+        self.errors += not event.ok
+        self.timeouts += event.outcome == 'timeout'
+        self.retries += event.retries
+        self.request_bytes += event.request_bytes
+        self.response_bytes += event.response_bytes or 0
+        self.total_time += event.elapsed
+        self.max_time = max(self.max_time, event.elapsed)
+        self.buckets[bisect.bisect_left(self.bounds, event.elapsed)] += 1
+        self.statuses[event.status] = self.statuses.get(event.status, 0) + 1
+
+    @property
+    def mean_time(self) -> float:
+        """Average wall time in seconds."""
+        return self.total_time / self.calls if self.calls else 0.0
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimate a latency percentile from the histogram.
+
+        Args:
+            q: Percentile between 0 and 100
+
+        Returns:
+            Upper bound of the bucket holding the percentile (max_time for the
+            unbounded bucket), in seconds
+        """
+        if not self.calls:
+            return 0.0
+        rank = q / 100 * self.calls
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds[index] if index < len(self.bounds) else self.max_time
+        return self.max_time
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Export the metrics as plain data."""
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'retries': self.retries,
+            'request_bytes': self.request_bytes,
+            'response_bytes': self.response_bytes,
+            'total_time': self.total_time,
+            'mean_time': self.mean_time,
+            'max_time': self.max_time,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'histogram': dict(zip([*map(str, self.bounds), '+Inf'], self.buckets)),
+            'statuses': dict(self.statuses),
+        }
+
+
+class MetricsAggregator(CallHook):
+    """
+    Call hook aggregating metrics per web-service function.
+
+    Example:
+        >>> metrics = MetricsAggregator()
+        >>> moodle = MoodleAPI("https://moodle.example.com", "token", hooks=[metrics])
+        >>> ...
+        >>> print(metrics.report())
+        >>> metrics.snapshot()['core_group_get_course_groups']['p95']
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        """
+        Initialize the aggregator.
+
+        Args:
+            buckets: Increasing upper bounds (seconds) of the latency histogram buckets
+
+        Raises:
+            ValueError: If the bucket bounds are not strictly increasing
+        """
+        bounds = tuple(buckets)
+        if any(b <= a for a, b in zip(bounds, bounds[1:])):
+            raise ValueError("Bucket bounds must be strictly increasing")
+        self.bounds = bounds
+        self.functions: Dict[str, FunctionMetrics] = {}
+        self._lock = threading.Lock()
+
+    def after_call(self, event: CallEvent):
+        """Record a finished call."""
+        with self._lock:
+            metrics = self.functions.get(event.function_name)
+            if metrics is None:
+                metrics = self.functions[event.function_name] = FunctionMetrics(self.bounds)
+            metrics.observe(event)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Export the metrics of every function.
+
+        Returns:
+            Dictionary mapping function names to their metrics (see FunctionMetrics.as_dict)
+        """
+        with self._lock:
+            return {name: metrics.as_dict() for name, metrics in self.functions.items()}
+
+    def top(self, n: int = 10, key: str = 'total_time') -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Get the functions that dominate a metric.
+
+        Args:
+            n: Number of functions to return
+            key: Metric to sort by (e.g. 'total_time', 'calls', 'response_bytes')
+
+        Returns:
+            List of (function name, metrics) tuples, largest first
+        """
+        snapshot = self.snapshot()
+        return sorted(snapshot.items(), key=lambda item: item[1][key], reverse=True)[:n]
+
+    def report(self, n: int = 10) -> str:
+        """
+        Format the functions with the largest total time as a text table.
+
+        Args:
+            n: Number of functions to include
+
+        Returns:
+            Multi-line report
+        """
+        lines = [f"{'function':<45} {'calls':>7} {'errors':>6} {'retries':>7} "
+                 f"{'total s':>9} {'p50 s':>7} {'p95 s':>7} {'resp KB':>9}"]
+        for name, m in self.top(n):
+            lines.append(
+                f"{name:<45} {m['calls']:>7} {m['errors']:>6} {m['retries']:>7} "
+                f"{m['total_time']:>9.2f} {m['p50']:>7.2f} {m['p95']:>7.2f} "
+                f"{m['response_bytes'] / 1024:>9.1f}"
+            )
+        return '\n'.join(lines)
+
+    def reset(self):
+        """Forget all recorded metrics."""
+        with self._lock:
+            self.functions.clear()
@@ -0,0 +1,239 @@
+"""
+Parameter helpers for Moodle API calls.
+
+Moodle's REST server expects nested structures in PHP form notation
+(e.g. ``members[0][groupid]``). These helpers convert between that flat
+notation and plain nested dictionaries and lists, and encode parameters
+into the form body sent to the server.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote_plus
+
+
+_KEY_PART = re.compile(r'\[([^\[\]]*)\]')
+
+
+def _split_key(key: str) -> List[str]:
+    """Split 'a[0][b]' into ['a', '0', 'b']."""
+    bracket = key.find('[')
+    if bracket <= 0:
+        return [key]
+    parts = [key[:bracket]]
+    rest = key[bracket:]
+    pos = 0
+    for match in _KEY_PART.finditer(rest):
+        if match.start() != pos:
+            return [key]
+        parts.append(match.group(1))
+        pos = match.end()
+    if pos != len(rest):
+        return [key]
+    return parts
+
+
+def _listify(node: Any) -> Any:
+    """Turn dictionaries keyed by consecutive indices into lists."""
+    if not isinstance(node, dict):
+        return node
+    for key, value in node.items():
+        node[key] = _listify(value)
+    keys = list(node.keys())
+    if keys and all(isinstance(k, int) for k in keys) and sorted(keys) == list(range(len(keys))):
+        return [node[i] for i in range(len(keys))]
+    return node
+
+
+def unflatten_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert flat PHP form keys into nested dictionaries and lists.
+
+    Args:
+        params: Parameters such as {'groupids[0]': 5, 'members[0][userid]': 7}
+
+    Returns:
+        Nested parameters such as {'groupids': [5], 'members': [{'userid': 7}]}
+
+    Raises:
+        ValueError: If a key is used both as a value and as a container
+    """
+    nested: Dict[Any, Any] = {}
+    for key, value in params.items():
+        parts = _split_key(key)
+        node = nested
+        for depth, part in enumerate(parts):
+            index = int(part) if depth > 0 and part.isdigit() else part
+            if depth == len(parts) - 1:
+                if isinstance(node.get(index), dict):
+                    raise ValueError(f"Conflicting parameter key: {key}")
+                node[index] = value
+            else:
+                child = node.setdefault(index, {})
+                if not isinstance(child, dict):
+                    raise ValueError(f"Conflicting parameter key: {key}")
+                node = child
+    return _listify(nested)
+
+
+def flatten_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert nested dictionaries and lists into flat PHP form keys.
+
+    Args:
+        params: Nested parameters such as {'groupids': [5]}
+
+    Returns:
+        Flat parameters such as {'groupids[0]': 5}
+    """
+    flat: Dict[str, Any] = {}
+
+    def visit(prefix: str, value: Any):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                visit(f"{prefix}[{key}]", item)
+        elif isinstance(value, (list, tuple)):
+            for index, item in enumerate(value):
+                visit(f"{prefix}[{index}]", item)
+        else:
+            flat[prefix] = value
+
+    for key, value in params.items():
+        if isinstance(value, (dict, list, tuple)):
+            visit(key, value)
+        else:
+            flat[key] = value
+    return flat
+
+
+def count_leaves(value: Any) -> int:
+    """Count the form variables a (nested) value expands to."""
+    if isinstance(value, dict):
+        return sum(count_leaves(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(count_leaves(item) for item in value)
+    return 1
+
+
+def normalize_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert parameters to nested dictionaries and lists.
+
+    Parameters already given in nested form are returned as-is; flat PHP
+    form keys (also mixed with nested values) are folded into nested form.
+
+    Args:
+        params: Call parameters (flat PHP form keys or nested structures)
+
+    Returns:
+        Nested parameters
+    """
+    if any('[' in key for key in params):
+        return unflatten_params(flatten_params(params))
+    return params
+
+
+def make_call_key(function_name: str, params: Optional[Dict[str, Any]]) -> str:
+    """
+    Build a stable key identifying a call.
+
+    Flat and nested forms of the same parameters produce the same key.
+
+    Args:
+        function_name: Name of the web-service function
+        params: Call parameters
+
+    Returns:
+        Key such as 'core_group_get_course_groups:{"courseid": 12}'
+    """
+    normalized = normalize_params(params) if params else {}
+    return f"{function_name}:{json.dumps(normalized, sort_keys=True, default=str)}"
+
+
+def _build_template(shape: Tuple[Optional[Any], ...]) -> str:
+    """Build the quoted %-template of a key path; None marks a list index."""
+    parts = [quote_plus(str(shape[0])).replace('%', '%%')]
+    for part in shape[1:]:
+        if part is None:
+            parts.append('%%5B%d%%5D')
+        else:
+            parts.append('%%5B' + quote_plus(str(part)).replace('%', '%%') + '%%5D')
+    return ''.join(parts)
+
+
+def _encode_value(value: Any) -> str:
+    """Encode a scalar value the way Moodle's PHP parameter cleaning expects."""
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    return quote_plus(str(value))
+
+
+class ParamEncoder:
+    """
+    Encodes call parameters into a Moodle REST form body in one pass.
+
+    Accepts natural nested dictionaries and lists (as well as flat PHP form
+    keys). The quoted form of each key path, such as ``grades[%d][userid]``,
+    is built once per web-service function and reused for every list item.
+
+    Example:
+        >>> ParamEncoder().encode('core_group_add_group_members',
+        ...                       {'members': [{'groupid': 3, 'userid': 7}]})
+        'members%5B0%5D%5Bgroupid%5D=3&members%5B0%5D%5Buserid%5D=7'
+    """
+
+    def __init__(self, max_templates: int = 4096):
+        """
+        Initialize the encoder.
+
+        Args:
+            max_templates: Number of cached key templates before the cache is reset
+        """
+        self.max_templates = max_templates
+        self._templates: Dict[Tuple[str, Tuple[Optional[Any], ...]], str] = {}
+
+    def encode(self, function_name: str, params: Optional[Dict[str, Any]]) -> str:
+        """
+        Encode parameters into an application/x-www-form-urlencoded body.
+
+        None values are omitted.
+
+        Args:
+            function_name: Web-service function the parameters belong to
+            params: Call parameters (nested structures or flat PHP form keys)
+
+        Returns:
+            Encoded form body (without the authentication variables)
+        """
+        if not params:
+            return ''
+
+        templates = self._templates
+        if len(templates) > self.max_templates:
+            templates.clear()
+        parts: List[str] = []
+        append = parts.append
+
+        def visit(value: Any, shape: Tuple[Optional[Any], ...], indices: Tuple[int, ...]):
+            if isinstance(value, dict):
+                for key, item in value.items():
+                    visit(item, shape + (key,), indices)
+            elif isinstance(value, (list, tuple)):
+                child_shape = shape + (None,)
+                for index, item in enumerate(value):
+                    visit(item, child_shape, indices + (index,))
+            elif value is not None:
+                template = templates.get((function_name, shape))
+                if template is None:
+                    template = templates[(function_name, shape)] = _build_template(shape)
+                append(f"{template % indices}={_encode_value(value)}")
+
+        for key, value in params.items():
+            visit(value, (key,), ())
+        return '&'.join(parts)
+
+
+default_encoder = ParamEncoder()
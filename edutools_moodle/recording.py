@@ -0,0 +1,218 @@
+"""
+Record and replay transports for Moodle API traffic.
+
+RecordingTransport captures the calls sent to a real Moodle site
+(wsfunction, parameters, status, response body and timing) into a
+gzip-compressed JSON Lines file. ReplayTransport serves such a file back
+without any network access, optionally with the recorded latency, which
+makes offline benchmarks and regression tests reproducible.
+
+Tokens are never written to recordings, and the values of secret
+parameters (REDACTED_FIELDS, e.g. users[i][password]) are replaced with
+a placeholder; response bodies are written as received.
+"""
+
+import gzip
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+import requests
+
+from .params import make_call_key, normalize_params
+from .transport import MoodleTransport
+
+
+# Form variables that identify the request rather than the call
+_REQUEST_VARS = ('wstoken', 'moodlewsrestformat', 'wsfunction')
+
+# Parameters whose values are never written to recordings
+REDACTED_FIELDS = frozenset({
+    'password', 'createpassword', 'newpassword', 'currentpassword',
+    'enrolmentkey', 'secret', 'token', 'privatetoken',
+})
+REDACTED = '[redacted]'
+
+
+class ReplayMissError(requests.exceptions.RequestException):
+    """Raised when a replayed call has no matching recording."""
+
+
+def _redact(value: Any) -> Any:
+    """Copy of nested parameters with the values of REDACTED_FIELDS replaced."""
+    if isinstance(value, dict):
+        return {key: REDACTED if key in REDACTED_FIELDS else _redact(item)
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [_redact(item) for item in value]
+    return value
+
+
+def decode_call(data: Any) -> Tuple[str, Dict[str, Any]]:
+    """
+    Extract the web-service function and its parameters from a request body.
+
+    Values of secret parameters (REDACTED_FIELDS) are replaced with
+    REDACTED, so they are neither recorded nor needed to match a replay.
+
+    Args:
+        data: Encoded form body (or dictionary of form variables)
+
+    Returns:
+        Tuple (function name, nested parameters with string values)
+    """
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    pairs = parse_qsl(data, keep_blank_values=True) if isinstance(data, str) else \
+        [(key, str(value)) for key, value in (data or {}).items()]
+    variables = dict(pairs)
+    function_name = variables.get('wsfunction', '')
+    params = {key: value for key, value in variables.items() if key not in _REQUEST_VARS}
+    return function_name, _redact(normalize_params(params))
+
+
+def _build_response(url: str, record: Dict[str, Any]) -> requests.Response:
+    """Rebuild a requests Response from a recorded entry."""
+    response = requests.Response()
+    response.status_code = record['status']
+    response.reason = record.get('reason', '')
+    response._content = record['body'].encode('utf-8')
+    response.encoding = 'utf-8'
+    response.headers['Content-Type'] = 'application/json'
+    response.url = url
+    return response
+
+
+class RecordingTransport(MoodleTransport):
+    """
+    Transport that sends requests to Moodle and records them.
+
+    Example:
+        >>> transport = RecordingTransport("groups.jsonl.gz")
+        >>> with MoodleAPI(url, token, transport=transport) as moodle:
+        ...     moodle.groups.get_course_groups(12)
+        >>> transport.save()
+    """
+
+    def __init__(self, path: str, **kwargs):
+        """
+        Initialize the recording transport.
+
+        Args:
+            path: File the recording is written to (gzip-compressed JSON Lines)
+            **kwargs: MoodleTransport options (pool size, limiters, logger)
+        """
+        super().__init__(**kwargs)
+        self.path = path
+        self.records: List[Dict[str, Any]] = []
+        self._records_lock = threading.Lock()
+
+    def _send(self, url, data, timeout, headers, function_name):
+        started = time.perf_counter()
+        response = super()._send(url, data, timeout, headers, function_name)
+        elapsed = time.perf_counter() - started
+
+        function, params = decode_call(data)
+        record = {
+            'function': function,
+            'params': params,
+            'status': response.status_code,
+            'reason': response.reason,
+            'body': response.text,
+            'elapsed': round(elapsed, 6),
+        }
+        with self._records_lock:
+            self.records.append(record)
+        return response
+
+    def save(self, path: Optional[str] = None) -> str:
+        """
+        Write the recorded calls to disk.
+
+        Args:
+            path: Destination file (default: the path given at construction)
+
+        Returns:
+            Path of the written file
+        """
+        path = path or self.path
+        with self._records_lock:
+            records = list(self.records)
+        with gzip.open(path, 'wt', encoding='utf-8') as handle:
+            for record in records:
+                handle.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self.logger.debug(f"Saved {len(records)} recorded calls to {path}")
+        return path
+
+    def close(self):
+        """Save the recording, then close the session."""
+        self.save()
+        super().close()
+
+
+class ReplayTransport(MoodleTransport):
+    """
+    Transport serving recorded calls without network access.
+
+    Calls are matched on wsfunction and parameters. When the same call was
+    recorded several times its responses are served in order, the last one
+    being repeated. Unknown calls raise ReplayMissError, which call_api
+    reports as a MoodleAPIError.
+
+    Example:
+        >>> transport = ReplayTransport("groups.jsonl.gz", simulate_latency=True)
+        >>> moodle = MoodleAPI("https://moodle.example.com", "any-token", transport=transport)
+        >>> moodle.groups.get_course_groups(12)
+    """
+
+    def __init__(self, path: str, simulate_latency: bool = False, latency_scale: float = 1.0,
+                 extra_latency: float = 0.0, **kwargs):
+        """
+        Initialize the replay transport.
+
+        Args:
+            path: Recording written by RecordingTransport
+            simulate_latency: Sleep for the recorded duration of each call
+            latency_scale: Multiplier applied to recorded durations
+            extra_latency: Fixed delay added to every call in seconds
+            **kwargs: MoodleTransport options (limiters, logger)
+        """
+        super().__init__(**kwargs)
+        self.path = path
+        self.simulate_latency = simulate_latency
+        self.latency_scale = latency_scale
+        self.extra_latency = extra_latency
+        self.served = 0
+        self._responses: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._replay_lock = threading.Lock()
+
+        with gzip.open(path, 'rt', encoding='utf-8') as handle:
+            for line in handle:
+                if line.strip():
+                    record = json.loads(line)
+                    key = make_call_key(record['function'], record['params'])
+                    self._responses.setdefault(key, deque()).append(record)
+
+    def _send(self, url, data, timeout, headers, function_name):
+        function, params = decode_call(data)
+        key = make_call_key(function, params)
+        with self._replay_lock:
+            recorded = self._responses.get(key)
+            if not recorded:
+                raise ReplayMissError(f"No recorded response for {function} {params}")
+            record = recorded.popleft() if len(recorded) > 1 else recorded[0]
+            self.served += 1
+
+        delay = self.extra_latency
+        if self.simulate_latency:
+            delay += record.get('elapsed', 0.0) * self.latency_scale
+        if delay > 0:
+            time.sleep(delay)
+        return _build_response(url, record)
+
+    def __len__(self) -> int:
+        """Number of distinct recorded calls."""
+        return len(self._responses)
@@ -0,0 +1,236 @@
+"""
+Retry policy for Moodle API calls.
+
+Decides whether a failed HTTP request is worth sending again and how long
+to wait before doing so. Read functions are retried on transient failures
+(timeouts, dropped connections, 429/5xx responses); mutating functions are
+only retried when the request provably never reached Moodle, when they are
+known to be idempotent, or when the caller opts in.
+"""
+
+import random
+import threading
+from collections import Counter
+from email.utils import parsedate_to_datetime
+from time import time
+from typing import Any, Dict, FrozenSet, Iterable, Optional
+
+import requests
+
+from .functions import is_read_function
+from .params import normalize_params
+
+
+# Mutations whose repetition leaves Moodle in the same state
+IDEMPOTENT_FUNCTIONS: FrozenSet[str] = frozenset({
+    'core_group_add_group_members',
+    'core_group_delete_group_members',
+    'core_group_assign_grouping',
+    'core_group_unassign_grouping',
+    'core_cohort_add_cohort_members',
+    'core_cohort_delete_cohort_members',
+    'core_user_update_users',
+    'core_grades_update_grades',
+})
+
+# Mutations that repeat harmlessly unless the named flag is set in the call:
+# saving a grade twice is harmless, adding a new attempt twice is not
+CONDITIONAL_IDEMPOTENT_FUNCTIONS: Dict[str, str] = {
+    'mod_assign_save_grade': 'addattempt',
+    'mod_assign_save_grades': 'addattempt',
+}
+
+# Statuses sent before the request is processed (rate limiting, maintenance mode)
+UNPROCESSED_STATUSES: FrozenSet[int] = frozenset({429, 503})
+
+RETRY_STATUSES: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter for transient request failures.
+
+    A policy can be shared by several modules (MoodleAPI does so), in which
+    case its counters cover all of them.
+
+    Attributes:
+        stats: Counters of 'retries', 'recovered' and 'exhausted' calls
+        retries_by_function: Number of retries per web-service function
+
+    Example:
+        >>> policy = RetryPolicy(max_attempts=5, base_delay=1.0)
+        >>> moodle = MoodleAPI("https://moodle.example.com", "token", retry=policy)
+        >>> policy.stats['retries']
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5,
+                 max_delay: float = 30.0, retry_statuses: Iterable[int] = RETRY_STATUSES,
+                 retry_mutations: bool = False,
+                 idempotent_functions: Iterable[str] = IDEMPOTENT_FUNCTIONS):
+        """
+        Initialize the retry policy.
+
+        Args:
+            max_attempts: Total number of attempts per request, 1 disables retries
+            base_delay: Upper bound of the first backoff delay in seconds
+            max_delay: Maximum delay between two attempts in seconds
+            retry_statuses: HTTP statuses treated as transient
+            retry_mutations: Retry every mutating function too (only safe if the
+                caller knows repeating its calls is harmless)
+            idempotent_functions: Mutating functions that are always safe to retry
+
+        Raises:
+            ValueError: If max_attempts < 1 or a delay is negative
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be a positive integer")
+        if base_delay < 0 or max_delay < 0:
+            raise ValueError("Delays must not be negative")
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_mutations = retry_mutations
+        self.idempotent_functions = frozenset(idempotent_functions)
+        self.stats: Dict[str, int] = {'retries': 0, 'recovered': 0, 'exhausted': 0}
+        self.retries_by_function: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def is_safe(self, function_name: str, params: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Check whether a function may be retried after it possibly ran.
+
+        Args:
+            function_name: Name of the Moodle API function
+            params: Call parameters, needed for CONDITIONAL_IDEMPOTENT_FUNCTIONS
+
+        Returns:
+            True for read functions, idempotent mutations (e.g. mod_assign_save_grade
+            without addattempt), or when mutations are retried on request
+        """
+        if (self.retry_mutations or is_read_function(function_name)
+                or function_name in self.idempotent_functions):
+            return True
+        flag = CONDITIONAL_IDEMPOTENT_FUNCTIONS.get(function_name)
+        return flag is not None and params is not None and not _flag_set(params, flag)
+
+    def is_transient(self, error: Exception) -> bool:
+        """
+        Check whether an error is worth another attempt at all.
+
+        Args:
+            error: Exception raised by the transport
+
+        Returns:
+            True for timeouts, connection errors and retryable HTTP statuses
+        """
+        if isinstance(error, requests.exceptions.HTTPError):
+            response = error.response
+            return response is not None and response.status_code in self.retry_statuses
+        return isinstance(error, (requests.exceptions.Timeout,
+                                  requests.exceptions.ConnectionError))
+
+    def never_sent(self, error: Exception) -> bool:
+        """
+        Check whether an error guarantees that Moodle did not process the call.
+
+        Args:
+            error: Exception raised by the transport
+
+        Returns:
+            True if the connection could not be opened or the server
+            rejected the request before running it
+        """
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        if isinstance(error, requests.exceptions.HTTPError):
+            response = error.response
+            return response is not None and response.status_code in UNPROCESSED_STATUSES
+        return False
+
+    def should_retry(self, function_name: str, error: Exception, attempt: int,
+                     params: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Decide whether a failed attempt is retried.
+
+        Args:
+            function_name: Name of the Moodle API function
+            error: Exception raised by the attempt
+            attempt: Number of the attempt that failed (starting at 1)
+            params: Call parameters
+
+        Returns:
+            True if another attempt should be made
+        """
+        if attempt >= self.max_attempts or not self.is_transient(error):
+            return False
+        return self.never_sent(error) or self.is_safe(function_name, params)
+
+    def delay(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """
+        Compute the wait before the next attempt.
+
+        Uses full jitter (a random delay up to base_delay * 2^(attempt-1)) so
+        that parallel workers do not retry in lockstep. A Retry-After header
+        on the failed response is honoured, capped at max_delay.
+
+        Args:
+            attempt: Number of the attempt that failed (starting at 1)
+            error: Exception raised by the attempt
+
+        Returns:
+            Delay in seconds
+        """
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def record_retry(self, function_name: str):
+        """Count a retry of function_name."""
+        with self._lock:
+            self.stats['retries'] += 1
+            self.retries_by_function[function_name] += 1
+
+    def record_outcome(self, succeeded: bool):
+        """Count a call that needed retries as recovered or exhausted."""
+        with self._lock:
+            self.stats['recovered' if succeeded else 'exhausted'] += 1
+
+    def __repr__(self) -> str:
+        return (f"<RetryPolicy: max_attempts={self.max_attempts}, "
+                f"retries={self.stats['retries']}>")
+
+
+def _flag_set(params: Dict[str, Any], flag: str) -> bool:
+    """True if any value named flag in the parameters is set (not 0, false or empty)."""
+    def visit(value: Any) -> bool:
+        if isinstance(value, dict):
+            return any((key == flag and str(item).lower() not in ('', '0', 'false', 'none'))
+                       or visit(item) for key, item in value.items())
+        if isinstance(value, (list, tuple)):
+            return any(visit(item) for item in value)
+        return False
+
+    return visit(normalize_params(params))
+
+
+def _retry_after(error: Optional[Exception]) -> Optional[float]:
+    """Read the Retry-After header of a failed response, in seconds."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    value = headers.get('Retry-After')
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,21 @@
+"""
+Testing helpers for edutools-moodle.
+
+Exports:
+    - FakeMoodleServer: Local Moodle-compatible web-service endpoint
+    - FakeMoodleSite: In-memory site implementing the web-service functions
+    - FakeMoodleError: Moodle exception raised by fake functions
+    - FaultRule: Error injected by FakeMoodleServer.inject_error()
+    - generate_site: Synthetic data generator (users, groups, cohorts, grades)
+"""
+
+from .data import FakeMoodleError, FakeMoodleSite, generate_site
+from .server import FakeMoodleServer, FaultRule
+
+__all__ = [
+    "FakeMoodleServer",
+    "FakeMoodleSite",
+    "FakeMoodleError",
+    "FaultRule",
+    "generate_site",
+]
@@ -0,0 +1,947 @@
+"""
+In-memory Moodle site used by the fake web-service server.
+
+FakeMoodleSite holds users, courses, enrolments, groups, groupings,
+cohorts, assignments and grades, and implements the web-service functions
+used by this package with Moodle's parameter and response shapes.
+generate_site() fills a site with synthetic data at any scale.
+"""
+
+import itertools
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+
+class FakeMoodleError(Exception):
+    """Error reported by a fake web-service function as a Moodle exception."""
+
+    def __init__(self, errorcode: str, message: str, exception: str = 'moodle_exception'):
+        super().__init__(message)
+        self.errorcode = errorcode
+        self.message = message
+        self.exception = exception
+
+    def as_response(self) -> Dict[str, Any]:
+        """Moodle's JSON representation of the error."""
+        return {'exception': self.exception, 'errorcode': self.errorcode, 'message': self.message}
+
+
+def _invalid(message: str) -> FakeMoodleError:
+    return FakeMoodleError('invalidparameter', f"Invalid parameter value detected ({message})",
+                           'invalid_parameter_exception')
+
+
+def _missing(table: str) -> FakeMoodleError:
+    return FakeMoodleError('invalidrecord', f"Can't find data record in database table {table}.",
+                           'dml_missing_record_exception')
+
+
+def _int(value: Any, name: str) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise _invalid(f"{name} must be an integer")
+
+
+def _list(params: Dict[str, Any], name: str) -> List[Any]:
+    value = params.get(name, [])
+    if isinstance(value, dict):
+        value = [value[key] for key in sorted(value, key=int)]
+    if not isinstance(value, list):
+        raise _invalid(f"{name} must be a list")
+    return value
+
+
+class FakeMoodleSite:
+    """
+    Thread-safe in-memory Moodle site.
+
+    Web-service functions are methods named after the function (e.g.
+    ``core_group_get_course_groups``) taking the decoded parameters; call
+    them through handle().
+
+    Example:
+        >>> site = FakeMoodleSite()
+        >>> course_id = site.add_course('CS101')
+        >>> user_id = site.add_user('jdoe')
+        >>> site.enrol(course_id, user_id)
+        >>> site.handle('core_group_create_groups', {'groups': [{'courseid': course_id, 'name': 'A'}]})
+    """
+
+    ADMIN_ID = 2
+
+    def __init__(self, sitename: str = 'Fake Moodle', release: str = '4.1.2 (Build: 20230313)'):
+        self.sitename = sitename
+        self.release = release
+        self.lock = threading.RLock()
+        self._ids = itertools.count(100)
+        self._functions: Optional[frozenset] = None
+
+        self.users: Dict[int, Dict[str, Any]] = {}
+        self.courses: Dict[int, Dict[str, Any]] = {}
+        self.enrolments: Dict[int, Dict[int, int]] = {}
+        self.groups: Dict[int, Dict[str, Any]] = {}
+        self.group_members: Dict[int, Set[int]] = {}
+        self.groupings: Dict[int, Dict[str, Any]] = {}
+        self.grouping_groups: Dict[int, Set[int]] = {}
+        self.cohorts: Dict[int, Dict[str, Any]] = {}
+        self.cohort_members: Dict[int, Set[int]] = {}
+        self.assignments: Dict[int, Dict[str, Any]] = {}
+        self.grades: Dict[int, Dict[int, Dict[str, Any]]] = {}
+        self.messages: List[Dict[str, Any]] = []
+
+        self.users[self.ADMIN_ID] = self._user_record(self.ADMIN_ID, 'admin', 'Admin', 'User',
+                                                      'admin@example.com')
+
+    # ========== Data setup ==========
+
+    def _next_id(self) -> int:
+        return next(self._ids)
+
+    @staticmethod
+    def _user_record(user_id: int, username: str, firstname: str, lastname: str,
+                     email: str) -> Dict[str, Any]:
+        return {
+            'id': user_id,
+            'username': username,
+            'firstname': firstname,
+            'lastname': lastname,
+            'fullname': f"{firstname} {lastname}",
+            'email': email,
+            'department': '',
+            'idnumber': '',
+            'city': '',
+            'country': '',
+            'auth': 'manual',
+            'suspended': False,
+            'firstaccess': 0,
+            'lastaccess': 0,
+        }
+
+    def add_user(self, username: str, firstname: str = 'Test', lastname: str = 'User',
+                 email: Optional[str] = None) -> int:
+        """Create a user and return its ID."""
+        with self.lock:
+            user_id = self._next_id()
+            self.users[user_id] = self._user_record(
+                user_id, username, firstname, lastname, email or f"{username}@example.com"
+            )
+            return user_id
+
+    def add_course(self, shortname: str, fullname: Optional[str] = None, category: int = 1) -> int:
+        """Create a course and return its ID."""
+        with self.lock:
+            course_id = self._next_id()
+            now = int(time.time())
+            self.courses[course_id] = {
+                'id': course_id,
+                'shortname': shortname,
+                'fullname': fullname or shortname,
+                'displayname': fullname or shortname,
+                'idnumber': shortname,
+                'categoryid': category,
+                'summary': '',
+                'summaryformat': 1,
+                'format': 'topics',
+                'visible': 1,
+                'startdate': now,
+                'enddate': 0,
+            }
+            self.enrolments[course_id] = {}
+            return course_id
+
+    def enrol(self, course_id: int, user_id: int, role_id: int = 5):
+        """Enrol a user in a course with a role (5 = student)."""
+        with self.lock:
+            self.enrolments[course_id][user_id] = role_id
+
+    def add_group(self, course_id: int, name: str, description: str = '', idnumber: str = '') -> int:
+        """Create a group and return its ID."""
+        with self.lock:
+            group_id = self._next_id()
+            self.groups[group_id] = {
+                'id': group_id,
+                'courseid': course_id,
+                'name': name,
+                'description': description,
+                'descriptionformat': 1,
+                'enrolmentkey': '',
+                'idnumber': idnumber,
+            }
+            self.group_members[group_id] = set()
+            return group_id
+
+    def add_group_member(self, group_id: int, user_id: int):
+        """Add a user to a group."""
+        with self.lock:
+            self.group_members[group_id].add(user_id)
+
+    def add_grouping(self, course_id: int, name: str, description: str = '', idnumber: str = '') -> int:
+        """Create a grouping and return its ID."""
+        with self.lock:
+            grouping_id = self._next_id()
+            self.groupings[grouping_id] = {
+                'id': grouping_id,
+                'courseid': course_id,
+                'name': name,
+                'description': description,
+                'descriptionformat': 1,
+                'idnumber': idnumber,
+            }
+            self.grouping_groups[grouping_id] = set()
+            return grouping_id
+
+    def assign_grouping(self, grouping_id: int, group_id: int):
+        """Put a group in a grouping."""
+        with self.lock:
+            self.grouping_groups[grouping_id].add(group_id)
+
+    def add_cohort(self, name: str, idnumber: str = '') -> int:
+        """Create a system cohort and return its ID."""
+        with self.lock:
+            cohort_id = self._next_id()
+            self.cohorts[cohort_id] = {
+                'id': cohort_id,
+                'name': name,
+                'idnumber': idnumber or name,
+                'description': '',
+                'descriptionformat': 1,
+                'visible': True,
+                'theme': '',
+            }
+            self.cohort_members[cohort_id] = set()
+            return cohort_id
+
+    def add_cohort_member(self, cohort_id: int, user_id: int):
+        """Add a user to a cohort."""
+        with self.lock:
+            self.cohort_members[cohort_id].add(user_id)
+
+    def add_assignment(self, course_id: int, name: str, grade: float = 100.0) -> int:
+        """Create an assignment and return its ID."""
+        with self.lock:
+            assignment_id = self._next_id()
+            self.assignments[assignment_id] = {
+                'id': assignment_id,
+                'cmid': self._next_id(),
+                'course': course_id,
+                'name': name,
+                'grade': grade,
+                'duedate': 0,
+                'allowsubmissionsfromdate': 0,
+                'nosubmissions': 0,
+                'teamsubmission': 0,
+                'intro': '',
+            }
+            self.grades[assignment_id] = {}
+            return assignment_id
+
+    def set_grade(self, assignment_id: int, user_id: int, grade: float,
+                  feedback: str = '', grader: int = ADMIN_ID):
+        """Record the grade of a user in an assignment."""
+        with self.lock:
+            now = int(time.time())
+            existing = self.grades[assignment_id].get(user_id)
+            self.grades[assignment_id][user_id] = {
+                'id': existing['id'] if existing else self._next_id(),
+                'userid': user_id,
+                'attemptnumber': 0,
+                'timecreated': existing['timecreated'] if existing else now,
+                'timemodified': now,
+                'grader': grader,
+                'grade': f"{float(grade):.5f}",
+                'feedback': feedback,
+            }
+
+    # ========== Dispatch ==========
+
+    def functions(self) -> List[str]:
+        """Names of the web-service functions implemented by the site."""
+        if self._functions is None:
+            self._functions = frozenset(
+                name for name in dir(self)
+                if name.split('_', 1)[0] in ('core', 'mod', 'gradereport', 'enrol', 'tool')
+                and callable(getattr(self, name))
+            )
+        return sorted(self._functions)
+
+    def handle(self, function_name: str, params: Dict[str, Any]) -> Any:
+        """
+        Run a web-service function.
+
+        Args:
+            function_name: Name of the web-service function
+            params: Decoded nested parameters
+
+        Returns:
+            The function's response
+
+        Raises:
+            FakeMoodleError: When Moodle would return an exception
+        """
+        if self._functions is None:
+            self.functions()
+        if function_name not in self._functions:
+            raise _missing('external_functions')
+        method: Callable[[Dict[str, Any]], Any] = getattr(self, function_name)
+        with self.lock:
+            return method(params)
+
+    # ========== Lookups ==========
+
+    def _course(self, course_id: Any) -> Dict[str, Any]:
+        course = self.courses.get(_int(course_id, 'courseid'))
+        if course is None:
+            raise _missing('course')
+        return course
+
+    def _group(self, group_id: Any) -> Dict[str, Any]:
+        group = self.groups.get(_int(group_id, 'groupid'))
+        if group is None:
+            raise _missing('groups')
+        return group
+
+    def _grouping(self, grouping_id: Any) -> Dict[str, Any]:
+        grouping = self.groupings.get(_int(grouping_id, 'groupingid'))
+        if grouping is None:
+            raise _missing('groupings')
+        return grouping
+
+    def _assignment(self, assignment_id: Any) -> Dict[str, Any]:
+        assignment = self.assignments.get(_int(assignment_id, 'assignmentid'))
+        if assignment is None:
+            raise _missing('assign')
+        return assignment
+
+    def _user_groups(self, course_id: int, user_id: int) -> List[Dict[str, Any]]:
+        return [group for group_id, group in self.groups.items()
+                if group['courseid'] == course_id and user_id in self.group_members[group_id]]
+
+    # ========== Site ==========
+
+    def core_webservice_get_site_info(self, params):
+        admin = self.users[self.ADMIN_ID]
+        return {
+            'sitename': self.sitename,
+            'username': admin['username'],
+            'firstname': admin['firstname'],
+            'lastname': admin['lastname'],
+            'fullname': admin['fullname'],
+            'userid': self.ADMIN_ID,
+            'siteurl': 'http://localhost',
+            'release': self.release,
+            'version': '2022112802',
+            'functions': [{'name': name, 'version': '2022112802'} for name in self.functions()],
+        }
+
+    def tool_mobile_call_external_functions(self, params):
+        responses = []
+        for request in _list(params, 'requests'):
+            try:
+                arguments = json.loads(request.get('arguments') or '{}')
+                data = self.handle(request.get('function', ''), arguments)
+                responses.append({'error': False, 'data': json.dumps(data)})
+            except FakeMoodleError as e:
+                responses.append({'error': True, 'exception': json.dumps(e.as_response())})
+        return {'responses': responses}
+
+    # ========== Courses and enrolments ==========
+
+    def _course_summary(self, course: Dict[str, Any]) -> Dict[str, Any]:
+        return dict(course, enrolledusercount=len(self.enrolments[course['id']]))
+
+    def core_enrol_get_users_courses(self, params):
+        user_id = _int(params.get('userid'), 'userid')
+        return [self._course_summary(course) for course_id, course in self.courses.items()
+                if user_id in self.enrolments[course_id]]
+
+    def core_enrol_get_enrolled_users(self, params):
+        course = self._course(params.get('courseid'))
+        options = {option.get('name'): option.get('value') for option in _list(params, 'options')}
+        user_ids = list(self.enrolments[course['id']])
+        if options.get('groupid') not in (None, '', '0'):
+            members = self.group_members.get(_int(options['groupid'], 'groupid'), set())
+            user_ids = [user_id for user_id in user_ids if user_id in members]
+
+        users = []
+        for user_id in user_ids:
+            user = dict(self.users[user_id])
+            user['groups'] = [{'id': group['id'], 'name': group['name'], 'description': ''}
+                              for group in self._user_groups(course['id'], user_id)]
+            role_id = self.enrolments[course['id']][user_id]
+            user['roles'] = [{'roleid': role_id, 'shortname': 'student' if role_id == 5 else 'editingteacher'}]
+            users.append(user)
+        return users
+
+    def enrol_manual_enrol_users(self, params):
+        for enrolment in _list(params, 'enrolments'):
+            course = self._course(enrolment.get('courseid'))
+            user_id = _int(enrolment.get('userid'), 'userid')
+            if user_id not in self.users:
+                raise _missing('user')
+            self.enrolments[course['id']][user_id] = _int(enrolment.get('roleid', 5), 'roleid')
+        return None
+
+    def enrol_manual_unenrol_users(self, params):
+        for enrolment in _list(params, 'enrolments'):
+            course = self._course(enrolment.get('courseid'))
+            user_id = _int(enrolment.get('userid'), 'userid')
+            self.enrolments[course['id']].pop(user_id, None)
+            for group in self._user_groups(course['id'], user_id):
+                self.group_members[group['id']].discard(user_id)
+        return None
+
+    def core_course_get_courses_by_field(self, params):
+        field = params.get('field', '')
+        value = params.get('value', '')
+        courses = list(self.courses.values())
+        if field == 'id':
+            courses = [c for c in courses if str(c['id']) == str(value)]
+        elif field == 'ids':
+            ids = {part.strip() for part in str(value).split(',')}
+            courses = [c for c in courses if str(c['id']) in ids]
+        elif field in ('shortname', 'idnumber'):
+            courses = [c for c in courses if c[field] == value]
+        elif field == 'category':
+            courses = [c for c in courses if str(c['categoryid']) == str(value)]
+        elif field:
+            raise _invalid(f"unknown field {field}")
+        return {'courses': [self._course_summary(c) for c in courses], 'warnings': []}
+
+    def core_course_get_categories(self, params):
+        count = len(self.courses)
+        return [{'id': 1, 'name': 'Miscellaneous', 'idnumber': '', 'description': '',
+                 'parent': 0, 'sortorder': 10000, 'coursecount': count, 'visible': 1,
+                 'depth': 1, 'path': '/1'}]
+
+    def core_course_get_contents(self, params):
+        course = self._course(params.get('courseid'))
+        modules = [{'id': a['cmid'], 'instance': a['id'], 'name': a['name'], 'modname': 'assign',
+                    'visible': 1, 'url': f"http://localhost/mod/assign/view.php?id={a['cmid']}"}
+                   for a in self.assignments.values() if a['course'] == course['id']]
+        return [{'id': course['id'] * 10, 'name': 'General', 'section': 0, 'visible': 1,
+                 'summary': '', 'modules': modules}]
+
+    def core_course_get_recent_courses(self, params):
+        user_id = _int(params.get('userid', self.ADMIN_ID), 'userid')
+        limit = _int(params.get('limit', 0), 'limit')
+        courses = self.core_enrol_get_users_courses({'userid': user_id})
+        return courses[:limit] if limit else courses
+
+    def core_course_search_courses(self, params):
+        search = str(params.get('criteriavalue', '')).lower()
+        page = _int(params.get('page', 0), 'page')
+        perpage = _int(params.get('perpage', 0), 'perpage')
+        found = [self._course_summary(c) for c in self.courses.values()
+                 if search in c['fullname'].lower() or search in c['shortname'].lower()]
+        if perpage:
+            found_page = found[page * perpage:(page + 1) * perpage]
+        else:
+            found_page = found
+        return {'total': len(found), 'courses': found_page, 'warnings': []}
+
+    # ========== Groups ==========
+
+    def core_group_get_course_groups(self, params):
+        course = self._course(params.get('courseid'))
+        return [dict(group) for group in self.groups.values() if group['courseid'] == course['id']]
+
+    def core_group_get_course_user_groups(self, params):
+        course_id = _int(params.get('courseid', 0), 'courseid')
+        user_id = _int(params.get('userid', 0), 'userid')
+        return {'groups': [dict(group) for group in self._user_groups(course_id, user_id)],
+                'warnings': []}
+
+    def core_group_get_groups(self, params):
+        return [dict(self._group(group_id)) for group_id in _list(params, 'groupids')]
+
+    def core_group_create_groups(self, params):
+        # Validate every group first so a rejected call creates nothing
+        groups = _list(params, 'groups')
+        taken = {(g['courseid'], g['name']) for g in self.groups.values()}
+        for group in groups:
+            course = self._course(group.get('courseid'))
+            # Moodle trims group names before checking and storing them
+            name = str(group.get('name', '')).strip()
+            if not name:
+                raise _invalid('name')
+            if (course['id'], name) in taken:
+                raise FakeMoodleError('errorgroupexists',
+                                      'Group with the same name already exists in the course',
+                                      'invalid_parameter_exception')
+            taken.add((course['id'], name))
+
+        created = []
+        for group in groups:
+            group_id = self.add_group(_int(group['courseid'], 'courseid'), str(group['name']).strip(),
+                                      group.get('description', ''), group.get('idnumber', ''))
+            created.append(dict(self.groups[group_id]))
+        return created
+
+    def core_group_update_groups(self, params):
+        for update in _list(params, 'groups'):
+            group = self._group(update.get('id'))
+            for field in ('name', 'description', 'idnumber', 'enrolmentkey'):
+                if field in update:
+                    group[field] = update[field]
+        return None
+
+    def core_group_delete_groups(self, params):
+        # Moodle silently skips the IDs of groups that do not exist
+        group_ids = [_int(group_id, 'groupids') for group_id in _list(params, 'groupids')]
+        for group_id in group_ids:
+            if group_id not in self.groups:
+                continue
+            del self.groups[group_id]
+            del self.group_members[group_id]
+            for groups in self.grouping_groups.values():
+                groups.discard(group_id)
+        return None
+
+    def core_group_get_group_members(self, params):
+        return [{'groupid': self._group(group_id)['id'],
+                 'userids': sorted(self.group_members[_int(group_id, 'groupids')])}
+                for group_id in _list(params, 'groupids')]
+
+    def core_group_add_group_members(self, params):
+        # Moodle runs the call in a transaction: validate every member first
+        members = []
+        for member in _list(params, 'members'):
+            group = self._group(member.get('groupid'))
+            user_id = _int(member.get('userid'), 'userid')
+            if user_id not in self.users:
+                raise _missing('user')
+            if user_id not in self.enrolments[group['courseid']]:
+                raise _invalid('Only enrolled users may be members of groups')
+            members.append((group['id'], user_id))
+        for group_id, user_id in members:
+            self.group_members[group_id].add(user_id)
+        return None
+
+    def core_group_delete_group_members(self, params):
+        # Same transaction as add: unknown groups and users reject the call
+        members = []
+        for member in _list(params, 'members'):
+            group = self._group(member.get('groupid'))
+            user_id = _int(member.get('userid'), 'userid')
+            if user_id not in self.users:
+                raise _missing('user')
+            members.append((group['id'], user_id))
+        for group_id, user_id in members:
+            self.group_members[group_id].discard(user_id)
+        return None
+
+    # ========== Groupings ==========
+
+    def core_group_get_course_groupings(self, params):
+        course = self._course(params.get('courseid'))
+        return [dict(grouping) for grouping in self.groupings.values()
+                if grouping['courseid'] == course['id']]
+
+    def core_group_get_groupings(self, params):
+        return_groups = str(params.get('returngroups', '0')) in ('1', 'true', 'True')
+        result = []
+        for grouping_id in _list(params, 'groupingids'):
+            grouping = dict(self._grouping(grouping_id))
+            if return_groups:
+                grouping['groups'] = [dict(self.groups[group_id])
+                                      for group_id in sorted(self.grouping_groups[grouping['id']])]
+            result.append(grouping)
+        return result
+
+    def core_group_create_groupings(self, params):
+        # Validate every grouping first so a rejected call creates nothing
+        groupings = _list(params, 'groupings')
+        taken = {(g['courseid'], g['name']) for g in self.groupings.values()}
+        for grouping in groupings:
+            course = self._course(grouping.get('courseid'))
+            name = grouping.get('name', '')
+            if (course['id'], name) in taken:
+                raise FakeMoodleError('errorgroupingexists',
+                                      'Grouping with the same name already exists in the course',
+                                      'invalid_parameter_exception')
+            taken.add((course['id'], name))
+
+        created = []
+        for grouping in groupings:
+            grouping_id = self.add_grouping(_int(grouping['courseid'], 'courseid'), grouping.get('name', ''),
+                                            grouping.get('description', ''), grouping.get('idnumber', ''))
+            created.append(dict(self.groupings[grouping_id]))
+        return created
+
+    def core_group_update_groupings(self, params):
+        for update in _list(params, 'groupings'):
+            grouping = self._grouping(update.get('id'))
+            for field in ('name', 'description', 'idnumber'):
+                if field in update:
+                    grouping[field] = update[field]
+        return None
+
+    def core_group_delete_groupings(self, params):
+        for grouping_id in _list(params, 'groupingids'):
+            grouping = self._grouping(grouping_id)
+            del self.groupings[grouping['id']]
+            del self.grouping_groups[grouping['id']]
+        return None
+
+    def core_group_assign_grouping(self, params):
+        # Moodle runs the call in a transaction: validate every link first
+        links = [(self._grouping(assignment.get('groupingid'))['id'],
+                  self._group(assignment.get('groupid'))['id'])
+                 for assignment in _list(params, 'assignments')]
+        for grouping_id, group_id in links:
+            self.grouping_groups[grouping_id].add(group_id)
+        return None
+
+    def core_group_unassign_grouping(self, params):
+        links = [(self._grouping(unassignment.get('groupingid'))['id'],
+                  self._group(unassignment.get('groupid'))['id'])
+                 for unassignment in _list(params, 'unassignments')]
+        for grouping_id, group_id in links:
+            self.grouping_groups[grouping_id].discard(group_id)
+        return None
+
+    # ========== Users and messages ==========
+
+    def core_user_get_users(self, params):
+        users = list(self.users.values())
+        for criterion in _list(params, 'criteria'):
+            key, value = criterion.get('key'), str(criterion.get('value', ''))
+            if key not in ('id', 'username', 'email', 'firstname', 'lastname', 'idnumber', 'auth'):
+                raise _invalid(f"invalid criteria key {key}")
+            users = [user for user in users if str(user[key]).lower() == value.lower()]
+        return {'users': [dict(user) for user in users], 'warnings': []}
+
+    def core_user_get_users_by_field(self, params):
+        field = params.get('field', '')
+        if field not in ('id', 'idnumber', 'username', 'email'):
+            raise _invalid(f"invalid field {field}")
+        values = {str(value) for value in _list(params, 'values')}
+        return [dict(user) for user in self.users.values() if str(user[field]) in values]
+
+    def core_user_create_users(self, params):
+        created = []
+        for user in _list(params, 'users'):
+            username = user.get('username', '')
+            if any(existing['username'] == username for existing in self.users.values()):
+                raise _invalid(f"Username already exists: {username}")
+            user_id = self.add_user(username, user.get('firstname', ''), user.get('lastname', ''),
+                                    user.get('email'))
+            created.append({'id': user_id, 'username': username})
+        return created
+
+    def core_user_update_users(self, params):
+        for update in _list(params, 'users'):
+            user = self.users.get(_int(update.get('id'), 'id'))
+            if user is None:
+                raise _missing('user')
+            for field in ('username', 'firstname', 'lastname', 'email', 'idnumber', 'city', 'country'):
+                if field in update:
+                    user[field] = update[field]
+            user['fullname'] = f"{user['firstname']} {user['lastname']}"
+        return None
+
+    def core_message_send_instant_messages(self, params):
+        sent = []
+        for message in _list(params, 'messages'):
+            user_id = _int(message.get('touserid'), 'touserid')
+            if user_id not in self.users:
+                sent.append({'msgid': -1, 'clientmsgid': message.get('clientmsgid', ''),
+                             'errormessage': 'User does not exist'})
+                continue
+            msg_id = self._next_id()
+            self.messages.append({'id': msg_id, 'touserid': user_id, 'text': message.get('text', '')})
+            sent.append({'msgid': msg_id, 'clientmsgid': message.get('clientmsgid', ''),
+                         'text': message.get('text', ''), 'timecreated': int(time.time()),
+                         'conversationid': msg_id, 'useridfrom': self.ADMIN_ID,
+                         'candeletemessagesforallusers': False})
+        return sent
+
+    # ========== Cohorts ==========
+
+    def _cohort_id(self, reference: Dict[str, Any]) -> Optional[int]:
+        kind, value = reference.get('type'), reference.get('value')
+        if kind == 'id':
+            cohort_id = _int(value, 'cohorttype')
+            return cohort_id if cohort_id in self.cohorts else None
+        if kind == 'idnumber':
+            return next((c['id'] for c in self.cohorts.values() if c['idnumber'] == value), None)
+        return None
+
+    def _user_id(self, reference: Dict[str, Any]) -> Optional[int]:
+        kind, value = reference.get('type'), reference.get('value')
+        if kind == 'id':
+            user_id = _int(value, 'usertype')
+            return user_id if user_id in self.users else None
+        if kind in ('username', 'idnumber'):
+            return next((u['id'] for u in self.users.values() if str(u[kind]) == str(value)), None)
+        return None
+
+    def core_cohort_get_cohorts(self, params):
+        cohort_ids = [_int(cohort_id, 'cohortids') for cohort_id in _list(params, 'cohortids')]
+        if not cohort_ids:
+            return [dict(cohort) for cohort in self.cohorts.values()]
+        for cohort_id in cohort_ids:
+            if cohort_id not in self.cohorts:
+                raise _missing('cohort')
+        return [dict(self.cohorts[cohort_id]) for cohort_id in cohort_ids]
+
+    def core_cohort_get_cohort_members(self, params):
+        result = []
+        for cohort_id in _list(params, 'cohortids'):
+            cohort_id = _int(cohort_id, 'cohortids')
+            if cohort_id not in self.cohorts:
+                raise _missing('cohort')
+            result.append({'cohortid': cohort_id, 'userids': sorted(self.cohort_members[cohort_id])})
+        return result
+
+    def core_cohort_add_cohort_members(self, params):
+        # Same warning messages as Moodle, naming the cohort and user references
+        warnings = []
+        for member in _list(params, 'members'):
+            cohort_type, user_type = member.get('cohorttype', {}), member.get('usertype', {})
+            cohort_id = self._cohort_id(cohort_type)
+            user_id = self._user_id(user_type)
+            if cohort_id is None:
+                message = f"cohort {cohort_type.get('type')}={cohort_type.get('value')} not exists"
+            elif user_id is None:
+                message = f"user {user_type.get('type')}={user_type.get('value')} not exists"
+            elif user_id in self.cohort_members[cohort_id]:
+                message = (f"record already exists: cohort({cohort_type.get('type')}:{cohort_type.get('value')}) "
+                           f"user({user_type.get('type')}:{user_type.get('value')})")
+            else:
+                self.cohort_members[cohort_id].add(user_id)
+                continue
+            warnings.append({'warningcode': '1', 'message': message})
+        return {'warnings': warnings}
+
+    def core_cohort_delete_cohort_members(self, params):
+        # Moodle runs the call in a transaction and requires existing users
+        members = []
+        for member in _list(params, 'members'):
+            cohort_id = _int(member.get('cohortid'), 'cohortid')
+            user_id = _int(member.get('userid'), 'userid')
+            if cohort_id not in self.cohorts:
+                raise _missing('cohort')
+            if user_id not in self.users:
+                raise _missing('user')
+            members.append((cohort_id, user_id))
+        for cohort_id, user_id in members:
+            self.cohort_members[cohort_id].discard(user_id)
+        return None
+
+    def core_cohort_create_cohorts(self, params):
+        created = []
+        for cohort in _list(params, 'cohorts'):
+            cohort_id = self.add_cohort(cohort.get('name', ''), cohort.get('idnumber', ''))
+            created.append(dict(self.cohorts[cohort_id]))
+        return created
+
+    def core_cohort_update_cohorts(self, params):
+        for update in _list(params, 'cohorts'):
+            cohort = self.cohorts.get(_int(update.get('id'), 'id'))
+            if cohort is None:
+                raise _missing('cohort')
+            for field in ('name', 'idnumber', 'description', 'visible'):
+                if field in update:
+                    cohort[field] = update[field]
+        return None
+
+    def core_cohort_delete_cohorts(self, params):
+        for cohort_id in _list(params, 'cohortids'):
+            cohort_id = _int(cohort_id, 'cohortids')
+            if cohort_id not in self.cohorts:
+                raise _missing('cohort')
+            del self.cohorts[cohort_id]
+            del self.cohort_members[cohort_id]
+        return None
+
+    # ========== Assignments and grades ==========
+
+    def mod_assign_get_assignments(self, params):
+        course_ids = [_int(course_id, 'courseids') for course_id in _list(params, 'courseids')]
+        course_ids = course_ids or list(self.courses)
+        courses = []
+        for course_id in course_ids:
+            course = self._course(course_id)
+            courses.append({
+                'id': course['id'],
+                'fullname': course['fullname'],
+                'shortname': course['shortname'],
+                'timemodified': 0,
+                'assignments': [dict(a) for a in self.assignments.values() if a['course'] == course['id']],
+            })
+        return {'courses': courses, 'warnings': []}
+
+    def _submission(self, assignment: Dict[str, Any], user_id: int) -> Dict[str, Any]:
+        graded = user_id in self.grades[assignment['id']]
+        return {'id': assignment['id'] * 100000 + user_id, 'userid': user_id, 'attemptnumber': 0,
+                'timecreated': 0, 'timemodified': 0, 'status': 'submitted',
+                'groupid': 0, 'gradingstatus': 'graded' if graded else 'notgraded', 'plugins': []}
+
+    def mod_assign_get_submissions(self, params):
+        status = params.get('status', '')
+        assignments = []
+        for assignment_id in _list(params, 'assignmentids'):
+            assignment = self._assignment(assignment_id)
+            submissions = [self._submission(assignment, user_id)
+                           for user_id, role in self.enrolments[assignment['course']].items() if role == 5]
+            if status:
+                submissions = [s for s in submissions if s['status'] == status]
+            assignments.append({'assignmentid': assignment['id'], 'submissions': submissions})
+        return {'assignments': assignments, 'warnings': []}
+
+    def mod_assign_get_submission_status(self, params):
+        assignment = self._assignment(params.get('assignid'))
+        user_id = _int(params.get('userid', self.ADMIN_ID), 'userid')
+        return {'lastattempt': {'submission': self._submission(assignment, user_id),
+                                'graded': user_id in self.grades[assignment['id']]},
+                'warnings': []}
+
+    def mod_assign_get_grades(self, params):
+        user_ids = {_int(user_id, 'userids') for user_id in _list(params, 'userids')}
+        assignments = []
+        for assignment_id in _list(params, 'assignmentids'):
+            assignment = self._assignment(assignment_id)
+            grades = [{k: v for k, v in grade.items() if k != 'feedback'}
+                      for user_id, grade in self.grades[assignment['id']].items()
+                      if not user_ids or user_id in user_ids]
+            assignments.append({'assignmentid': assignment['id'], 'grades': grades})
+        return {'assignments': assignments, 'warnings': []}
+
+    def _save_grade(self, assignment: Dict[str, Any], grade: Dict[str, Any]):
+        user_id = _int(grade.get('userid'), 'userid')
+        if user_id not in self.enrolments[assignment['course']]:
+            raise FakeMoodleError('usernotincourse', 'User is not enrolled in the course')
+        feedback = grade.get('plugindata', {}).get('assignfeedbackcomments_editor', {}).get('text', '')
+        try:
+            value = float(grade.get('grade'))
+        except (TypeError, ValueError):
+            raise _invalid('grade')
+        self.set_grade(assignment['id'], user_id, value, feedback)
+
+    def mod_assign_save_grade(self, params):
+        assignment = self._assignment(params.get('assignmentid'))
+        self._save_grade(assignment, params)
+        return None
+
+    def mod_assign_save_grades(self, params):
+        assignment = self._assignment(params.get('assignmentid'))
+        for grade in _list(params, 'grades'):
+            self._save_grade(assignment, grade)
+        return None
+
+    def core_grades_update_grades(self, params):
+        return 0
+
+    def _grade_items(self, course_id: int, user_id: int) -> List[Dict[str, Any]]:
+        items = []
+        for assignment in self.assignments.values():
+            if assignment['course'] != course_id:
+                continue
+            grade = self.grades[assignment['id']].get(user_id)
+            raw = float(grade['grade']) if grade else None
+            items.append({
+                'id': assignment['id'], 'itemname': assignment['name'], 'itemtype': 'mod',
+                'itemmodule': 'assign', 'iteminstance': assignment['id'], 'cmid': assignment['cmid'],
+                'graderaw': raw, 'gradeformatted': f"{raw:.2f}" if raw is not None else '-',
+                'grademin': 0, 'grademax': assignment['grade'],
+                'feedback': grade['feedback'] if grade else '',
+            })
+        return items
+
+    def gradereport_user_get_grade_items(self, params):
+        course = self._course(params.get('courseid'))
+        user_ids = list(self.enrolments[course['id']])
+        if params.get('userid') not in (None, '', '0', 0):
+            user_ids = [_int(params['userid'], 'userid')]
+        if params.get('groupid') not in (None, '', '0', 0):
+            members = self.group_members.get(_int(params['groupid'], 'groupid'), set())
+            user_ids = [user_id for user_id in user_ids if user_id in members]
+        return {
+            'usergrades': [{
+                'courseid': course['id'],
+                'userid': user_id,
+                'userfullname': self.users[user_id]['fullname'],
+                'maxdepth': 2,
+                'gradeitems': self._grade_items(course['id'], user_id),
+            } for user_id in user_ids],
+            'warnings': [],
+        }
+
+    def gradereport_user_get_grades_table(self, params):
+        course = self._course(params.get('courseid'))
+        user_id = _int(params.get('userid'), 'userid')
+        rows = [{'itemname': {'content': item['itemname']},
+                 'grade': {'content': item['gradeformatted']}}
+                for item in self._grade_items(course['id'], user_id)]
+        return {'tables': [{'courseid': course['id'], 'userid': user_id,
+                            'userfullname': self.users[user_id]['fullname'],
+                            'maxdepth': 2, 'tabledata': rows}],
+                'warnings': []}
+
+
+def generate_site(students: int = 100, courses: int = 1, groups_per_course: int = 10,
+                  groupings_per_course: int = 2, assignments_per_course: int = 3,
+                  cohorts: int = 2, graded: float = 0.8, seed: int = 0) -> FakeMoodleSite:
+    """
+    Build a site filled with synthetic data.
+
+    Every student is enrolled in every course and placed in one group per
+    course (round robin); groups are spread over the course's groupings and
+    students over the cohorts. A share of the students gets a grade in each
+    assignment.
+
+    Args:
+        students: Number of student accounts
+        courses: Number of courses
+        groups_per_course: Number of groups in each course
+        groupings_per_course: Number of groupings in each course
+        assignments_per_course: Number of assignments in each course
+        cohorts: Number of system cohorts
+        graded: Share of students graded in each assignment (0 to 1)
+        seed: Random seed, so a given configuration always yields the same data
+
+    Returns:
+        Populated FakeMoodleSite
+
+    Example:
+        >>> site = generate_site(students=10000, groups_per_course=500)
+    """
+    rng = random.Random(seed)
+    site = FakeMoodleSite()
+
+    student_ids = [site.add_user(f"student{i:05d}", f"First{i}", f"Last{i}") for i in range(students)]
+    cohort_ids = [site.add_cohort(f"Cohort {c + 1}", f"COH{c + 1}") for c in range(cohorts)]
+    for index, user_id in enumerate(student_ids):
+        if cohort_ids:
+            site.add_cohort_member(cohort_ids[index % len(cohort_ids)], user_id)
+
+    for c in range(courses):
+        course_id = site.add_course(f"C{c + 1:03d}", f"Course {c + 1}")
+        site.enrol(course_id, FakeMoodleSite.ADMIN_ID, role_id=3)
+        for user_id in student_ids:
+            site.enrol(course_id, user_id)
+
+        group_ids = [site.add_group(course_id, f"Group {g + 1}", idnumber=f"C{c + 1}G{g + 1}")
+                     for g in range(groups_per_course)]
+        for index, user_id in enumerate(student_ids):
+            if group_ids:
+                site.add_group_member(group_ids[index % len(group_ids)], user_id)
+
+        grouping_ids = [site.add_grouping(course_id, f"Grouping {g + 1}", idnumber=f"C{c + 1}GG{g + 1}")
+                        for g in range(groupings_per_course)]
+        for index, group_id in enumerate(group_ids):
+            if grouping_ids:
+                site.assign_grouping(grouping_ids[index % len(grouping_ids)], group_id)
+
+        for a in range(assignments_per_course):
+            assignment_id = site.add_assignment(course_id, f"Assignment {a + 1}")
+            for user_id in student_ids:
+                if rng.random() < graded:
+                    site.set_grade(assignment_id, user_id, rng.randint(0, 100))
+
+    return site
@@ -0,0 +1,266 @@
+"""
+Local fake Moodle web-service server.
+
+FakeMoodleServer answers ``/webservice/rest/server.php`` from a
+FakeMoodleSite, with configurable per-function latency, PHP's
+max_input_vars truncation and injectable errors, so that the library can
+be exercised at scale without a real Moodle.
+"""
+
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import parse_qsl, urlparse
+
+from ..params import unflatten_params
+from .data import FakeMoodleError, FakeMoodleSite, generate_site
+
+
+REST_PATH = '/webservice/rest/server.php'
+
+
+class FaultRule:
+    """
+    Error injected into matching calls.
+
+    Attributes:
+        function_name: Function the rule applies to ('*' for every function)
+        status: HTTP status to answer with (None for a Moodle exception with status 200)
+        errorcode: Moodle error code of the injected exception
+        message: Message of the injected exception
+        times: Number of calls still to fail (None for unlimited)
+        rate: Probability that a matching call fails (1.0 for every call)
+        delay: Extra seconds to wait before answering (e.g. to trigger client timeouts)
+    """
+
+    def __init__(self, function_name: str = '*', status: Optional[int] = None,
+                 errorcode: str = 'generalexceptionmessage', message: str = 'Injected error',
+                 times: Optional[int] = 1, rate: float = 1.0, delay: float = 0.0):
+        self.function_name = function_name
+        self.status = status
+        self.errorcode = errorcode
+        self.message = message
+        self.times = times
+        self.rate = rate
+        self.delay = delay
+
+    def matches(self, function_name: str, rng: random.Random) -> bool:
+        if self.times is not None and self.times <= 0:
+            return False
+        if self.function_name not in ('*', function_name):
+            return False
+        return self.rate >= 1.0 or rng.random() < self.rate
+
+    def __repr__(self) -> str:
+        return f"<FaultRule: {self.function_name} status={self.status} times={self.times}>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serves Moodle REST requests from the server's site."""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without TCP_NODELAY each
+    # keep-alive response waits on the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        fake: "FakeMoodleServer" = self.server.fake
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length).decode('utf-8')
+        if urlparse(self.path).path != REST_PATH:
+            self._reply(404, {'error': 'Not found'})
+            return
+        status, payload = fake._dispatch(body)
+        self._reply(status, payload)
+
+    def _reply(self, status: int, payload: Any):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeMoodleServer:
+    """
+    Moodle-compatible web-service endpoint running on localhost.
+
+    Example:
+        >>> with FakeMoodleServer(generate_site(students=10000, groups_per_course=500),
+        ...                       latency={'core_group_add_group_members': 0.05}) as server:
+        ...     moodle = MoodleAPI(server.url, server.token)
+        ...     course_id = next(iter(server.site.courses))
+        ...     groups = moodle.groups.get_course_groups(course_id)
+        >>> server.calls['core_group_get_course_groups']
+    """
+
+    def __init__(self, site: Optional[FakeMoodleSite] = None,
+                 latency: Union[float, Dict[str, float], None] = None,
+                 max_input_vars: Optional[int] = 1000, token: str = 'fake-token',
+                 host: str = '127.0.0.1', port: int = 0, seed: int = 0):
+        """
+        Initialize the server (call start() or use it as a context manager).
+
+        Args:
+            site: Site to serve (default: generate_site() with default sizes)
+            latency: Seconds added to every call, or a mapping of function names
+                to seconds (use the '*' key for the default)
+            max_input_vars: PHP max_input_vars; form variables beyond it are
+                dropped like PHP does (None for no limit)
+            token: Token accepted by the server
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            seed: Seed of the random generator used by fault rates
+        """
+        self.site = site if site is not None else generate_site()
+        if isinstance(latency, dict):
+            self.latency: Dict[str, float] = dict(latency)
+        else:
+            self.latency = {'*': float(latency or 0.0)}
+        self.max_input_vars = max_input_vars
+        self.token = token
+        self.faults: List[FaultRule] = []
+        self.calls: Counter = Counter()
+        self.truncated = 0
+        self.in_flight = 0
+        self.peak_concurrency = 0
+        self._host = host
+        self._port = port
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to give to MoodleAPI."""
+        if self._httpd is None:
+            raise RuntimeError("Server is not started")
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeMoodleServer":
+        """Start serving in a background thread."""
+        if self._httpd is None:
+            httpd = self._httpd = ThreadingHTTPServer((self._host, self._port), _Handler)
+            httpd.daemon_threads = True
+            httpd.fake = self
+            self._thread = threading.Thread(target=httpd.serve_forever, args=(0.05,),
+                                            name='fake-moodle', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server and release its port."""
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+            self._thread = None
+
+    def set_latency(self, function_name: str, seconds: float):
+        """
+        Set the latency of a function ('*' for the default).
+
+        Args:
+            function_name: Web-service function name
+            seconds: Delay added before answering
+        """
+        self.latency[function_name] = seconds
+
+    def inject_error(self, function_name: str = '*', status: Optional[int] = None,
+                     errorcode: str = 'generalexceptionmessage', message: str = 'Injected error',
+                     times: Optional[int] = 1, rate: float = 1.0, delay: float = 0.0) -> FaultRule:
+        """
+        Make matching calls fail.
+
+        Args:
+            function_name: Function to fail ('*' for every function)
+            status: HTTP status to answer with (e.g. 503); None answers a Moodle
+                exception with status 200, like Moodle does
+            errorcode: Moodle error code of the exception
+            message: Message of the exception
+            times: Number of calls to fail (None for every matching call)
+            rate: Probability that a matching call fails
+            delay: Extra seconds to wait before answering
+
+        Returns:
+            The registered FaultRule (remove it from server.faults to cancel it)
+        """
+        rule = FaultRule(function_name, status, errorcode, message, times, rate, delay)
+        with self._lock:
+            self.faults.append(rule)
+        return rule
+
+    def reset_stats(self):
+        """Reset call counters and the concurrency peak."""
+        with self._lock:
+            self.calls.clear()
+            self.truncated = 0
+            self.peak_concurrency = self.in_flight
+
+    def _dispatch(self, body: str):
+        """Answer one request body; returns (HTTP status, JSON payload)."""
+        pairs = parse_qsl(body, keep_blank_values=True)
+        if self.max_input_vars is not None and len(pairs) > self.max_input_vars:
+            # PHP silently drops the variables beyond max_input_vars
+            pairs = pairs[:self.max_input_vars]
+            with self._lock:
+                self.truncated += 1
+        variables = dict(pairs)
+        function_name = variables.pop('wsfunction', '')
+        token = variables.pop('wstoken', '')
+        variables.pop('moodlewsrestformat', None)
+
+        with self._lock:
+            self.calls[function_name] += 1
+            self.in_flight += 1
+            self.peak_concurrency = max(self.peak_concurrency, self.in_flight)
+            fault = next((rule for rule in self.faults if rule.matches(function_name, self._rng)), None)
+            if fault is not None and fault.times is not None:
+                fault.times -= 1
+
+        try:
+            delay = self.latency.get(function_name, self.latency.get('*', 0.0))
+            if fault is not None:
+                delay += fault.delay
+            if delay > 0:
+                time.sleep(delay)
+
+            if token != self.token:
+                return 200, {'exception': 'moodle_exception', 'errorcode': 'invalidtoken',
+                             'message': 'Invalid token - token not found'}
+            if fault is not None:
+                if fault.status is not None:
+                    return fault.status, {'error': fault.message}
+                return 200, FakeMoodleError(fault.errorcode, fault.message).as_response()
+
+            try:
+                params = unflatten_params(variables)
+                return 200, self.site.handle(function_name, params)
+            except FakeMoodleError as e:
+                return 200, e.as_response()
+            except ValueError as e:
+                return 200, {'exception': 'invalid_parameter_exception',
+                             'errorcode': 'invalidparameter', 'message': str(e)}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def __enter__(self) -> "FakeMoodleServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def __repr__(self) -> str:
+        state = self.url if self._httpd is not None else 'stopped'
+        return f"<FakeMoodleServer: {state}>"
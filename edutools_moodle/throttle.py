@@ -0,0 +1,191 @@
+"""
+Client-side throttling for Moodle API calls.
+
+Provides a token-bucket rate limiter and an AIMD (additive increase,
+multiplicative decrease) concurrency limiter. Both are plugged into a
+MoodleTransport so that every module sharing the transport is throttled
+together.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+
+class RateLimiter:
+    """
+    Token bucket limiting the number of requests per second.
+
+    Up to ``burst`` requests may be sent at once; after that requests are
+    spaced to ``rate`` per second.
+
+    Example:
+        >>> transport = MoodleTransport(rate_limiter=RateLimiter(rate=20, burst=40))
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            rate: Sustained number of requests per second
+            burst: Bucket capacity (default: rate rounded up, at least 1)
+
+        Raises:
+            ValueError: If rate or burst is not positive
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst is None:
+            burst = max(1, int(rate + 0.999))
+        if burst < 1:
+            raise ValueError("burst must be a positive integer")
+
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def acquire(self) -> float:
+        """
+        Take one token, waiting until one is available.
+
+        Returns:
+            Time spent waiting in seconds
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.waited += waited
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def __repr__(self) -> str:
+        return f"<RateLimiter: {self.rate}/s, burst={self.burst}>"
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limit on the number of requests in flight.
+
+    Every successful request raises the limit by ``increase / limit`` (about
+    ``increase`` per full window of requests). A timeout, a 429/5xx response
+    or a latency well above the usual latency of the same function cuts the
+    limit by ``decrease_factor``. Failures of requests sent before the last
+    cut are ignored, so one burst of failures counts as a single congestion
+    signal.
+
+    Attributes:
+        limit: Current concurrency limit (float, requests start while
+            in_flight < int(limit))
+        in_flight: Number of requests currently sent
+        stats: Counters of 'increases' and 'decreases'
+
+    Example:
+        >>> transport = MoodleTransport(pool_maxsize=50,
+        ...                             concurrency=AdaptiveConcurrencyLimiter(initial=10, max_limit=50))
+    """
+
+    def __init__(self, initial: int = 10, min_limit: int = 1, max_limit: int = 100,
+                 increase: float = 1.0, decrease_factor: float = 0.5,
+                 latency_tolerance: Optional[float] = 3.0, min_samples: int = 5):
+        """
+        Initialize the concurrency limiter.
+
+        Args:
+            initial: Starting concurrency limit
+            min_limit: Lowest limit the controller may reach
+            max_limit: Highest limit the controller may reach
+            increase: Additive increase per window of successful requests
+            decrease_factor: Multiplier applied on congestion (0 < factor < 1)
+            latency_tolerance: A request slower than this multiple of the
+                baseline latency of its function signals congestion
+                (None disables the latency signal)
+            min_samples: Requests of a function observed before its latency is judged
+
+        Raises:
+            ValueError: If the limits or factors are inconsistent
+        """
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= initial <= max_limit")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+        if increase <= 0:
+            raise ValueError("increase must be positive")
+
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.min_samples = min_samples
+        self.in_flight = 0
+        self.stats: Dict[str, int] = {'increases': 0, 'decreases': 0}
+        self._baselines: Dict[str, float] = {}
+        self._samples: Dict[str, int] = {}
+        self._last_decrease = float('-inf')
+        self._condition = threading.Condition()
+
+    def acquire(self) -> float:
+        """
+        Wait for a free slot and take it.
+
+        Returns:
+            The time at which the slot was taken (for release())
+        """
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, started: float, failed: bool = False, function_name: Optional[str] = None):
+        """
+        Give a slot back and adjust the limit from the outcome of the request.
+
+        Args:
+            started: Value returned by acquire()
+            failed: True if the request timed out or got a 429/5xx response
+            function_name: Function of the request, used for the latency signal
+        """
+        now = time.monotonic()
+        latency = now - started
+        with self._condition:
+            self.in_flight -= 1
+            congested = failed or self._is_slow(function_name, latency)
+
+            if congested:
+                if started > self._last_decrease:
+                    self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+                    self._last_decrease = now
+                    self.stats['decreases'] += 1
+            elif self.limit < self.max_limit:
+                self.limit = min(float(self.max_limit), self.limit + self.increase / self.limit)
+                self.stats['increases'] += 1
+            self._condition.notify_all()
+
+    def _is_slow(self, function_name: Optional[str], latency: float) -> bool:
+        """Update the latency baseline of a function and compare latency against it."""
+        if self.latency_tolerance is None or function_name is None:
+            return False
+        samples = self._samples[function_name] = self._samples.get(function_name, 0) + 1
+        baseline = self._baselines.get(function_name)
+        if baseline is None or latency < baseline:
+            self._baselines[function_name] = latency
+            return False
+        # Let the baseline drift up slowly so a permanently slower server is accepted
+        self._baselines[function_name] = baseline + (latency - baseline) * 0.01
+        return samples > self.min_samples and latency > baseline * self.latency_tolerance
+
+    def __repr__(self) -> str:
+        return f"<AdaptiveConcurrencyLimiter: limit={self.limit:.1f}, in_flight={self.in_flight}>"
@@ -0,0 +1,149 @@
+"""
+HTTP transport for Moodle API interactions.
+
+Provides a pooled HTTP transport that can be shared by several Moodle
+modules so that they reuse the same keep-alive connections.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .concurrency import SingleFlight
+from .throttle import AdaptiveConcurrencyLimiter, RateLimiter
+
+
+# Responses telling the client to back off
+CONGESTION_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class MoodleTransport:
+    """
+    Pooled HTTP transport shared across Moodle API modules.
+
+    Wraps a single requests Session whose connection pool is sized for
+    multi-threaded use. Every module built with the same transport reuses
+    the same keep-alive connections to the Moodle host, and identical read
+    calls in flight at the same time share one request. An optional rate
+    limiter and adaptive concurrency limiter throttle all of them together.
+
+    Example:
+        >>> transport = MoodleTransport(pool_maxsize=20)
+        >>> groups = MoodleGroups("https://moodle.example.com", "token", transport=transport)
+        >>> grades = MoodleGrades("https://moodle.example.com", "token", transport=transport)
+    """
+
+    def __init__(self, pool_connections: int = 4, pool_maxsize: int = 10,
+                 pool_block: bool = False, logger: Optional[logging.Logger] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 concurrency: Optional[AdaptiveConcurrencyLimiter] = None):
+        """
+        Initialize the transport.
+
+        Args:
+            pool_connections: Number of per-host connection pools to cache
+            pool_maxsize: Maximum number of connections kept alive per host
+                (should be at least the number of worker threads)
+            pool_block: Block when no free connection is available instead of
+                opening a throw-away connection
+            logger: Optional logger instance (will create one if not provided)
+            rate_limiter: Optional token bucket limiting requests per second
+            concurrency: Optional AIMD limiter adapting the number of requests
+                in flight to timeouts, 429/5xx responses and latency
+
+        Raises:
+            ValueError: If a pool size is not a positive integer
+        """
+        if pool_connections < 1 or pool_maxsize < 1:
+            raise ValueError("Pool sizes must be positive integers")
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.logger = logger or logging.getLogger(__name__)
+        self._session: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+        self.inflight = SingleFlight()
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        # Batching support detected per site and token, shared by every module
+        self.batching_support: Dict[str, bool] = {}
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        Lazy-loaded session with a sized connection pool.
+
+        Returns:
+            Configured requests Session instance
+        """
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=self.pool_connections,
+                        pool_maxsize=self.pool_maxsize,
+                        pool_block=self.pool_block
+                    )
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+                    self.logger.debug(
+                        f"Created new HTTP session (pool_maxsize={self.pool_maxsize})"
+                    )
+        return self._session
+
+    def post(self, url: str, data: Any, timeout: float,
+             headers: Optional[Dict[str, str]] = None,
+             function_name: Optional[str] = None) -> requests.Response:
+        """
+        Send a POST request through the pooled session.
+
+        Waits for the rate limiter and a concurrency slot first, when configured.
+
+        Args:
+            url: Endpoint URL
+            data: Form payload (dictionary or pre-encoded body)
+            timeout: Request timeout in seconds
+            headers: Optional extra HTTP headers
+            function_name: Web-service function being called (for latency tracking)
+
+        Returns:
+            The HTTP response
+
+        Raises:
+            requests.exceptions.RequestException: On transport failures
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        concurrency = self.concurrency
+        if concurrency is None:
+            return self._send(url, data, timeout, headers, function_name)
+
+        started = concurrency.acquire()
+        failed = False
+        try:
+            response = self._send(url, data, timeout, headers, function_name)
+            failed = response.status_code in CONGESTION_STATUSES
+            return response
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+            failed = True
+            raise
+        finally:
+            concurrency.release(started, failed=failed, function_name=function_name)
+
+    def _send(self, url: str, data: Any, timeout: float,
+              headers: Optional[Dict[str, str]], function_name: Optional[str]) -> requests.Response:
+        """Send the request itself; overridden by recording and replay transports."""
+        return self.session.post(url, data=data, timeout=timeout, headers=headers)
+
+    def close(self):
+        """Close the session and release pooled connections."""
+        with self._lock:
+            if self._session:
+                self._session.close()
+                self._session = None
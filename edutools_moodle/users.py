@@ -25,7 +25,7 @@ class MoodleUsers(MoodleBase):
         """
         response = self.call_api(
             "core_user_get_users",
-            {"criteria[0][key]": "id", "criteria[0][value]": user_id}
+            {"criteria": [{"key": "id", "value": user_id}]}
         )
 
         if not response or "users" not in response or not response["users"]:
@@ -46,8 +46,7 @@ class MoodleUsers(MoodleBase):
             List of user dictionaries matching the criteria
         """
         params = {
-            "criteria[0][key]": field,
-            "criteria[0][value]": value
+            "criteria": [{"key": field, "value": value}]
         }
 
         response = self.call_api("core_user_get_users", params)
@@ -81,26 +80,46 @@ class MoodleUsers(MoodleBase):
         Returns:
             ID of created user or None if error occurred
         """
-        # Pre-check: Verify username doesn't already exist
-        if self.check_username_exists(username):
+        # Pre-check username and email in a single round trip when possible;
+        # calls of a rejected batch are redone one by one
+        with self.batch() as batch:
+            username_call = batch.call_api("core_user_get_users", {
+                "criteria": [{"key": "username", "value": username}]
+            })
+            email_call = batch.call_api("core_user_get_users", {
+                "criteria": [{"key": "email", "value": email}]
+            })
+
+        if username_call.ok:
+            response = username_call.result()
+            username_exists = bool(response and response.get("users"))
+        else:
+            username_exists = self.check_username_exists(username)
+        if username_exists:
             self.logger.error(f"Cannot create user: Username '{username}' already exists")
             return None
         
         # Check if email already exists
-        existing_users = self.get_users_by_field('email', email)
+        if email_call.ok:
+            email_response = email_call.result()
+            existing_users = email_response.get("users", []) if email_response else []
+        else:
+            existing_users = self.get_users_by_field('email', email)
         if existing_users:
             self.logger.error(f"Cannot create user: Email '{email}' already exists")
             return None
         
         params = {
-            'users[0][username]': username,
-            'users[0][password]': password,
-            'users[0][firstname]': firstname,
-            'users[0][lastname]': lastname,
-            'users[0][email]': email,
-            'users[0][city]': city,
-            'users[0][country]': country,
-            'users[0][mailformat]': 1  # HTML format
+            'users': [{
+                'username': username,
+                'password': password,
+                'firstname': firstname,
+                'lastname': lastname,
+                'email': email,
+                'city': city,
+                'country': country,
+                'mailformat': 1  # HTML format
+            }]
         }
 
         try:
@@ -144,8 +163,7 @@ class MoodleUsers(MoodleBase):
         """
         try:
             response = self.call_api("core_user_get_users", {
-                "criteria[0][key]": "username",
-                "criteria[0][value]": username
+                "criteria": [{"key": "username", "value": username}]
             })
 
             return response and "users" in response and len(response["users"]) > 0
@@ -165,9 +183,11 @@ class MoodleUsers(MoodleBase):
             True if sent successfully, False otherwise
         """
         params = {
-            'messages[0][touserid]': user_id,
-            'messages[0][text]': message,
-            'messages[0][textformat]': 1  # HTML format
+            'messages': [{
+                'touserid': user_id,
+                'text': message,
+                'textformat': 1  # HTML format
+            }]
         }
 
         try:
@@ -227,12 +247,14 @@ class MoodleUsers(MoodleBase):
             True if enrollment succeeds, False otherwise
         """
         params = {
-            "enrolments[0][roleid]": role_id,
-            "enrolments[0][userid]": user_id,
-            "enrolments[0][courseid]": course_id,
-            "enrolments[0][timestart]": timestart,
-            "enrolments[0][timeend]": timeend,
-            "enrolments[0][suspend]": suspend
+            "enrolments": [{
+                "roleid": role_id,
+                "userid": user_id,
+                "courseid": course_id,
+                "timestart": timestart,
+                "timeend": timeend,
+                "suspend": suspend
+            }]
         }
 
         response = self.call_api("enrol_manual_enrol_users", params)
@@ -0,0 +1,126 @@
+"""
+Unit tests for the asyncio client, run against a local stand-in server.
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+from edutools_moodle import AsyncMoodleAPI, MetricsAggregator, MoodleAPIError, ResponseCache
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Answers core_group_get_course_groups and tracks concurrency."""
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        server = self.server
+
+        with server.lock:
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+        time.sleep(0.01)
+        with server.lock:
+            server.in_flight -= 1
+
+        function = form['wsfunction'][0]
+        if function == 'core_group_get_course_groups':
+            course_id = int(form['courseid'][0])
+            body = [{'id': course_id * 10, 'courseid': course_id, 'name': f'G{course_id}'}]
+        else:
+            body = {'exception': 'moodle_exception', 'errorcode': 'invalidrecord',
+                    'message': 'Unknown function'}
+
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_server():
+    """Start a local HTTP server answering Moodle REST calls."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StandInHandler)
+    server.lock = threading.Lock()
+    server.in_flight = 0
+    server.peak = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class TestAsyncMoodleAPI:
+    """Tests for AsyncMoodleAPI."""
+
+    def test_fan_out_returns_same_shapes(self, stand_in_server):
+        """Test that concurrent calls return the synchronous result shapes."""
+        async def run():
+            async with AsyncMoodleAPI(_url(stand_in_server), "token", max_concurrency=4) as moodle:
+                return await asyncio.gather(
+                    *(moodle.groups.get_course_groups(course_id) for course_id in range(1, 41))
+                )
+
+        results = asyncio.run(run())
+
+        assert len(results) == 40
+        assert results[2] == [{'id': 30, 'courseid': 3, 'name': 'G3'}]
+
+    def test_concurrency_is_bounded(self, stand_in_server):
+        """Test that no more than max_concurrency requests are in flight."""
+        async def run():
+            async with AsyncMoodleAPI(_url(stand_in_server), "token", max_concurrency=3) as moodle:
+                await asyncio.gather(
+                    *(moodle.groups.get_group_by_name(course_id, 'G1') for course_id in range(30))
+                )
+
+        asyncio.run(run())
+
+        assert 1 <= stand_in_server.peak <= 3
+
+    def test_errors_propagate(self, stand_in_server):
+        """Test that Moodle exceptions surface from coroutines."""
+        async def run():
+            async with AsyncMoodleAPI(_url(stand_in_server), "token") as moodle:
+                await moodle.users.call_api('core_user_get_users', {})
+
+        with pytest.raises(MoodleAPIError):
+            asyncio.run(run())
+
+    def test_client_options_forwarded(self, stand_in_server):
+        """Test that hooks and the cache configured on the async client are used."""
+        metrics = MetricsAggregator()
+        late = MetricsAggregator()
+
+        async def run():
+            async with AsyncMoodleAPI(_url(stand_in_server), "token", hooks=[metrics],
+                                      cache=ResponseCache(), max_input_vars=None) as moodle:
+                moodle.add_hook(late)
+                for _ in range(3):
+                    await moodle.groups.get_course_groups(1)
+                return moodle.groups.cache
+
+        cache = asyncio.run(run())
+
+        assert cache.hits == 2
+        assert metrics.snapshot()['core_group_get_course_groups']['calls'] == 1
+        assert late.snapshot()['core_group_get_course_groups']['calls'] == 1
+
+    def test_invalid_concurrency(self):
+        """Test that a non-positive concurrency bound is rejected."""
+        with pytest.raises(ValueError):
+            AsyncMoodleAPI("https://test.moodle.com", "token", max_concurrency=0)
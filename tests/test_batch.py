@@ -0,0 +1,230 @@
+"""
+Unit tests for batched web-service calls.
+"""
+import json
+import pytest
+from unittest.mock import Mock
+from edutools_moodle import (MoodleGroups, MoodleUsers, MoodleAPIError,
+                             MoodleAuthenticationError, MoodleTransport)
+from edutools_moodle.params import unflatten_params
+
+
+def _batch_response(*items):
+    """Build a tool_mobile_call_external_functions response."""
+    return {'responses': list(items)}
+
+
+@pytest.fixture
+def mock_groups():
+    """Create a MoodleGroups instance with batching enabled and mocked API calls."""
+    groups = MoodleGroups("https://test.moodle.com", "test_token", batching=True)
+    groups.call_api = Mock()
+    return groups
+
+
+class TestUnflattenParams:
+    """Tests for unflatten_params helper."""
+
+    def test_nested_lists_and_dicts(self):
+        """Test conversion of PHP form keys to nested structures."""
+        params = {
+            'courseid': 5,
+            'groupids[0]': 1,
+            'groupids[1]': 2,
+            'members[0][groupid]': 3,
+            'members[0][userid]': 4,
+        }
+
+        assert unflatten_params(params) == {
+            'courseid': 5,
+            'groupids': [1, 2],
+            'members': [{'groupid': 3, 'userid': 4}],
+        }
+
+    def test_conflicting_keys(self):
+        """Test that a key used as value and container is rejected."""
+        with pytest.raises(ValueError):
+            unflatten_params({'a[0]': 1, 'a[0][b]': 2})
+
+
+class TestMoodleBatch:
+    """Tests for MoodleBatch."""
+
+    def test_calls_sent_in_one_request(self, mock_groups):
+        """Test that queued calls are sent in a single round trip."""
+        mock_groups.call_api.return_value = _batch_response(
+            {'error': False, 'data': json.dumps([{'id': 1}])},
+            {'error': False, 'data': json.dumps([{'id': 9}])},
+        )
+
+        with mock_groups.batch() as batch:
+            groups = batch.call_api('core_group_get_course_groups', {'courseid': 12})
+            groupings = batch.call_api('core_group_get_course_groupings', {'courseid': 12})
+
+        assert groups.result() == [{'id': 1}]
+        assert groupings.result() == [{'id': 9}]
+        mock_groups.call_api.assert_called_once()
+        function_name, params = mock_groups.call_api.call_args[0]
+        assert function_name == 'tool_mobile_call_external_functions'
+        assert params['requests'][1]['function'] == 'core_group_get_course_groupings'
+        assert json.loads(params['requests'][0]['arguments']) == {'courseid': 12}
+
+    def test_per_call_errors(self, mock_groups):
+        """Test that a failing call does not hide the other results."""
+        exception = {'exception': 'moodle_exception', 'errorcode': 'invalidrecord',
+                     'message': 'Group not found'}
+        mock_groups.call_api.return_value = _batch_response(
+            {'error': True, 'exception': json.dumps(exception)},
+            {'error': False, 'data': 'null'},
+        )
+
+        with mock_groups.batch() as batch:
+            failed = batch.call_api('core_group_get_groups', {'groupids[0]': 99})
+            passed = batch.call_api('core_group_delete_groups', {'groupids[0]': 1})
+
+        assert not failed.ok
+        assert isinstance(failed.error, MoodleAPIError)
+        with pytest.raises(MoodleAPIError, match='Group not found'):
+            failed.result()
+        assert passed.ok
+        assert passed.result() is None
+
+    def test_result_before_execute(self, mock_groups):
+        """Test that reading a result before execution fails."""
+        batch = mock_groups.batch()
+        call = batch.call_api('core_group_get_course_groups', {'courseid': 1})
+
+        with pytest.raises(MoodleAPIError):
+            call.result()
+
+    def test_sequential_fallback(self):
+        """Test that calls are sent one by one when batching is unavailable."""
+        groups = MoodleGroups("https://test.moodle.com", "test_token", batching=False)
+        groups.call_api = Mock(side_effect=[[{'id': 1}], MoodleAPIError("boom")])
+
+        with groups.batch() as batch:
+            first = batch.call_api('core_group_get_course_groups', {'courseid': 1})
+            second = batch.call_api('core_group_get_course_groups', {'courseid': 2})
+
+        assert first.result() == [{'id': 1}]
+        assert isinstance(second.error, MoodleAPIError)
+        assert groups.call_api.call_count == 2
+
+    def test_support_detected_from_site_info(self):
+        """Test that batching support is detected once from the site info."""
+        groups = MoodleGroups("https://test.moodle.com", "test_token")
+        groups.call_api = Mock(return_value={
+            'functions': [{'name': 'tool_mobile_call_external_functions'}]
+        })
+
+        assert groups.supports_batching() is True
+        assert groups.supports_batching() is True
+        groups.call_api.assert_called_once_with('core_webservice_get_site_info')
+
+    def test_support_probed_again_after_transient_error(self):
+        """Test that a failed probe is not remembered after a transient error."""
+        groups = MoodleGroups("https://test.moodle.com", "test_token")
+        groups.call_api = Mock(side_effect=[
+            MoodleAPIError("HTTP error calling 'core_webservice_get_site_info': 503"),
+            {'functions': [{'name': 'tool_mobile_call_external_functions'}]},
+        ])
+
+        assert groups.supports_batching() is False
+        assert groups.supports_batching() is True
+        assert groups.call_api.call_count == 2
+
+    def test_support_remembered_after_access_error(self):
+        """Test that a token unable to read the site info is not probed again."""
+        groups = MoodleGroups("https://test.moodle.com", "test_token")
+        groups.call_api = Mock(side_effect=MoodleAuthenticationError("denied", 'accessexception'))
+
+        assert groups.supports_batching() is False
+        assert groups.supports_batching() is False
+        groups.call_api.assert_called_once()
+
+    def test_support_shared_through_transport(self):
+        """Test that modules sharing a transport probe the site once."""
+        transport = MoodleTransport()
+        groups = MoodleGroups("https://test.moodle.com", "test_token", transport=transport)
+        users = MoodleUsers("https://test.moodle.com", "test_token", transport=transport)
+        other = MoodleUsers("https://test.moodle.com", "other_token", transport=transport)
+        for module in (groups, users, other):
+            module.call_api = Mock(return_value={
+                'functions': [{'name': 'tool_mobile_call_external_functions'}]
+            })
+
+        assert groups.supports_batching() is True
+        assert users.supports_batching() is True
+        assert other.supports_batching() is True
+        groups.call_api.assert_called_once()
+        users.call_api.assert_not_called()
+        other.call_api.assert_called_once()
+
+
+class TestBatchedHelpers:
+    """Tests for helpers using batched calls."""
+
+    def test_get_user_groups_single_round_trip(self, mock_groups):
+        """Test that get_user_groups needs one request when batching is available."""
+        mock_groups.call_api.return_value = _batch_response(
+            {'error': False, 'data': json.dumps([
+                {'id': 1, 'name': 'A', 'idnumber': 'a'},
+                {'id': 2, 'name': 'B', 'idnumber': 'b'},
+            ])},
+            {'error': False, 'data': json.dumps({'groups': [{'id': 2, 'name': 'B'}],
+                                                 'warnings': []})},
+        )
+
+        result = mock_groups.get_user_groups(course_id=12, user_id=7)
+
+        assert result == [{'id': 2, 'name': 'B', 'idnumber': 'b'}]
+        mock_groups.call_api.assert_called_once()
+
+    def test_get_user_groups_rejected_batch_falls_back(self, mock_groups):
+        """Test that get_user_groups uses separate calls when the batch is rejected."""
+        def call_api(function_name, params=None):
+            if function_name == 'tool_mobile_call_external_functions':
+                raise MoodleAuthenticationError("Access control exception", 'accessexception')
+            if function_name == 'core_group_get_course_groups':
+                return [{'id': 1, 'name': 'A'}, {'id': 2, 'name': 'B'}]
+            return [{'groupid': 1, 'userids': [3]}, {'groupid': 2, 'userids': [7]}]
+        mock_groups.call_api.side_effect = call_api
+
+        result = mock_groups.get_user_groups(course_id=12, user_id=7)
+
+        assert result == [{'id': 2, 'name': 'B'}]
+        assert [c[0][0] for c in mock_groups.call_api.call_args_list] == [
+            'tool_mobile_call_external_functions', 'core_group_get_course_groups',
+            'core_group_get_group_members',
+        ]
+
+    def test_create_user_rejected_batch_falls_back(self):
+        """Test that create_user checks username and email one by one when the batch is rejected."""
+        users = MoodleUsers("https://test.moodle.com", "test_token", batching=True)
+
+        def call_api(function_name, params=None):
+            if function_name == 'tool_mobile_call_external_functions':
+                raise MoodleAuthenticationError("Access control exception", 'accessexception')
+            if function_name == 'core_user_get_users':
+                key = params['criteria'][0]['key']
+                return {'users': [{'id': 3}] if key == 'email' else [], 'warnings': []}
+            return [{'id': 99}]
+        users.call_api = Mock(side_effect=call_api)
+
+        assert users.create_user("jdoe", "pw", "John", "Doe", "john@example.com") is None
+        assert [c[0][0] for c in users.call_api.call_args_list] == [
+            'tool_mobile_call_external_functions', 'core_user_get_users', 'core_user_get_users',
+        ]
+
+    def test_create_user_prechecks_batched(self):
+        """Test that create_user checks username and email in one request."""
+        users = MoodleUsers("https://test.moodle.com", "test_token", batching=True)
+        users.call_api = Mock(return_value=_batch_response(
+            {'error': False, 'data': json.dumps({'users': [], 'warnings': []})},
+            {'error': False, 'data': json.dumps({'users': [{'id': 3}], 'warnings': []})},
+        ))
+
+        result = users.create_user("jdoe", "pw", "John", "Doe", "john@example.com")
+
+        assert result is None
+        users.call_api.assert_called_once()
@@ -0,0 +1,97 @@
+"""
+Tests for the benchmark suite.
+"""
+import inspect
+import json
+
+import pytest
+from benchmarks.backend import site_options
+from benchmarks.__main__ import main
+from benchmarks.runner import (RECORDED_FIELDS, TIMING_FIELDS, run_benchmarks, run_scenario,
+                               timings_path, write_results, write_timings)
+from benchmarks.scenarios import SCENARIOS, Fixture
+from edutools_moodle import MoodleAPI
+from edutools_moodle.testing import FakeMoodleServer, generate_site
+
+
+SIZE = 20
+
+
+def public_methods():
+    """Names of the public methods defined by the Moodle modules."""
+    moodle = MoodleAPI('http://localhost', 'token')
+    names = set()
+    for module in ('courses', 'groups', 'assignments', 'grades', 'users'):
+        cls = type(getattr(moodle, module))
+        names.update(f"{module}.{name}" for name, _ in inspect.getmembers(cls, inspect.isfunction)
+                     if not name.startswith('_') and name in vars(cls))
+    moodle.close()
+    return names
+
+
+class TestScenarios:
+    """Tests for scenario coverage and execution."""
+
+    def test_every_public_method_has_a_scenario(self):
+        """Test that each public module method is benchmarked."""
+        assert public_methods() - {s.name for s in SCENARIOS} == set()
+
+    def test_scenario_names_are_unique(self):
+        """Test that no method is registered twice."""
+        names = [s.name for s in SCENARIOS]
+        assert len(names) == len(set(names))
+
+    @pytest.mark.parametrize('scenario', SCENARIOS, ids=lambda s: s.name)
+    def test_scenario_runs(self, scenario):
+        """Test that each scenario runs cleanly against a fresh synthetic site."""
+        options = site_options(SIZE)
+        fixture = Fixture(generate_site(**options), SIZE)
+
+        with FakeMoodleServer(generate_site(**options)) as backend:
+            result = run_scenario(scenario, backend, fixture)
+
+        assert result['error'] is None
+        assert result['scenario'] == scenario.name
+        assert result['size'] == SIZE
+        assert result['calls'] == sum(result['calls_by_function'].values())
+        assert result['calls'] > 0
+        assert result['peak_memory'] > 0
+
+
+class TestResultsFile:
+    """Tests for the results file."""
+
+    def test_only_deterministic_fields_written(self, tmp_path):
+        """Test that two runs write the same file, without timings or memory."""
+        paths = [tmp_path / 'first.json', tmp_path / 'second.json']
+        for path in paths:
+            write_results(run_benchmarks(sizes=[SIZE], only=['groups.get_course_groups']), str(path))
+
+        report = json.loads(paths[0].read_text())
+        assert paths[0].read_text() == paths[1].read_text()
+        assert set(report['meta']) == {'sizes', 'latency', 'max_input_vars'}
+        assert all(set(result) == set(RECORDED_FIELDS) for result in report['results'])
+
+    def test_timings_written(self, tmp_path):
+        """Test that wall time and peak memory are written to the timings file."""
+        path = tmp_path / 'results.timings.json'
+        write_timings(run_benchmarks(sizes=[SIZE], only=['groups.get_course_groups']), str(path))
+
+        report = json.loads(path.read_text())
+        assert 'python' in report['meta']
+        assert [r['scenario'] for r in report['results']] == ['groups.get_course_groups']
+        assert all(set(result) == set(TIMING_FIELDS) for result in report['results'])
+        assert all(result['wall_time'] >= 0 and result['peak_memory'] > 0
+                   for result in report['results'])
+
+    def test_command_line_writes_both_files(self, tmp_path, capsys):
+        """Test that the command line writes the results and the timings files."""
+        output = str(tmp_path / 'results.json')
+        main(['--sizes', str(SIZE), '--only', 'groups.get_course_groups', '--output', output])
+
+        assert timings_path(output) == str(tmp_path / 'results.timings.json')
+        results = json.loads((tmp_path / 'results.json').read_text())
+        timings = json.loads((tmp_path / 'results.timings.json').read_text())
+        assert 'wall_time' not in results['results'][0]
+        assert {r['scenario'] for r in timings['results']} == {'groups.get_course_groups'}
+        assert 'peak_memory' in timings['results'][0]
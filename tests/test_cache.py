@@ -0,0 +1,237 @@
+"""
+Unit tests for the response cache.
+"""
+import time
+import pytest
+from unittest.mock import Mock, patch
+from edutools_moodle import MoodleAPI, MoodleGroups, ResponseCache, SQLiteResponseCache
+from edutools_moodle.cache import extract_tags, tags_overlap
+from edutools_moodle.testing import FakeMoodleServer, generate_site
+
+
+@pytest.fixture
+def cached_groups():
+    """Create a MoodleGroups instance with a cache and a mocked transport layer."""
+    groups = MoodleGroups("https://test.moodle.com", "test_token", cache=ResponseCache())
+    groups._request = Mock()
+    return groups
+
+
+class TestScopeTags:
+    """Tests for scope tag helpers."""
+
+    def test_extract_tags_nested(self):
+        """Test that ids are collected from flat and nested parameters."""
+        assert extract_tags({'groups[0][courseid]': 4, 'groups[0][name]': 'A'}) == {('course', '4')}
+        assert extract_tags({'members': [{'groupid': 1, 'userid': 9},
+                                         {'groupid': 2, 'userid': 9}]}) == {('group', '1'), ('group', '2')}
+
+    def test_overlap_rules(self):
+        """Test scoped and conservative invalidation decisions."""
+        assert tags_overlap({('course', '1')}, {('course', '1')})
+        assert not tags_overlap({('course', '1')}, {('course', '2')})
+        assert tags_overlap({('course', '1')}, {('group', '5')})
+
+
+class TestResponseCache:
+    """Tests for ResponseCache."""
+
+    def test_read_served_from_cache(self, cached_groups):
+        """Test that repeated reads hit the network once."""
+        cached_groups._request.return_value = [{'id': 1, 'name': 'A'}, {'id': 2, 'name': 'B'}]
+
+        assert cached_groups.get_group_id_by_name(12, 'A') == 1
+        assert cached_groups.get_group_id_by_name(12, 'B') == 2
+        assert cached_groups.create_or_get_group(12, 'B') == 2
+
+        cached_groups._request.assert_called_once()
+        assert cached_groups.cache.hits == 2
+
+    def test_returned_copies(self, cached_groups):
+        """Test that callers cannot corrupt cached responses."""
+        cached_groups._request.return_value = [{'id': 1, 'name': 'A'}]
+
+        cached_groups.get_course_groups(12)[0]['name'] = 'changed'
+
+        assert cached_groups.get_course_groups(12)[0]['name'] == 'A'
+
+    def test_mutation_invalidates_same_course(self, cached_groups):
+        """Test that creating a group invalidates that course's group list only."""
+        cached_groups._request.side_effect = [
+            [{'id': 1, 'name': 'A'}],            # course 12
+            [{'id': 7, 'name': 'X'}],            # course 13
+            [{'id': 3, 'name': 'New'}],          # create in course 12
+            [{'id': 1, 'name': 'A'}, {'id': 3, 'name': 'New'}],  # course 12 refetched
+        ]
+        cached_groups.get_course_groups(12)
+        cached_groups.get_course_groups(13)
+
+        cached_groups.create_group(12, 'New')
+
+        assert len(cached_groups.get_course_groups(12)) == 2
+        assert cached_groups.get_course_groups(13) == [{'id': 7, 'name': 'X'}]
+        assert cached_groups._request.call_count == 4
+
+    def test_member_change_invalidates_group(self, cached_groups):
+        """Test that adding a member invalidates that group's member list."""
+        cached_groups._request.side_effect = [
+            [{'groupid': 5, 'userids': [1]}],
+            [{'groupid': 6, 'userids': [2]}],
+            None,
+            [{'groupid': 5, 'userids': [1, 9]}],
+        ]
+        cached_groups.get_group_members(5)
+        cached_groups.get_group_members(6)
+
+        cached_groups.add_user_to_group(5, 9)
+
+        assert cached_groups.get_group_members(5) == [1, 9]
+        assert cached_groups.get_group_members(6) == [2]
+
+    def test_ttl_expiry(self):
+        """Test that entries expire after their TTL."""
+        cache = ResponseCache(ttls={'core_group_get_course_groups': 10})
+        cache.set('core_group_get_course_groups', {'courseid': 1}, [1])
+
+        with patch('edutools_moodle.cache.time.time', return_value=time.time() + 60):
+            assert cache.get('core_group_get_course_groups', {'courseid': 1}) == (False, None)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted."""
+        cache = ResponseCache(max_entries=2)
+        for course_id in (1, 2):
+            cache.set('core_group_get_course_groups', {'courseid': course_id}, [course_id])
+        cache.get('core_group_get_course_groups', {'courseid': 1})
+        cache.set('core_group_get_course_groups', {'courseid': 3}, [3])
+
+        assert cache.get('core_group_get_course_groups', {'courseid': 1}) == (True, [1])
+        assert cache.get('core_group_get_course_groups', {'courseid': 2}) == (False, None)
+
+    def test_uncached_functions(self):
+        """Test that functions without a TTL are never stored."""
+        cache = ResponseCache(ttls={'core_group_get_course_groups': 0})
+        cache.set('core_group_get_course_groups', {'courseid': 1}, [1])
+        cache.set('core_group_create_groups', {}, [1])
+
+        assert len(cache) == 0
+
+    def test_cache_shared_across_modules(self):
+        """Test that MoodleAPI shares one cache between modules."""
+        cache = ResponseCache()
+        moodle = MoodleAPI("https://test.moodle.com", "test_token", cache=cache)
+
+        assert moodle.groups.cache is cache
+        assert moodle.assignments.cache is cache
+
+    def test_scoped_by_site_and_token(self):
+        """Test that clients of other sites or tokens never share responses."""
+        cache = ResponseCache()
+        clients = [MoodleGroups(url, token, cache=cache)
+                   for url, token in (("https://a.moodle.com", "t1"), ("https://a.moodle.com", "t2"),
+                                      ("https://b.moodle.com", "t1"))]
+        for index, client in enumerate(clients):
+            client._request = Mock(return_value=[{'id': index, 'name': 'A'}])
+
+        assert [client.get_course_groups(12)[0]['id'] for client in clients] == [0, 1, 2]
+        assert [client.get_course_groups(12)[0]['id'] for client in clients] == [0, 1, 2]
+        assert all(client._request.call_count == 1 for client in clients)
+
+    def test_invalidation_limited_to_site(self):
+        """Test that a mutation drops the site's responses for every token only."""
+        cache = ResponseCache()
+        cache.set('core_group_get_course_groups', {'courseid': 1}, [1], 'https://a|t1')
+        cache.set('core_group_get_course_groups', {'courseid': 1}, [2], 'https://a|t2')
+        cache.set('core_group_get_course_groups', {'courseid': 1}, [3], 'https://b|t1')
+
+        assert cache.invalidate('core_group_create_groups', {'groups': [{'courseid': 1}]},
+                                'https://a') == 2
+        assert cache.get('core_group_get_course_groups', {'courseid': 1}, 'https://b|t1') == (True, [3])
+
+
+class TestSQLiteResponseCache:
+    """Tests for SQLiteResponseCache."""
+
+    def test_shared_between_instances(self, tmp_path):
+        """Test that a second process-like instance starts warm."""
+        path = tmp_path / "moodle.sqlite3"
+        SQLiteResponseCache(path).set('core_group_get_course_groups', {'courseid': 1},
+                                      [{'id': 1, 'name': 'A'}])
+
+        other = SQLiteResponseCache(path)
+
+        assert other.get('core_group_get_course_groups', {'courseid': 1}) == \
+            (True, [{'id': 1, 'name': 'A'}])
+
+    def test_sites_share_one_file(self, tmp_path):
+        """Test that clients of two sites sharing one file each get their own groups."""
+        path = tmp_path / "moodle.sqlite3"
+        with FakeMoodleServer(generate_site(students=10, groups_per_course=2)) as site_a, \
+                FakeMoodleServer(generate_site(students=10, groups_per_course=5)) as site_b:
+            clients = [MoodleAPI(server.url, server.token, cache=SQLiteResponseCache(path))
+                       for server in (site_a, site_b)]
+            course_id = next(iter(site_a.site.courses))
+
+            counts = [len(client.groups.get_course_groups(course_id)) for client in clients]
+            again = [len(client.groups.get_course_groups(course_id)) for client in clients]
+
+            assert counts == again == [2, 5]
+            assert site_a.calls['core_group_get_course_groups'] == 1
+            assert site_b.calls['core_group_get_course_groups'] == 1
+            assert len(clients[0].groups.cache) == 2
+
+    def test_invalidation_persisted(self, tmp_path):
+        """Test that a mutation in one instance is visible to another."""
+        path = tmp_path / "moodle.sqlite3"
+        first = SQLiteResponseCache(path)
+        second = SQLiteResponseCache(path)
+        first.set('core_group_get_group_members', {'groupids': [5]}, [{'groupid': 5}])
+        first.set('core_group_get_group_members', {'groupids': [6]}, [{'groupid': 6}])
+
+        removed = second.invalidate('core_group_add_group_members',
+                                    {'members': [{'groupid': 5, 'userid': 1}]})
+
+        assert removed == 1
+        assert first.get('core_group_get_group_members', {'groupids': [5]})[0] is False
+        assert first.get('core_group_get_group_members', {'groupids': [6]})[0] is True
+
+    def test_values_compressed(self, tmp_path):
+        """Test that stored values are zlib-compressed JSON."""
+        cache = SQLiteResponseCache(tmp_path / "moodle.sqlite3")
+        cache.set('core_cohort_get_cohorts', {}, [{'name': 'x' * 1000}])
+
+        blob, created = cache._connection.execute(
+            "SELECT value, created FROM responses").fetchone()
+
+        assert len(blob) < 200
+        assert created > 0
+
+    def test_lru_eviction(self, tmp_path):
+        """Test that the least recently accessed entries are evicted."""
+        cache = SQLiteResponseCache(tmp_path / "moodle.sqlite3", max_entries=2)
+        with patch('edutools_moodle.cache.time.time', side_effect=[1, 1, 2, 2, 3, 4, 4]):
+            cache.set('core_group_get_course_groups', {'courseid': 1}, [1])
+            cache.set('core_group_get_course_groups', {'courseid': 2}, [2])
+            cache.get('core_group_get_course_groups', {'courseid': 1})
+            cache.set('core_group_get_course_groups', {'courseid': 3}, [3])
+
+        assert len(cache) == 2
+        assert cache.get('core_group_get_course_groups', {'courseid': 2})[0] is False
+
+    def test_concurrent_writers(self, tmp_path):
+        """Test that threads can write to the same database concurrently."""
+        import threading
+        path = tmp_path / "moodle.sqlite3"
+        caches = [SQLiteResponseCache(path) for _ in range(4)]
+
+        def write(cache, offset):
+            for course_id in range(offset, offset + 25):
+                cache.set('core_group_get_course_groups', {'courseid': course_id}, [course_id])
+
+        threads = [threading.Thread(target=write, args=(cache, i * 25))
+                   for i, cache in enumerate(caches)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(caches[0]) == 100
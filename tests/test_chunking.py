@@ -0,0 +1,189 @@
+"""
+Unit tests for max_input_vars payload chunking.
+"""
+import pytest
+from unittest.mock import Mock
+from edutools_moodle import MoodleAPI, MoodleAPIError, MoodleGrades, MoodleGroups
+from edutools_moodle.chunking import merge_responses, split_key, split_params
+from edutools_moodle.params import count_leaves
+from edutools_moodle.testing import FakeMoodleServer, generate_site
+
+
+class TestSplitParams:
+    """Tests for split_params helper."""
+
+    def test_no_split_within_budget(self):
+        """Test that small payloads are left untouched."""
+        assert split_params({'groupids[0]': 1, 'groupids[1]': 2}, max_vars=10) is None
+
+    def test_split_largest_list(self):
+        """Test that the largest list is spread across requests."""
+        params = {'assignmentid': 7, 'applytoall': 1}
+        for i in range(10):
+            params[f'grades[{i}][userid]'] = i
+            params[f'grades[{i}][grade]'] = 50.0
+
+        chunks = split_params(params, max_vars=8)
+
+        assert len(chunks) == 4
+        for chunk in chunks:
+            assert count_leaves(chunk) <= 8
+            assert chunk['assignmentid'] == 7
+        user_ids = [grade['userid'] for chunk in chunks for grade in chunk['grades']]
+        assert user_ids == list(range(10))
+
+    def test_split_nested_params(self):
+        """Test that nested parameters are split the same way."""
+        params = {'groupids': list(range(25))}
+
+        chunks = split_params(params, max_vars=10)
+
+        assert [len(chunk['groupids']) for chunk in chunks] == [10, 10, 5]
+
+    def test_no_list_to_split(self):
+        """Test that payloads without a list cannot be split."""
+        params = {f'key{i}': i for i in range(20)}
+
+        assert split_params(params, max_vars=5) is None
+
+
+class TestMergeResponses:
+    """Tests for merge_responses helper."""
+
+    def test_merge_lists(self):
+        """Test that list responses are concatenated."""
+        assert merge_responses([[1, 2], [3]]) == [1, 2, 3]
+
+    def test_merge_dicts(self):
+        """Test that list values inside dictionaries are concatenated."""
+        merged = merge_responses([
+            {'courses': [{'id': 1}], 'warnings': []},
+            {'courses': [{'id': 2}], 'warnings': [{'item': 'x'}]},
+        ])
+
+        assert merged == {'courses': [{'id': 1}, {'id': 2}], 'warnings': [{'item': 'x'}]}
+
+    def test_merge_records_split_across_requests(self):
+        """Test that a record returned by every request is combined, not repeated."""
+        merged = merge_responses([
+            {'assignments': [{'assignmentid': 3, 'grades': [{'id': 1, 'userid': 7}]}], 'warnings': []},
+            {'assignments': [{'assignmentid': 3, 'grades': [{'id': 2, 'userid': 8}]},
+                             {'assignmentid': 4, 'grades': []}], 'warnings': []},
+        ])
+
+        assert merged == {'assignments': [
+            {'assignmentid': 3, 'grades': [{'id': 1, 'userid': 7}, {'id': 2, 'userid': 8}]},
+            {'assignmentid': 4, 'grades': []},
+        ], 'warnings': []}
+
+    def test_records_of_split_ids_kept(self):
+        """Test that records repeated because their IDs were requested twice stay apart."""
+        responses = [[{'groupid': 5, 'userids': [1]}], [{'groupid': 5, 'userids': [1]}]]
+
+        assert merge_responses(responses, 'groupids') == responses[0] + responses[1]
+        assert split_key(split_params({'courseid': 1, 'groupids': list(range(20))}, 10)) == 'groupids'
+
+    def test_records_with_own_id_not_merged(self):
+        """Test that records sharing a courseid but with their own ID stay apart."""
+        responses = [[{'id': 1, 'courseid': 5, 'groups': [{'id': 10}]}],
+                     [{'id': 2, 'courseid': 5, 'groups': [{'id': 20}]}]]
+
+        assert merge_responses(responses, 'groupingids') == responses[0] + responses[1]
+
+    def test_flat_records_not_merged(self):
+        """Test that records without a list keep their duplicates."""
+        assert merge_responses([[{'id': 1, 'name': 'A'}], [{'id': 1, 'name': 'B'}]]) == \
+            [{'id': 1, 'name': 'A'}, {'id': 1, 'name': 'B'}]
+
+    def test_merge_nulls(self):
+        """Test that functions returning null still return None."""
+        assert merge_responses([None, None]) is None
+
+
+class TestCallApiChunking:
+    """Tests for chunking inside call_api."""
+
+    def test_add_grades_split_under_budget(self):
+        """Test that a large grade batch is sent in several requests."""
+        grades = MoodleGrades("https://test.moodle.com", "test_token", max_input_vars=103)
+        grades._request = Mock(return_value=None)
+        entries = [{'userid': i, 'grade': 10} for i in range(60)]
+
+        grades.add_grades(assignment_id=5, grades=entries)
+
+        assert grades._request.call_count == 4
+        for call in grades._request.call_args_list:
+            assert count_leaves(call[0][1]) <= 100
+
+    def test_read_responses_merged(self):
+        """Test that chunked read responses are merged back."""
+        groups = MoodleGroups("https://test.moodle.com", "test_token",
+                              batching=False, max_input_vars=13)
+        groups._request = Mock(side_effect=[
+            [{'groupid': i, 'userids': [i]} for i in range(10)],
+            [{'groupid': i, 'userids': [i]} for i in range(10, 15)],
+        ])
+        groups.get_course_groups = Mock(return_value=[{'id': i} for i in range(15)])
+
+        result = groups.get_user_groups(course_id=1, user_id=12)
+
+        assert result == [{'id': 12}]
+        assert groups._request.call_count == 2
+
+    def test_split_groupings_kept_apart(self):
+        """Test that groupings of one course from split requests are not combined."""
+        groups = MoodleGroups("https://test.moodle.com", "test_token", max_input_vars=13)
+        groups._request = Mock(side_effect=[
+            [{'id': i, 'courseid': 5, 'groups': [{'id': 100 + i}]} for i in range(1, 10)],
+            [{'id': i, 'courseid': 5, 'groups': [{'id': 100 + i}]} for i in range(10, 13)],
+        ])
+
+        result = groups.call_api('core_group_get_groupings',
+                                 {'groupingids': list(range(1, 13)), 'returngroups': 1})
+
+        assert groups._request.call_count == 2
+        assert [grouping['id'] for grouping in result] == list(range(1, 13))
+        assert all(grouping['groups'] == [{'id': 100 + grouping['id']}] for grouping in result)
+
+    def test_chunking_disabled(self):
+        """Test that max_input_vars=None sends a single request."""
+        grades = MoodleGrades("https://test.moodle.com", "test_token", max_input_vars=None)
+        grades._request = Mock(return_value=None)
+
+        grades.add_grades(assignment_id=5, grades=[{'userid': i, 'grade': 1} for i in range(500)])
+
+        grades._request.assert_called_once()
+
+    def test_unsplittable_call_rejected(self):
+        """Test that a call over the budget that cannot be split is not sent truncated."""
+        groups = MoodleGroups("https://test.moodle.com", "test_token", max_input_vars=13)
+        groups._request = Mock(return_value=None)
+
+        with pytest.raises(MoodleAPIError, match='max_input_vars=13'):
+            groups.call_api('core_group_create_groups', {'groups': [
+                {'courseid': 1, 'name': f"G{i}", 'description': 'x'} for i in range(4)
+            ] + [{'courseid': 1, 'name': 'Big', 'customfields': [{'shortname': f"f{i}", 'value': i}
+                                                                 for i in range(10)]}]})
+        with pytest.raises(MoodleAPIError):
+            groups.call_api('core_user_update_users', {f"users[0][field{i}]": i for i in range(20)})
+
+        groups._request.assert_not_called()
+
+    def test_invalid_budget(self):
+        """Test that a budget too small for the fixed variables is rejected."""
+        with pytest.raises(ValueError):
+            MoodleGrades("https://test.moodle.com", "test_token", max_input_vars=3)
+
+    def test_assignment_grades_above_limit(self):
+        """Test that grades of 1500 users come back complete from split requests."""
+        site = generate_site(students=1500, groups_per_course=1, assignments_per_course=1, graded=1.0)
+        assignment_id = next(iter(site.assignments))
+        user_ids = list(site.grades[assignment_id])
+
+        with FakeMoodleServer(site) as server, MoodleAPI(server.url, server.token) as moodle:
+            grades = moodle.grades.get_grades_for_assignment(assignment_id, user_ids)
+
+            assert server.calls['mod_assign_get_grades'] == 2
+            assert server.truncated == 0
+
+        assert sorted(grade['userid'] for grade in grades) == sorted(user_ids)
@@ -0,0 +1,163 @@
+"""
+Unit tests for request coalescing.
+"""
+import threading
+import time
+import pytest
+from unittest.mock import Mock
+from edutools_moodle import MoodleAPI, MoodleGroups, MoodleAPIError, SingleFlight
+from edutools_moodle.functions import is_read_function
+
+
+def run_threads(target, count=8):
+    """Start count threads on target and wait for all of them."""
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+@pytest.fixture
+def slow_groups():
+    """Create a MoodleGroups instance whose requests take a little while."""
+    groups = MoodleGroups("https://test.moodle.com", "test_token")
+    calls = []
+
+    def request(function_name, params=None):
+        calls.append(function_name)
+        time.sleep(0.1)
+        return [{'id': 1, 'name': 'A'}]
+
+    groups._request = Mock(side_effect=request)
+    return groups
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight."""
+
+    def test_concurrent_calls_share_one_execution(self):
+        """Test that concurrent callers of one key run the function once."""
+        flights = SingleFlight()
+        barrier = threading.Event()
+        results = []
+
+        def fetch():
+            barrier.wait(1)
+            return {'ids': [1, 2]}
+
+        def caller():
+            results.append(flights.do('key', fetch))
+
+        threads = [threading.Thread(target=caller) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        barrier.set()
+        for thread in threads:
+            thread.join()
+
+        assert flights.executed == 1
+        assert flights.coalesced == 4
+        assert [shared for _, shared in results].count(False) == 1
+        values = [value for value, _ in results]
+        assert all(value == {'ids': [1, 2]} for value in values)
+        assert len({id(value) for value in values}) == 5
+        assert len(flights) == 0
+
+    def test_error_propagated_to_waiters(self):
+        """Test that every caller sees the leader's exception."""
+        flights = SingleFlight()
+        errors = []
+
+        def fetch():
+            time.sleep(0.05)
+            raise MoodleAPIError("boom")
+
+        def caller():
+            try:
+                flights.do('key', fetch)
+            except MoodleAPIError as e:
+                errors.append(e)
+
+        run_threads(caller, 4)
+
+        assert len(errors) == 4
+        assert flights.executed + flights.coalesced == 4
+
+    def test_sequential_calls_not_remembered(self):
+        """Test that a completed call is executed again."""
+        flights = SingleFlight()
+        fetch = Mock(return_value=1)
+
+        flights.do('key', fetch)
+        flights.do('key', fetch)
+
+        assert fetch.call_count == 2
+
+
+class TestCallCoalescing:
+    """Tests for coalescing in call_api."""
+
+    def test_read_function_classification(self):
+        """Test read/write detection from function names."""
+        assert is_read_function('core_group_get_course_groups')
+        assert is_read_function('core_course_search_courses')
+        assert not is_read_function('core_group_add_group_members')
+        assert not is_read_function('core_user_create_users')
+
+    def test_concurrent_reads_coalesced(self, slow_groups):
+        """Test that identical concurrent reads send one request."""
+        results = []
+        run_threads(lambda: results.append(slow_groups.get_course_groups(12)))
+
+        assert slow_groups._request.call_count == 1
+        assert results == [[{'id': 1, 'name': 'A'}]] * 8
+
+    def test_different_params_not_coalesced(self, slow_groups):
+        """Test that reads with different parameters are sent separately."""
+        course_ids = iter(range(4))
+        lock = threading.Lock()
+
+        def caller():
+            with lock:
+                course_id = next(course_ids)
+            slow_groups.get_course_groups(course_id)
+
+        run_threads(caller, 4)
+
+        assert slow_groups._request.call_count == 4
+
+    def test_writes_not_coalesced(self, slow_groups):
+        """Test that concurrent mutations are all sent."""
+        run_threads(lambda: slow_groups.call_api(
+            'core_group_add_group_members', {'members': [{'groupid': 3, 'userid': 7}]}), 4)
+
+        assert slow_groups._request.call_count == 4
+
+    def test_coalescing_disabled(self):
+        """Test that coalesce_reads=False sends every read."""
+        groups = MoodleGroups("https://test.moodle.com", "test_token", coalesce_reads=False)
+        groups._request = Mock(side_effect=lambda *args: time.sleep(0.05) or [])
+
+        run_threads(lambda: groups.get_course_groups(12), 4)
+
+        assert groups._request.call_count == 4
+
+    def test_shared_across_modules(self):
+        """Test that modules of one MoodleAPI share in-flight reads."""
+        moodle = MoodleAPI("https://test.moodle.com", "test_token")
+        request = Mock(side_effect=lambda *args: time.sleep(0.1) or {'courses': []})
+        moodle.courses._request = request
+        moodle.groups._request = request
+        modules = iter([moodle.courses, moodle.groups] * 2)
+        lock = threading.Lock()
+
+        def caller():
+            with lock:
+                module = next(modules)
+            module.call_api('core_course_get_courses_by_field', {'field': 'id', 'value': 5})
+
+        run_threads(caller, 4)
+
+        assert request.call_count == 1
@@ -81,8 +81,8 @@ class TestGetEnrolledUsers:
         assert len(result) == 1
         call_args = mock_courses.call_api.call_args[0][1]
         assert call_args['courseid'] == 123
-        assert call_args['options[0][name]'] == 'onlyactive'
-        assert call_args['options[1][name]'] == 'userfields'
+        assert call_args['options'][0]['name'] == 'onlyactive'
+        assert call_args['options'][1]['name'] == 'userfields'
 
 
 class TestGetCourseByField:
@@ -145,7 +145,7 @@ class TestGetCategories:
         
         assert len(result) == 1
         call_args = mock_courses.call_api.call_args[0][1]
-        assert call_args['criteria[0][key]'] == 'id'
+        assert call_args['criteria'][0]['key'] == 'id'
 
 
 class TestGetCourseContents:
@@ -253,8 +253,8 @@ class TestGetEnrolledUsersByCapability:
         assert len(result) == 2
         call_args = mock_courses.call_api.call_args[0][1]
         assert call_args['courseid'] == 123
-        assert call_args['options[0][name]'] == 'withcapability'
-        assert call_args['options[0][value]'] == 'mod/assignment:submit'
+        assert call_args['options'][0]['name'] == 'withcapability'
+        assert call_args['options'][0]['value'] == 'mod/assignment:submit'
 
 
 class TestGetCourseModules:
@@ -0,0 +1,154 @@
+"""
+Tests for the fake Moodle web-service server.
+"""
+import pytest
+from edutools_moodle import MoodleAPI, MoodleAPIError, MoodleAuthenticationError, RetryPolicy
+from edutools_moodle.testing import FakeMoodleServer, FakeMoodleSite, generate_site
+
+
+@pytest.fixture
+def server():
+    """Serve a small synthetic site."""
+    site = generate_site(students=60, groups_per_course=6, groupings_per_course=2,
+                         assignments_per_course=2, cohorts=2)
+    with FakeMoodleServer(site, max_input_vars=100) as server:
+        yield server
+
+
+@pytest.fixture
+def moodle(server):
+    """MoodleAPI client pointed at the fake server."""
+    with MoodleAPI(server.url, server.token, max_input_vars=100,
+                   retry=RetryPolicy(base_delay=0)) as moodle:
+        yield moodle
+
+
+@pytest.fixture
+def course_id(server):
+    return next(iter(server.site.courses))
+
+
+class TestGenerateSite:
+    """Tests for the synthetic data generator."""
+
+    def test_shape(self):
+        """Test that generated data matches the requested sizes."""
+        site = generate_site(students=100, courses=2, groups_per_course=5, cohorts=3, graded=1.0)
+
+        assert len(site.users) == 101
+        assert len(site.courses) == 2
+        assert len(site.groups) == 10
+        assert all(len(members) == 20 for members in site.group_members.values())
+        assert sum(len(members) for members in site.cohort_members.values()) == 100
+        assert all(len(grades) == 100 for grades in site.grades.values())
+
+    def test_deterministic(self):
+        """Test that a seed always yields the same grades."""
+        first = generate_site(students=20, seed=3)
+        second = generate_site(students=20, seed=3)
+        assert [g['grade'] for a in first.grades.values() for g in a.values()] == \
+            [g['grade'] for a in second.grades.values() for g in a.values()]
+
+
+class TestFakeMoodleServer:
+    """Tests for the server through the real client."""
+
+    def test_group_workflow(self, moodle, server, course_id):
+        """Test creating a group, adding members and reading them back."""
+        group_id = moodle.groups.create_or_get_group(course_id, 'New group')
+        students = sorted(server.site.enrolments[course_id])[:3]
+        for user_id in students:
+            moodle.groups.add_user_to_group(group_id, user_id)
+
+        assert sorted(moodle.groups.get_group_members(group_id)) == students
+        assert moodle.groups.create_or_get_group(course_id, 'New group') == group_id
+        assert server.calls['core_group_create_groups'] == 1
+
+    def test_enrolled_users_only(self, moodle, server):
+        """Test that Moodle's enrolment rule for group members is enforced."""
+        group_id = next(iter(server.site.groups))
+        outsider = server.site.add_user('outsider')
+
+        with pytest.raises(MoodleAPIError, match='enrolled') as error:
+            moodle.groups.add_user_to_group(group_id, outsider)
+        assert error.value.errorcode == 'invalidparameter'
+
+    def test_remove_unknown_user(self, moodle, server):
+        """Test that removing an unknown user rejects the call, as Moodle does."""
+        group_id = next(iter(server.site.groups))
+        member = next(iter(server.site.group_members[group_id]))
+
+        with pytest.raises(MoodleAPIError) as error:
+            moodle.groups.call_api('core_group_delete_group_members', {'members': [
+                {'groupid': group_id, 'userid': member},
+                {'groupid': group_id, 'userid': 999999},
+            ]})
+        assert error.value.errorcode == 'invalidrecord'
+        assert member in server.site.group_members[group_id]
+
+    def test_delete_groups_skips_unknown_ids(self, moodle, server, course_id):
+        """Test that deleting groups ignores unknown IDs, as Moodle does."""
+        group_id = next(iter(server.site.groups))
+
+        assert moodle.groups.call_api('core_group_delete_groups', {'groupids': [group_id, 999999]}) is None
+        assert group_id not in server.site.groups
+
+    def test_reads(self, moodle, server, course_id):
+        """Test response shapes of the read functions used by the modules."""
+        assert len(moodle.courses.get_enrolled_users(course_id)) == 61
+        assert len(moodle.assignments.get_assignments(course_id)) == 2
+        assert len(moodle.grades.get_grades(course_id)) == 61
+        assert moodle.groups.is_user_in_cohort(next(iter(server.site.cohort_members[
+            next(iter(server.site.cohorts))])), 'Cohort 1')
+        assert moodle.get_site_info()['sitename'] == 'Fake Moodle'
+
+    def test_batching_supported(self, moodle, server, course_id):
+        """Test that batched calls are answered through tool_mobile_call_external_functions."""
+        user_id = sorted(server.site.enrolments[course_id])[1]
+
+        groups = moodle.groups.get_user_groups(course_id, user_id)
+
+        assert len(groups) == 1
+        assert server.calls['tool_mobile_call_external_functions'] == 1
+
+    def test_max_input_vars_truncation(self, server, course_id):
+        """Test that oversized requests are truncated like PHP does, and chunking avoids it."""
+        group_ids = list(server.site.groups) * 20
+        unchunked = MoodleAPI(server.url, server.token, max_input_vars=None)
+        unchunked.groups.call_api('core_group_get_group_members', {'groupids': group_ids})
+        assert server.truncated == 1
+
+        chunked = MoodleAPI(server.url, server.token, max_input_vars=100)
+        result = chunked.groups.call_api('core_group_get_group_members', {'groupids': group_ids})
+        assert len(result) == len(group_ids)
+        assert server.truncated == 1
+
+    def test_injected_errors(self, moodle, server, course_id):
+        """Test Moodle exceptions and HTTP errors injected into calls."""
+        server.inject_error('core_group_get_course_groups', errorcode='nopermissions',
+                            message='Sorry, no permission')
+        with pytest.raises(MoodleAPIError, match='no permission') as error:
+            moodle.groups.get_course_groups(course_id)
+        assert error.value.errorcode == 'nopermissions'
+
+        server.inject_error('core_group_get_course_groupings', status=503, times=1)
+        assert len(moodle.groups.get_course_groupings(course_id)) == 2
+        assert moodle.retry.stats['recovered'] == 1
+
+    def test_latency_and_token(self, server, course_id):
+        """Test per-function latency and token checks."""
+        server.set_latency('core_group_get_course_groups', 0.05)
+        moodle = MoodleAPI(server.url, server.token)
+        metrics_before = server.calls['core_group_get_course_groups']
+        moodle.groups.get_course_groups(course_id)
+        assert server.calls['core_group_get_course_groups'] == metrics_before + 1
+
+        with pytest.raises(MoodleAuthenticationError):
+            MoodleAPI(server.url, 'wrong').groups.get_course_groups(course_id)
+
+    def test_unknown_function(self):
+        """Test that unimplemented functions fail like missing Moodle functions."""
+        site = FakeMoodleSite()
+        with FakeMoodleServer(site) as server:
+            with pytest.raises(MoodleAPIError, match='external_functions'):
+                MoodleAPI(server.url, server.token).groups.call_api('local_custom_do_thing')
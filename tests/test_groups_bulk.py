@@ -0,0 +1,807 @@
+"""
+Tests for the bulk group operations, run against the fake Moodle server.
+"""
+import math
+import pytest
+from edutools_moodle import (MetricsAggregator, MoodleAPI, MoodleResourceNotFoundError,
+                             ResponseCache, RetryPolicy)
+from edutools_moodle.testing import FakeMoodleServer, generate_site
+
+
+@pytest.fixture
+def server():
+    """Serve a site with 60 students in 6 groups of one course."""
+    site = generate_site(students=60, groups_per_course=6, groupings_per_course=2,
+                         assignments_per_course=1, cohorts=2)
+    with FakeMoodleServer(site, max_input_vars=100) as server:
+        yield server
+
+
+@pytest.fixture
+def metrics():
+    return MetricsAggregator()
+
+
+@pytest.fixture
+def moodle(server, metrics):
+    """MoodleAPI client counting its calls per function."""
+    with MoodleAPI(server.url, server.token, max_input_vars=100, hooks=[metrics],
+                   retry=RetryPolicy(max_attempts=1)) as moodle:
+        yield moodle
+
+
+@pytest.fixture
+def site(server):
+    return server.site
+
+
+@pytest.fixture
+def course_id(site):
+    return next(iter(site.courses))
+
+
+@pytest.fixture
+def students(site, course_id):
+    return [user_id for user_id, role in site.enrolments[course_id].items() if role == 5]
+
+
+def calls(metrics):
+    """Number of requests per web-service function."""
+    return {name: m['calls'] for name, m in metrics.snapshot().items()}
+
+
+class TestBatchEnrollUsersToGroups:
+    """Tests for the bulk batch_enroll_users_to_groups pipeline."""
+
+    def test_call_count_is_constant(self, moodle, metrics, site, course_id, students):
+        """Test that 60 rows over new and existing groups take a handful of calls."""
+        enrollments = [{'user_id': user_id, 'group_name': f"Lab {index % 4}"}
+                       for index, user_id in enumerate(students)]
+        enrollments += [{'user_id': students[0], 'group_name': 'Group 2'}]
+
+        result = moodle.groups.batch_enroll_users_to_groups(course_id, enrollments)
+
+        assert result['success'] == 61
+        assert result['errors'] == []
+        assert result['created_groups'] == ['Lab 0', 'Lab 1', 'Lab 2', 'Lab 3']
+        # 48 members per request with max_input_vars=100
+        assert calls(metrics) == {
+            'core_group_get_course_groups': 1,
+            'core_group_create_groups': 1,
+            'core_group_add_group_members': 2,
+        }
+        names = {g['name']: g['id'] for g in site.groups.values()}
+        assert site.group_members[names['Lab 1']] == set(students[1::4])
+        assert students[0] in site.group_members[names['Group 2']]
+
+    def test_rejected_rows_are_isolated(self, moodle, site, course_id, students):
+        """Test that rows Moodle rejects are reported while the others are added."""
+        outsider = site.add_user('outsider', 'Out', 'Sider')
+        enrollments = [{'user_id': user_id, 'group_name': 'Lab'} for user_id in students[:10]]
+        enrollments.insert(4, {'user_id': outsider, 'group_name': 'Lab'})
+        enrollments.append({'user_id': students[10]})
+
+        result = moodle.groups.batch_enroll_users_to_groups(course_id, enrollments)
+
+        assert result['success'] == 10
+        assert [(e['user_id'], e['group_name']) for e in result['errors']] == [
+            (students[10], None), (outsider, 'Lab')
+        ]
+        assert 'enrolled' in result['errors'][1]['error']
+        lab = next(g['id'] for g in site.groups.values() if g['name'] == 'Lab')
+        assert site.group_members[lab] == set(students[:10])
+
+    def test_group_creation_failure(self, moodle, server, course_id, students):
+        """Test that rows of a group that cannot be created fail with its error."""
+        server.inject_error('core_group_create_groups', errorcode='invalidrecord',
+                            message='Cannot create group', times=2)
+
+        result = moodle.groups.batch_enroll_users_to_groups(course_id, [
+            {'user_id': students[0], 'group_name': 'New A'},
+            {'user_id': students[1], 'group_name': 'Group 1'},
+            {'user_id': students[2], 'group_name': 'New B'},
+        ])
+
+        assert result['success'] == 2
+        assert result['created_groups'] == ['New B']
+        assert result['errors'] == [{'user_id': students[0], 'group_name': 'New A',
+                                     'error': result['errors'][0]['error']}]
+        assert 'Cannot create group' in result['errors'][0]['error']
+
+    def test_untrimmed_group_name(self, moodle, site, course_id, students):
+        """Test that a group name Moodle trims on creation still maps to its ID."""
+        result = moodle.groups.batch_enroll_users_to_groups(course_id, [
+            {'user_id': students[0], 'group_name': 'Lab A '},
+        ])
+
+        assert result == {'success': 1, 'errors': [], 'created_groups': ['Lab A ']}
+        lab = next(g['id'] for g in site.groups.values() if g['name'] == 'Lab A')
+        assert site.group_members[lab] == {students[0]}
+
+    def test_empty(self, moodle, metrics, course_id):
+        """Test that no rows make no calls."""
+        assert moodle.groups.batch_enroll_users_to_groups(course_id, []) == {
+            'success': 0, 'errors': [], 'created_groups': []
+        }
+        assert calls(metrics) == {}
+
+
+class TestBulkMembers:
+    """Tests for add_members() and remove_members()."""
+
+    def test_add_members_across_groups(self, moodle, metrics, site, course_id, students):
+        """Test that 120 pairs over two groups are sent in chunks of 48."""
+        group_a, group_b = sorted(g for g in site.groups if site.groups[g]['courseid'] == course_id)[:2]
+        pairs = [(group_a, user_id) for user_id in students] + [(group_b, user_id) for user_id in students]
+
+        result = moodle.groups.add_members(pairs + pairs[:5])
+
+        assert result == {'success': 120, 'errors': []}
+        assert calls(metrics) == {'core_group_add_group_members': 3}
+        assert site.group_members[group_a] >= set(students)
+        assert site.group_members[group_b] >= set(students)
+
+    def test_add_members_reports_failed_pairs(self, moodle, site, course_id, students):
+        """Test that rejected pairs are reported and the others added."""
+        group_id = next(g for g in site.groups if site.groups[g]['courseid'] == course_id)
+        outsider = site.add_user('outsider', 'Out', 'Sider')
+        pairs = [(group_id, user_id) for user_id in students[:20]]
+        pairs[7] = (group_id, outsider)
+        pairs.append((999999, students[0]))
+
+        result = moodle.groups.add_members(pairs)
+
+        assert result['success'] == 19
+        assert [(e['group_id'], e['user_id']) for e in result['errors']] == [
+            (group_id, outsider), (999999, students[0])
+        ]
+        assert 'Only enrolled users' in result['errors'][0]['error']
+        assert outsider not in site.group_members[group_id]
+        assert site.group_members[group_id] >= set(students[:20]) - {students[7]}
+
+    def test_remove_members_concurrently(self, moodle, metrics, site, course_id):
+        """Test that chunks are sent concurrently and members removed."""
+        groups = [g for g in site.groups if site.groups[g]['courseid'] == course_id]
+        pairs = [(group_id, user_id) for group_id in groups for user_id in site.group_members[group_id]]
+
+        result = moodle.groups.remove_members(pairs * 2, concurrency=4)
+
+        assert result == {'success': 60, 'errors': []}
+        assert calls(metrics) == {'core_group_delete_group_members': 2}
+        assert all(not site.group_members[group_id] for group_id in groups)
+
+    def test_remove_members_reports_unknown_users(self, moodle, metrics, site, course_id):
+        """Test that an unknown user rejecting its chunk is isolated from the members removed."""
+        group_id = next(g for g in site.groups if site.groups[g]['courseid'] == course_id)
+        members = sorted(site.group_members[group_id])
+        pairs = [(group_id, user_id) for user_id in members]
+        pairs.insert(3, (group_id, 999999))
+
+        result = moodle.groups.remove_members(pairs)
+
+        assert result['success'] == len(members)
+        assert [(e['group_id'], e['user_id']) for e in result['errors']] == [(group_id, 999999)]
+        assert not site.group_members[group_id]
+        assert calls(metrics)['core_group_delete_group_members'] > 1
+
+    def test_transport_error_fails_whole_chunk(self, moodle, server, site, course_id, students):
+        """Test that an HTTP error fails the pairs of its chunk only."""
+        group_id = next(g for g in site.groups if site.groups[g]['courseid'] == course_id)
+        server.inject_error('core_group_add_group_members', status=500)
+
+        result = moodle.groups.add_members([(group_id, user_id) for user_id in students])
+
+        assert result['success'] == 12
+        assert len(result['errors']) == 48
+
+    def test_request_wide_error_is_not_bisected(self, moodle, metrics, server, site, course_id):
+        """Test that a blanket nopermissions error costs one request per chunk."""
+        groups = [g for g in site.groups if site.groups[g]['courseid'] == course_id]
+        pairs = [(group_id, user_id) for group_id in groups for user_id in site.users]
+        server.inject_error('core_group_add_group_members', errorcode='nopermissions', times=None)
+
+        result = moodle.groups.add_members(pairs)
+
+        assert result['success'] == 0
+        assert len(result['errors']) == len(pairs)
+        assert calls(metrics) == {'core_group_add_group_members': math.ceil(len(pairs) / 48)}
+
+    def test_invalid_concurrency(self, moodle):
+        """Test that concurrency must be positive."""
+        with pytest.raises(ValueError):
+            moodle.groups.add_members([(1, 2)], concurrency=0)
+
+
+class TestGroupMembershipIndex:
+    """Tests for GroupMembershipIndex."""
+
+    def test_built_from_two_calls(self, moodle, metrics, site, course_id, students):
+        """Test that the index answers every lookup after one listing and one members call."""
+        index = moodle.groups.membership_index(course_id)
+
+        for user_id in students:
+            group_id = next(g for g in index.groups if user_id in site.group_members[g])
+            assert index.user_group_ids(user_id) == {group_id}
+            assert index.is_member(group_id, user_id)
+            assert index.user_group_names(user_id) == [site.groups[group_id]['name']]
+            assert user_id in index
+
+        assert calls(metrics) == {
+            'core_group_get_course_groups': 1,
+            'core_group_get_group_members': 1,
+        }
+        assert len(index) == 6
+        assert index.group_id('Group 3') in index.groups
+        assert index.members(999999) == frozenset()
+        assert index.user_groups(999999) == []
+
+    def test_user_groups_order(self, moodle, site, course_id, students):
+        """Test that a user's groups are returned in listing order."""
+        group_ids = sorted(g for g in site.groups if site.groups[g]['courseid'] == course_id)
+        for group_id in group_ids:
+            site.add_group_member(group_id, students[0])
+
+        index = moodle.groups.membership_index(course_id)
+
+        assert [g['id'] for g in index.user_groups(students[0])] == group_ids
+
+    def test_refresh(self, server, site, course_id, students):
+        """Test that refresh() reloads memberships, bypassing the response cache."""
+        moodle = MoodleAPI(server.url, server.token, cache=ResponseCache())
+        index = moodle.groups.membership_index(course_id)
+        group_id = next(iter(index.user_group_ids(students[0])))
+
+        site.group_members[group_id].discard(students[0])
+        assert index.is_member(group_id, students[0])
+        assert index.refresh() is index
+        assert not index.is_member(group_id, students[0])
+        assert students[0] not in index
+        assert index.age >= 0
+
+
+class TestGroupingGroupsWithMembers:
+    """Tests for get_grouping_groups_with_members()."""
+
+    def test_counts_from_one_members_call(self, moodle, metrics, site, course_id):
+        """Test that member counts come from one members request."""
+        grouping_id = next(g for g in site.groupings if site.groupings[g]['courseid'] == course_id)
+
+        groups = moodle.groups.get_grouping_groups_with_members(grouping_id, include_members=True)
+
+        assert len(groups) == 3
+        for group in groups:
+            assert set(group['members']) == site.group_members[group['id']]
+            assert group['member_count'] == 10
+        assert calls(metrics) == {
+            'core_group_get_groupings': 1,
+            'core_group_get_group_members': 1,
+        }
+
+    def test_large_grouping_is_chunked(self, moodle, metrics, site, course_id, students):
+        """Test that 120 groups take two members requests with max_input_vars=100."""
+        grouping_id = site.add_grouping(course_id, 'Labs')
+        for index in range(120):
+            group_id = site.add_group(course_id, f"Lab {index}")
+            site.assign_grouping(grouping_id, group_id)
+            site.add_group_member(group_id, students[index % len(students)])
+
+        groups = moodle.groups.get_grouping_groups_with_members(grouping_id)
+
+        assert [group['member_count'] for group in groups] == [1] * 120
+        assert 'members' not in groups[0]
+        assert calls(metrics)['core_group_get_group_members'] == 2
+
+    def test_empty_grouping(self, moodle, metrics, site, course_id):
+        """Test that an empty grouping makes no members request."""
+        grouping_id = site.add_grouping(course_id, 'Empty')
+
+        assert moodle.groups.get_grouping_groups_with_members(grouping_id) == []
+        assert calls(metrics) == {'core_group_get_groupings': 1}
+
+
+class TestSyncGroups:
+    """Tests for sync_groups()."""
+
+    @pytest.fixture
+    def desired(self, site, course_id):
+        """Current state of Group 1 and Group 2, as the SIS would send it."""
+        return {site.groups[g]['name']: set(site.group_members[g])
+                for g in site.groups if site.groups[g]['name'] in ('Group 1', 'Group 2')}
+
+    def test_dry_run(self, moodle, metrics, site, course_id, students, desired):
+        """Test that a dry run reports the minimal plan without writing."""
+        mover = next(iter(desired['Group 1']))
+        desired['Group 1'].discard(mover)
+        desired['Group 2'].add(mover)
+        desired['Lab'] = {students[0], students[1]}
+
+        plan = moodle.groups.sync_groups(course_id, desired, delete_unlisted_groups=True,
+                                         dry_run=True)
+
+        assert plan['dry_run'] is True
+        assert plan['create_groups'] == ['Lab']
+        assert plan['remove'] == [('Group 1', mover)]
+        assert plan['add'] == [('Group 2', mover), ('Lab', students[0]), ('Lab', students[1])]
+        assert plan['delete_groups'] == ['Group 3', 'Group 4', 'Group 5', 'Group 6']
+        # create, remove, add and delete each fit in one request
+        assert plan['estimated_calls'] == 4
+        assert set(calls(metrics)) == {'core_group_get_course_groups', 'core_group_get_group_members'}
+        assert len(site.groups) == 6
+
+    def test_apply(self, moodle, metrics, site, course_id, students, desired):
+        """Test that applying the plan reaches the desired state in the estimated calls."""
+        mover = next(iter(desired['Group 1']))
+        desired['Group 1'].discard(mover)
+        desired['Group 2'].add(mover)
+        desired['Lab'] = {students[0], students[1]}
+
+        plan = moodle.groups.sync_groups(course_id, desired, delete_unlisted_groups=True)
+        writes = {name: count for name, count in calls(metrics).items() if '_get_' not in name}
+
+        assert plan['errors'] == []
+        assert sum(writes.values()) == plan['estimated_calls']
+        state = {group['name']: site.group_members[group_id] for group_id, group in site.groups.items()
+                 if group['courseid'] == course_id}
+        assert state == desired
+
+        again = moodle.groups.sync_groups(course_id, desired, delete_unlisted_groups=True)
+        assert again['add'] == again['remove'] == again['create_groups'] == again['delete_groups'] == []
+        assert again['estimated_calls'] == 0
+
+    def test_untrimmed_group_name(self, moodle, site, course_id, students):
+        """Test that a new group whose name Moodle trims gets its members."""
+        plan = moodle.groups.sync_groups(course_id, {'Lab A ': [students[0]]})
+
+        assert plan['errors'] == []
+        lab = next(g['id'] for g in site.groups.values() if g['name'] == 'Lab A')
+        assert site.group_members[lab] == {students[0]}
+
+    def test_reads_fresh_state(self, server, site, course_id, students, desired):
+        """Test that the diff ignores memberships cached before the sync."""
+        moodle = MoodleAPI(server.url, server.token, cache=ResponseCache())
+        moodle.groups.membership_index(course_id)
+        group_1 = next(g for g in site.groups if site.groups[g]['name'] == 'Group 1')
+        extra = next(user_id for user_id in students if user_id not in desired['Group 1'])
+        site.group_members[group_1].add(extra)
+
+        plan = moodle.groups.sync_groups(course_id, desired)
+
+        assert plan['remove'] == [('Group 1', extra)]
+        assert extra not in site.group_members[group_1]
+
+    def test_partial_failures(self, moodle, server, site, course_id, students):
+        """Test that failed groups and memberships are reported per operation."""
+        outsider = site.add_user('outsider', 'Out', 'Sider')
+        server.inject_error('core_group_create_groups', errorcode='invalidrecord',
+                            message='Cannot create group', times=2)
+
+        plan = moodle.groups.sync_groups(course_id, {
+            'New A': [students[0]],
+            'New B': [students[1], outsider],
+        })
+
+        assert sorted((e['action'], e['group_name'], e['user_id']) for e in plan['errors']) == [
+            ('add', 'New A', students[0]),
+            ('add', 'New B', outsider),
+            ('create', 'New A', None),
+        ]
+        new_b = next(g for g in site.groups if site.groups[g]['name'] == 'New B')
+        assert site.group_members[new_b] == {students[1]}
+
+
+class TestMoveUsers:
+    """Tests for move_users()."""
+
+    def test_rebalance_in_batched_calls(self, moodle, metrics, site, course_id, students):
+        """Test that 60 moves take one add and one delete round of chunks."""
+        groups = sorted(g for g in site.groups if site.groups[g]['courseid'] == course_id)
+        current = {user_id: g for g in groups for user_id in site.group_members[g]}
+        moves = [(user_id, current[user_id], groups[(groups.index(current[user_id]) + 1) % 6])
+                 for user_id in students]
+
+        result = moodle.groups.move_users(course_id, moves)
+
+        assert result == {'success': 60, 'errors': []}
+        assert calls(metrics) == {
+            'core_group_get_course_groups': 1,
+            'core_group_add_group_members': 2,
+            'core_group_delete_group_members': 2,
+        }
+        for user_id, old, new in moves:
+            assert user_id in site.group_members[new]
+            assert user_id not in site.group_members[old]
+
+    def test_failed_addition_keeps_old_group(self, moodle, site, course_id, students):
+        """Test that a user whose addition fails is not removed from the old group."""
+        groups = sorted(g for g in site.groups if site.groups[g]['courseid'] == course_id)
+        member = next(iter(site.group_members[groups[0]]))
+        outsider = site.add_user('outsider', 'Out', 'Sider')
+
+        result = moodle.groups.move_users(course_id, [
+            (member, groups[0], 999999),
+            (students[0], None, groups[1]),
+            (outsider, None, groups[1]),
+            (students[1], groups[1], groups[1]),
+        ])
+
+        assert result['success'] == 2
+        assert [(e['user_id'], e['step']) for e in result['errors']] == [
+            (member, 'course'), (outsider, 'add')
+        ]
+        assert member in site.group_members[groups[0]]
+        assert students[0] in site.group_members[groups[1]]
+
+    def test_groups_of_other_course_rejected(self, moodle, metrics, site, course_id, students):
+        """Test that moves from or to a group of another course are not sent."""
+        groups = sorted(g for g in site.groups if site.groups[g]['courseid'] == course_id)
+        other = site.add_group(site.add_course('OTHER'), 'Elsewhere')
+        member = next(iter(site.group_members[groups[0]]))
+
+        result = moodle.groups.move_users(course_id, [
+            (member, groups[0], other),
+            (students[0], other, groups[1]),
+        ])
+
+        assert result['success'] == 0
+        assert [(e['user_id'], e['step'], e['error']) for e in result['errors']] == [
+            (member, 'course', f"Group {other} is not in course {course_id}"),
+            (students[0], 'course', f"Group {other} is not in course {course_id}"),
+        ]
+        assert not site.group_members[other]
+        assert calls(metrics) == {'core_group_get_course_groups': 1}
+
+    def test_failed_removal(self, moodle, server, site, course_id):
+        """Test that a failed removal is reported with the 'remove' step."""
+        groups = sorted(g for g in site.groups if site.groups[g]['courseid'] == course_id)
+        member = next(iter(site.group_members[groups[0]]))
+        server.inject_error('core_group_delete_group_members', status=500)
+
+        result = moodle.groups.move_users(course_id, [(member, groups[0], groups[1])])
+
+        assert result['errors'][0]['step'] == 'remove'
+        assert member in site.group_members[groups[1]]
+
+
+class TestCohortDirectory:
+    """Tests for CohortDirectory and the cohort methods using it."""
+
+    def test_checks_after_warm_up_are_free(self, moodle, metrics, site, students):
+        """Test that checking every student costs two requests in total."""
+        cohort_id = next(iter(site.cohorts))
+
+        in_cohort = [user_id for user_id in students if moodle.groups.is_user_in_cohort(user_id, 'Cohort 1')]
+
+        assert set(in_cohort) == site.cohort_members[cohort_id]
+        assert calls(metrics) == {
+            'core_cohort_get_cohorts': 1,
+            'core_cohort_get_cohort_members': 1,
+        }
+        assert not moodle.groups.is_user_in_cohort(students[0], 'Missing')
+        assert calls(metrics)['core_cohort_get_cohorts'] == 1
+
+    def test_preload_and_ttl(self, moodle, metrics, site):
+        """Test that preload() loads several cohorts in one call and entries expire."""
+        directory = moodle.groups.cohort_directory
+
+        assert directory.preload(['Cohort 1', 'Cohort 2', 'Missing']) == 2
+        assert directory.preload(['Cohort 1']) == 0
+        assert len(directory) == 2
+        assert calls(metrics)['core_cohort_get_cohort_members'] == 1
+
+        directory.ttl = 0
+        directory.members('Cohort 1')
+        assert calls(metrics) == {
+            'core_cohort_get_cohorts': 2,
+            'core_cohort_get_cohort_members': 2,
+        }
+
+    def test_enroll_updates_cached_members(self, moodle, metrics, site):
+        """Test that an enrollment is visible without reloading the members."""
+        outsider = site.add_user('outsider', 'Out', 'Sider')
+        assert not moodle.groups.is_user_in_cohort(outsider, 'Cohort 1')
+
+        assert moodle.groups.enroll_user_in_cohort(outsider, 'Cohort 1')
+        assert moodle.groups.is_user_in_cohort(outsider, 'Cohort 1')
+        assert calls(metrics) == {
+            'core_cohort_get_cohorts': 1,
+            'core_cohort_get_cohort_members': 1,
+            'core_cohort_add_cohort_members': 1,
+        }
+
+    def test_refresh(self, moodle, site, students):
+        """Test that refresh() reloads names and loaded member sets."""
+        directory = moodle.groups.cohort_directory
+        cohort_id = directory.cohort_id('Cohort 1')
+        member = next(iter(directory.members(cohort_id)))
+
+        site.cohort_members[cohort_id].discard(member)
+        site.add_cohort('Cohort 3')
+        assert directory.is_member(member, cohort_id)
+
+        directory.refresh()
+        assert not directory.is_member(member, cohort_id)
+        assert directory.cohort_id('Cohort 3') is not None
+
+
+class TestBulkCohortMembers:
+    """Tests for enroll_users_in_cohort() and remove_users_from_cohort()."""
+
+    def test_enroll_many(self, moodle, metrics, site):
+        """Test that 200 users are added in chunks of 24 after one listing."""
+        cohort_id = site.add_cohort('Intake', 'INTAKE')
+        user_ids = [site.add_user(f"new{i}", 'New', str(i)) for i in range(200)]
+
+        result = moodle.groups.enroll_users_in_cohort('Intake', user_ids + user_ids[:3])
+
+        assert result == {'added': user_ids, 'already_member': [], 'errors': []}
+        assert site.cohort_members[cohort_id] == set(user_ids)
+        assert calls(metrics) == {
+            'core_cohort_get_cohorts': 1,
+            'core_cohort_get_cohort_members': 1,
+            'core_cohort_add_cohort_members': 9,
+        }
+        assert moodle.groups.is_user_in_cohort(user_ids[-1], 'Intake')
+        assert calls(metrics)['core_cohort_get_cohort_members'] == 1
+
+    def test_enroll_reports_warnings_per_user(self, moodle, metrics, site):
+        """Test that each user Moodle warns about gets only their own warning."""
+        cohort_id = next(iter(site.cohorts))
+        member = next(iter(site.cohort_members[cohort_id]))
+        newcomer = site.add_user('newcomer', 'New', 'Comer')
+
+        result = moodle.groups.enroll_users_in_cohort(cohort_id, [member, 999998, newcomer, 999999])
+
+        assert result['added'] == [newcomer]
+        assert result['already_member'] == [member]
+        assert result['errors'] == [{'user_id': 999998, 'error': 'user id=999998 not exists'},
+                                    {'user_id': 999999, 'error': 'user id=999999 not exists'}]
+        assert calls(metrics) == {
+            'core_cohort_get_cohorts': 1,
+            'core_cohort_get_cohort_members': 1,
+            'core_cohort_add_cohort_members': 1,
+        }
+
+    def test_enroll_existing_member_warning(self, moodle, metrics, site):
+        """Test that a user added by someone else after loading is reported as a member."""
+        cohort_id = site.add_cohort('Intake', 'INTAKE')
+        user_ids = [site.add_user(f"new{i}", 'New', str(i)) for i in range(3)]
+        moodle.groups.cohort_directory.members(cohort_id)
+        site.cohort_members[cohort_id].add(user_ids[1])
+
+        result = moodle.groups.enroll_users_in_cohort(cohort_id, user_ids)
+
+        assert result == {'added': [user_ids[0], user_ids[2]], 'already_member': [user_ids[1]], 'errors': []}
+        assert moodle.groups.cohort_directory.members(cohort_id) == set(user_ids)
+        assert calls(metrics)['core_cohort_get_cohort_members'] == 1
+
+    def test_enroll_unparsed_warning_reloads(self, moodle, metrics, site, monkeypatch):
+        """Test that members are reloaded only when a warning names no user."""
+        cohort_id = site.add_cohort('Intake', 'INTAKE')
+        user_ids = [site.add_user(f"new{i}", 'New', str(i)) for i in range(3)]
+        add = site.core_cohort_add_cohort_members
+
+        def add_but_one(params):
+            params['members'] = params['members'][:-1]
+            add(params)
+            return {'warnings': [{'warningcode': '9', 'message': 'Something went wrong'}]}
+        monkeypatch.setattr(site, 'core_cohort_add_cohort_members', add_but_one)
+
+        result = moodle.groups.enroll_users_in_cohort(cohort_id, user_ids)
+
+        assert result['added'] == user_ids[:2]
+        assert result['errors'] == [{'user_id': user_ids[2], 'error': 'Something went wrong'}]
+        assert calls(metrics)['core_cohort_get_cohort_members'] == 2
+
+    def test_remove_many(self, moodle, metrics, site, students):
+        """Test that members are removed in bulk and unknown users isolated."""
+        cohort_id = next(iter(site.cohorts))
+        members = sorted(site.cohort_members[cohort_id])
+        ghost = site.add_user('ghost', 'Gh', 'Ost')
+        site.cohort_members[cohort_id].add(ghost)
+        del site.users[ghost]
+
+        result = moodle.groups.remove_users_from_cohort('Cohort 1', members + [ghost, 999999])
+
+        assert result['removed'] == members
+        assert result['not_member'] == [999999]
+        assert [e['user_id'] for e in result['errors']] == [ghost]
+        assert site.cohort_members[cohort_id] == {ghost}
+        assert not moodle.groups.is_user_in_cohort(members[0], 'Cohort 1')
+        assert calls(metrics)['core_cohort_get_cohort_members'] == 1
+
+    def test_unknown_cohort(self, moodle):
+        """Test that an unknown cohort raises."""
+        with pytest.raises(MoodleResourceNotFoundError):
+            moodle.groups.enroll_users_in_cohort('Missing', [1])
+        with pytest.raises(MoodleResourceNotFoundError):
+            moodle.groups.remove_users_from_cohort(999999, [1])
+
+
+class TestBulkGroups:
+    """Tests for create_groups() and delete_groups()."""
+
+    def test_create_many(self, moodle, metrics, site, course_id):
+        """Test that 100 groups are created in chunked calls after one listing."""
+        specs = [{'name': f"Lab {i}", 'idnumber': f"LAB{i}", 'description': f"Lab {i} desc"}
+                 for i in range(100)]
+
+        result = moodle.groups.create_groups(course_id, specs + ['Lab 0'])
+
+        assert result['errors'] == []
+        assert list(result['groups']) == [spec['name'] for spec in specs]
+        group = site.groups[result['groups']['Lab 7']]
+        assert (group['idnumber'], group['description']) == ('LAB7', 'Lab 7 desc')
+        assert calls(metrics)['core_group_get_course_groups'] == 1
+        assert calls(metrics)['core_group_create_groups'] == 5
+
+    def test_create_skips_existing(self, moodle, metrics, site, course_id):
+        """Test that existing groups are returned without being created again."""
+        existing = moodle.groups.get_all_course_groups_dict(course_id)
+        name = next(iter(existing))
+        count = len(site.groups)
+
+        result = moodle.groups.create_groups(course_id, [name, 'Fresh'])
+        again = moodle.groups.create_groups(course_id, [name, 'Fresh'])
+
+        assert result == again
+        assert result['groups'][name] == existing[name]
+        assert len(site.groups) == count + 1
+        assert calls(metrics)['core_group_create_groups'] == 1
+
+    def test_create_reports_failures(self, moodle, server, site, course_id):
+        """Test that the groups created are returned along with the failures."""
+        server.inject_error('core_group_create_groups', message='Cannot create group', times=2)
+
+        result = moodle.groups.create_groups(course_id, ['New A', 'New B'])
+
+        assert result['errors'] == [{'group_name': 'New A', 'error': result['errors'][0]['error']}]
+        assert 'Cannot create group' in result['errors'][0]['error']
+        new_b = next(g_id for g_id, g in site.groups.items() if g['name'] == 'New B')
+        assert result['groups'] == {'New B': new_b}
+
+    def test_delete_reports_unknown_ids(self, moodle, metrics, site, course_id):
+        """Test that unknown IDs are reported as errors, not as deleted."""
+        group_ids = [group_id for group_id, group in site.groups.items()
+                     if group['courseid'] == course_id]
+
+        result = moodle.groups.delete_groups(group_ids + [999999])
+
+        assert result['deleted'] == group_ids
+        assert [e['group_id'] for e in result['errors']] == [999999]
+        assert not any(group['courseid'] == course_id for group in site.groups.values())
+        assert calls(metrics)['core_group_get_groups'] > 1
+        assert calls(metrics)['core_group_delete_groups'] == 1
+
+
+class TestBulkGroupings:
+    """Tests for assign_groups_to_groupings() and unassign_groups_from_groupings()."""
+
+    def test_assign_many_creates_groupings_once(self, moodle, metrics, site, course_id):
+        """Test that 200 links to two new groupings take one creation and five assign calls."""
+        group_ids = [site.add_group(course_id, f"Lab {index}") for index in range(100)]
+        assignments = [(name, group_id) for name in ('Semester 1', 'Semester 2')
+                       for group_id in group_ids]
+
+        result = moodle.groups.assign_groups_to_groupings(course_id, assignments + assignments[:5])
+
+        assert result == {'success': 200, 'errors': [],
+                          'created_groupings': ['Semester 1', 'Semester 2']}
+        created = {g['name']: g_id for g_id, g in site.groupings.items()}
+        assert site.grouping_groups[created['Semester 2']] == set(group_ids)
+        assert calls(metrics) == {
+            'core_group_get_course_groupings': 1,
+            'core_group_create_groupings': 1,
+            'core_group_assign_grouping': 5,
+        }
+
+    def test_assign_by_id_and_existing_name(self, moodle, metrics, site, course_id):
+        """Test that existing groupings are reused and invalid groups isolated."""
+        grouping_id = next(g for g in site.groupings if site.groupings[g]['courseid'] == course_id)
+        name = site.groupings[grouping_id]['name']
+        group_id = site.add_group(course_id, 'Extra')
+
+        result = moodle.groups.assign_groups_to_groupings(
+            course_id, [(grouping_id, group_id), (name, 999999)])
+
+        assert result['success'] == 1
+        assert result['created_groupings'] == []
+        assert [(e['grouping_id'], e['group_id']) for e in result['errors']] == [(grouping_id, 999999)]
+        assert group_id in site.grouping_groups[grouping_id]
+        assert 'core_group_create_groupings' not in calls(metrics)
+
+    def test_assign_reports_uncreated_grouping(self, moodle, server, site, course_id):
+        """Test that links to a grouping that could not be created are reported."""
+        group_id = site.add_group(course_id, 'Extra')
+        server.inject_error('core_group_create_groupings', times=2)
+
+        result = moodle.groups.assign_groups_to_groupings(
+            course_id, [('New A', group_id), ('New B', group_id)])
+
+        assert len(result['created_groupings']) == 1
+        assert result['success'] == 1
+        assert [(e['grouping_id'], e['group_id']) for e in result['errors']] == [(None, group_id)]
+        assert result['errors'][0]['grouping_name'] not in result['created_groupings']
+
+    def test_unassign_many(self, moodle, metrics, site, course_id):
+        """Test that links are removed in bulk across groupings."""
+        links = [(grouping_id, group_id) for grouping_id, groups in site.grouping_groups.items()
+                 if site.groupings[grouping_id]['courseid'] == course_id for group_id in groups]
+
+        result = moodle.groups.unassign_groups_from_groupings(links)
+
+        assert result == {'success': len(links), 'errors': []}
+        assert all(not site.grouping_groups[grouping_id] for grouping_id, _ in links)
+        assert calls(metrics) == {'core_group_unassign_grouping': 1}
+
+    def test_single_assignment(self, moodle, site, course_id):
+        """Test that the single-pair methods send the assignments list Moodle expects."""
+        grouping_id = site.add_grouping(course_id, 'Solo')
+        group_id = site.add_group(course_id, 'Solo group')
+
+        assert moodle.groups.assign_group_to_grouping(grouping_id, group_id)
+        assert site.grouping_groups[grouping_id] == {group_id}
+        assert moodle.groups.unassign_group_from_grouping(grouping_id, group_id)
+        assert site.grouping_groups[grouping_id] == set()
+
+
+class TestSendMessageToGroups:
+    """Tests for send_message_to_groups()."""
+
+    def test_dedups_recipients_across_groups(self, moodle, metrics, site, course_id):
+        """Test that a user in two groups is messaged once, without a profile lookup."""
+        group_ids = [g for g in site.groups if site.groups[g]['courseid'] == course_id]
+        recipients = set().union(*(site.group_members[g] for g in group_ids))
+        twice = next(iter(site.group_members[group_ids[0]]))
+        site.add_group_member(group_ids[1], twice)
+
+        result = moodle.groups.send_message_to_groups(group_ids + group_ids[:1], 'Exam', 'Room B12')
+
+        assert set(result['sent']) == recipients
+        assert result['errors'] == []
+        assert sorted(m['touserid'] for m in site.messages) == sorted(recipients)
+        assert site.messages[0]['text'] == '<strong>Exam</strong><br>Room B12'
+        assert calls(metrics) == {
+            'core_group_get_group_members': 1,
+            'core_message_send_instant_messages': 2,
+        }
+
+    def test_reports_errors_per_recipient(self, moodle, site, course_id):
+        """Test that a recipient Moodle rejects is reported with its error."""
+        group_id = next(g for g in site.groups if site.groups[g]['courseid'] == course_id)
+        ghost = site.add_user('ghost', 'Gh', 'Ost')
+        site.add_group_member(group_id, ghost)
+        del site.users[ghost]
+
+        result = moodle.groups.send_message_to_groups([group_id], 'Exam', 'Room B12')
+
+        assert result['errors'] == [{'user_id': ghost, 'error': 'User does not exist'}]
+        assert set(result['sent']) == site.group_members[group_id] - {ghost}
+
+    def test_failed_request_is_not_resent(self, moodle, server, metrics, site, course_id):
+        """Test that a rejected request fails its recipients only."""
+        group_ids = [g for g in site.groups if site.groups[g]['courseid'] == course_id]
+        server.inject_error('core_message_send_instant_messages', times=1)
+
+        result = moodle.groups.send_message_to_groups(group_ids, 'Exam', 'Room B12')
+
+        assert len(result['errors']) == 32
+        assert len(result['sent']) == len(site.messages)
+        assert calls(metrics)['core_message_send_instant_messages'] == 2
+
+    def test_concurrent_chunks(self, moodle, server, site, course_id):
+        """Test that chunks are sent concurrently."""
+        group_ids = [g for g in site.groups if site.groups[g]['courseid'] == course_id]
+        server.set_latency('core_message_send_instant_messages', 0.05)
+
+        result = moodle.groups.send_message_to_groups(group_ids, 'Exam', 'Room B12', concurrency=2)
+
+        assert len(result['sent']) == len(site.messages)
+        assert server.peak_concurrency == 2
+
+    def test_no_members(self, moodle, metrics, site, course_id):
+        """Test that empty groups send nothing."""
+        group_id = site.add_group(course_id, 'Empty')
+
+        assert moodle.groups.send_message_to_groups([group_id], 'Exam', 'Room B12') == \
+            {'sent': {}, 'errors': []}
+        assert 'core_message_send_instant_messages' not in calls(metrics)
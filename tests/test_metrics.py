@@ -0,0 +1,149 @@
+"""
+Unit tests for call hooks and the metrics aggregator.
+"""
+import pytest
+import requests
+from unittest.mock import Mock, patch
+from edutools_moodle import (
+    MoodleAPI, MoodleGroups, MoodleAPIError, MoodleTransport,
+    CallHook, CallEvent, MetricsAggregator
+)
+
+
+def http_response(payload, status=200, content=b'[]'):
+    """Build an HTTP response returning payload."""
+    response = Mock(status_code=status, content=content)
+    response.json.return_value = payload
+    return response
+
+
+@pytest.fixture
+def groups():
+    """Create a MoodleGroups instance with a mocked transport and a metrics hook."""
+    groups = MoodleGroups("https://test.moodle.com", "test_token",
+                          transport=Mock(spec=MoodleTransport), hooks=[MetricsAggregator()])
+    return groups
+
+
+class RecordingHook(CallHook):
+    """Hook keeping the events it receives."""
+
+    def __init__(self):
+        self.events = []
+
+    def before_call(self, event):
+        self.events.append(('before', event.outcome))
+
+    def after_call(self, event):
+        self.events.append(('after', event))
+
+
+class TestCallHooks:
+    """Tests for hook notifications."""
+
+    def test_event_fields(self, groups):
+        """Test that a successful call reports sizes, status and outcome."""
+        hook = RecordingHook()
+        groups.add_hook(hook)
+        groups.transport.post.return_value = http_response([{'id': 1}], content=b'[{"id":1}]')
+
+        groups.call_api('core_group_get_group_members', {'groupids': [1, 2, 3]})
+
+        assert hook.events[0] == ('before', 'pending')
+        event = hook.events[1][1]
+        assert event.function_name == 'core_group_get_group_members'
+        assert event.param_count == 3
+        assert event.request_bytes == len(groups.transport.post.call_args[1]['data'])
+        assert event.response_bytes == 10
+        assert event.status == 200
+        assert event.outcome == 'ok' and event.retries == 0
+        assert event.elapsed >= 0
+
+    def test_failure_and_retries_reported(self):
+        """Test that retries and the final error are reported."""
+        hook = RecordingHook()
+        groups = MoodleGroups("https://test.moodle.com", "test_token",
+                              transport=Mock(spec=MoodleTransport), hooks=[hook])
+        groups.transport.post.side_effect = requests.exceptions.ReadTimeout()
+
+        with patch('edutools_moodle.base.time.sleep'), pytest.raises(TimeoutError):
+            groups.get_course_groups(12)
+
+        event = hook.events[-1][1]
+        assert event.outcome == 'timeout'
+        assert event.retries == 2
+        assert isinstance(event.error, TimeoutError)
+
+    def test_failing_hook_does_not_break_call(self, groups):
+        """Test that hook exceptions are swallowed."""
+        broken = Mock(spec=CallHook)
+        broken.after_call.side_effect = RuntimeError("boom")
+        groups.add_hook(broken)
+        groups.transport.post.return_value = http_response([])
+
+        assert groups.get_course_groups(12) == []
+
+    def test_hooks_shared_by_modules(self):
+        """Test that MoodleAPI hooks reach every module, even when added later."""
+        moodle = MoodleAPI("https://test.moodle.com", "test_token")
+        hook = RecordingHook()
+        moodle.add_hook(hook)
+
+        assert all(module.hooks is moodle.hooks for module in
+                   (moodle.courses, moodle.groups, moodle.assignments, moodle.grades, moodle.users))
+
+
+class TestMetricsAggregator:
+    """Tests for MetricsAggregator."""
+
+    def test_per_function_metrics(self, groups):
+        """Test counters, bytes and errors per function."""
+        groups.transport.post.side_effect = [
+            http_response([], content=b'[]'),
+            http_response([], content=b'[]'),
+            http_response({'exception': 'moodle_exception', 'message': 'nope'}, content=b'{}'),
+        ]
+        groups.get_course_groups(12)
+        groups.get_course_groups(13)
+        with pytest.raises(MoodleAPIError):
+            groups.call_api('core_group_create_groups', {'groups': [{'courseid': 1, 'name': 'A'}]})
+
+        snapshot = groups.hooks[0].snapshot()
+        assert snapshot['core_group_get_course_groups']['calls'] == 2
+        assert snapshot['core_group_get_course_groups']['response_bytes'] == 4
+        assert snapshot['core_group_create_groups']['errors'] == 1
+        assert snapshot['core_group_create_groups']['statuses'] == {200: 1}
+
+    def test_histogram_and_percentiles(self):
+        """Test bucket placement and percentile estimates."""
+        metrics = MetricsAggregator(buckets=(0.1, 1.0))
+        for elapsed in (0.05, 0.05, 0.5, 3.0):
+            event = CallEvent('core_group_get_course_groups', 1, 10)
+            event._finish()
+            event.elapsed = elapsed
+            metrics.after_call(event)
+
+        m = metrics.snapshot()['core_group_get_course_groups']
+        assert m['histogram'] == {'0.1': 2, '1.0': 1, '+Inf': 1}
+        assert m['p50'] == 0.1
+        assert m['p99'] == 3.0
+        assert m['max_time'] == 3.0
+
+    def test_top_and_report(self):
+        """Test ranking of functions by total time."""
+        metrics = MetricsAggregator()
+        for name, elapsed in (('fast_get_a', 0.01), ('slow_get_b', 2.0)):
+            event = CallEvent(name, 0, 0)
+            event._finish()
+            event.elapsed = elapsed
+            metrics.after_call(event)
+
+        assert [name for name, _ in metrics.top()] == ['slow_get_b', 'fast_get_a']
+        assert 'slow_get_b' in metrics.report().splitlines()[1]
+        metrics.reset()
+        assert metrics.snapshot() == {}
+
+    def test_invalid_buckets(self):
+        """Test that unordered bucket bounds are rejected."""
+        with pytest.raises(ValueError):
+            MetricsAggregator(buckets=(1.0, 0.5))
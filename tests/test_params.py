@@ -0,0 +1,74 @@
+"""
+Unit tests for the nested parameter encoder.
+"""
+from urllib.parse import parse_qsl, urlencode
+from unittest.mock import Mock
+from edutools_moodle import MoodleGrades, MoodleTransport
+from edutools_moodle.params import ParamEncoder, flatten_params
+
+
+class TestParamEncoder:
+    """Tests for ParamEncoder."""
+
+    def test_matches_form_encoding(self):
+        """Test that nested params encode like their flattened form."""
+        params = {
+            'assignmentid': 4,
+            'grades': [
+                {'userid': 1, 'grade': 12.5, 'plugindata': {'editor': {'text': 'Très bien & co'}}},
+                {'userid': 2, 'grade': 9.0, 'plugindata': {'editor': {'text': '50% [ok]'}}},
+            ],
+        }
+
+        body = ParamEncoder().encode('mod_assign_save_grades', params)
+
+        assert body == urlencode(flatten_params(params))
+
+    def test_flat_and_nested_equivalent(self):
+        """Test that flat PHP keys and nested params produce the same body."""
+        encoder = ParamEncoder()
+        nested = encoder.encode('f', {'members': [{'groupid': 3, 'userid': 7}]})
+        flat = encoder.encode('f', {'members[0][groupid]': 3, 'members[0][userid]': 7})
+
+        assert nested == flat
+
+    def test_booleans_and_none(self):
+        """Test PHP-friendly booleans and omission of None values."""
+        body = ParamEncoder().encode('f', {'enabled': True, 'disabled': False, 'skip': None})
+
+        assert parse_qsl(body) == [('enabled', '1'), ('disabled', '0')]
+
+    def test_templates_cached_per_function(self):
+        """Test that key templates are reused across list items."""
+        encoder = ParamEncoder()
+        encoder.encode('f', {'groupids': list(range(100))})
+
+        assert len(encoder._templates) == 1
+
+    def test_template_cache_bounded(self):
+        """Test that the template cache is reset past its size limit."""
+        encoder = ParamEncoder(max_templates=2)
+        for i in range(5):
+            encoder.encode(f'f{i}', {'a': 1, 'b': 2})
+
+        assert len(encoder._templates) <= 4
+
+
+class TestRequestBody:
+    """Tests for the body sent by call_api."""
+
+    def test_body_sent_through_transport(self):
+        """Test that call_api sends one pre-encoded form body."""
+        transport = Mock(spec=MoodleTransport)
+        transport.post.return_value.json.return_value = None
+        grades = MoodleGrades("https://test.moodle.com", "tok en", transport=transport)
+
+        grades.add_grades(assignment_id=5, grades=[{'userid': 1, 'grade': 10}])
+
+        body = transport.post.call_args[1]['data']
+        fields = dict(parse_qsl(body))
+        assert fields['wstoken'] == 'tok en'
+        assert fields['wsfunction'] == 'mod_assign_save_grades'
+        assert fields['grades[0][grade]'] == '10.0'
+        assert transport.post.call_args[1]['headers']['Content-Type'] == \
+            'application/x-www-form-urlencoded'
@@ -0,0 +1,121 @@
+"""
+Unit tests for the record and replay transports.
+"""
+import gzip
+import json
+import pytest
+import requests
+from unittest.mock import Mock, patch
+from edutools_moodle import MoodleAPIError, MoodleGroups, RecordingTransport, ReplayTransport
+from edutools_moodle.recording import decode_call
+
+
+def moodle_response(payload, status=200):
+    """Build a real requests Response carrying a JSON payload."""
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(payload).encode('utf-8')
+    response.encoding = 'utf-8'
+    return response
+
+
+@pytest.fixture
+def recording(tmp_path):
+    """Record a few calls made against a mocked Moodle session."""
+    path = str(tmp_path / 'calls.jsonl.gz')
+    transport = RecordingTransport(path)
+    transport._session = Mock()
+    transport._session.post.side_effect = [
+        moodle_response([{'id': 1, 'name': 'A'}]),
+        moodle_response([{'id': 1, 'name': 'A'}, {'id': 2, 'name': 'B'}]),
+        moodle_response([{'id': 7, 'groupid': 1}]),
+    ]
+    groups = MoodleGroups("https://test.moodle.com", "secret_token", transport=transport)
+    groups.get_course_groups(12)
+    groups.get_course_groups(12)
+    groups.call_api('core_group_get_group_members', {'groupids': [1, 2]})
+    transport.save()
+    return path
+
+
+class TestRecordingTransport:
+    """Tests for RecordingTransport."""
+
+    def test_decode_call(self):
+        """Test that request bodies are decoded without the request variables."""
+        function, params = decode_call(
+            'wstoken=abc&moodlewsrestformat=json&wsfunction=core_group_add_group_members'
+            '&members%5B0%5D%5Bgroupid%5D=3&members%5B0%5D%5Buserid%5D=7'
+        )
+        assert function == 'core_group_add_group_members'
+        assert params == {'members': [{'groupid': '3', 'userid': '7'}]}
+
+    def test_file_contents(self, recording):
+        """Test that calls are stored compressed and without the token."""
+        with gzip.open(recording, 'rt', encoding='utf-8') as handle:
+            raw = handle.read()
+        records = [json.loads(line) for line in raw.splitlines()]
+
+        assert 'secret_token' not in raw
+        assert [r['function'] for r in records] == ['core_group_get_course_groups'] * 2 + \
+            ['core_group_get_group_members']
+        assert records[2]['params'] == {'groupids': ['1', '2']}
+        assert records[0]['status'] == 200 and records[0]['elapsed'] >= 0
+
+
+    def test_secrets_redacted(self, tmp_path):
+        """Test that passwords are not stored and the call still replays."""
+        path = str(tmp_path / 'users.jsonl.gz')
+        transport = RecordingTransport(path)
+        transport._session = Mock()
+        transport._session.post.return_value = moodle_response([{'id': 5, 'username': 'jdoe'}])
+        params = {'users': [{'username': 'jdoe', 'password': 'S3cret!pw', 'createpassword': 0}]}
+        MoodleGroups("https://test.moodle.com", "token", transport=transport) \
+            .call_api('core_user_create_users', params)
+        transport.save()
+
+        with gzip.open(path, 'rt', encoding='utf-8') as handle:
+            raw = handle.read()
+        assert 'S3cret!pw' not in raw
+        assert json.loads(raw)['params'] == {'users': [
+            {'username': 'jdoe', 'password': '[redacted]', 'createpassword': '[redacted]'}
+        ]}
+
+        replay = MoodleGroups("https://test.moodle.com", "token", transport=ReplayTransport(path))
+        params['users'][0]['password'] = 'other'
+        assert replay.call_api('core_user_create_users', params) == [{'id': 5, 'username': 'jdoe'}]
+
+
+class TestReplayTransport:
+    """Tests for ReplayTransport."""
+
+    def test_replays_in_order(self, recording):
+        """Test that repeated calls are served in recorded order, then the last is repeated."""
+        transport = ReplayTransport(recording)
+        groups = MoodleGroups("https://other.moodle.com", "any_token", transport=transport)
+
+        assert len(groups.get_course_groups(12)) == 1
+        assert len(groups.get_course_groups(12)) == 2
+        assert len(groups.get_course_groups(12)) == 2
+        assert groups.call_api('core_group_get_group_members',
+                               {'groupids': [1, 2]}) == [{'id': 7, 'groupid': 1}]
+        assert transport.served == 4
+        assert len(transport) == 2
+
+    def test_unknown_call(self, recording):
+        """Test that calls missing from the recording fail clearly."""
+        groups = MoodleGroups("https://test.moodle.com", "t", transport=ReplayTransport(recording))
+
+        with pytest.raises(MoodleAPIError, match="No recorded response"):
+            groups.get_course_groups(99)
+
+    def test_simulated_latency(self, recording):
+        """Test that recorded durations are replayed when asked."""
+        transport = ReplayTransport(recording, simulate_latency=True, latency_scale=2.0,
+                                    extra_latency=0.5)
+        groups = MoodleGroups("https://test.moodle.com", "t", transport=transport)
+
+        with patch('edutools_moodle.recording.time.sleep') as sleep:
+            groups.get_course_groups(12)
+
+        assert sleep.call_args[0][0] >= 0.5
@@ -0,0 +1,152 @@
+"""
+Unit tests for the retry policy.
+"""
+import pytest
+import requests
+from unittest.mock import Mock, patch
+from edutools_moodle import MoodleAPI, MoodleGroups, MoodleAPIError, MoodleTransport, RetryPolicy
+
+
+def http_error(status, headers=None):
+    """Build an HTTPError carrying a response with the given status."""
+    response = Mock(status_code=status, headers=headers or {})
+    return requests.exceptions.HTTPError(f"{status} error", response=response)
+
+
+def ok_response(payload):
+    """Build a successful HTTP response returning payload."""
+    response = Mock()
+    response.json.return_value = payload
+    return response
+
+
+@pytest.fixture
+def groups():
+    """Create a MoodleGroups instance with a mocked transport and no real sleeping."""
+    transport = Mock(spec=MoodleTransport)
+    groups = MoodleGroups("https://test.moodle.com", "test_token", transport=transport,
+                          retry=RetryPolicy(max_attempts=3))
+    with patch('edutools_moodle.base.time.sleep') as sleep:
+        groups.sleep = sleep
+        yield groups
+
+
+class TestRetryPolicy:
+    """Tests for RetryPolicy decisions."""
+
+    def test_read_retried_on_transient_errors(self):
+        """Test that reads are retried on timeouts, resets and 5xx."""
+        policy = RetryPolicy()
+        for error in (requests.exceptions.ReadTimeout(), requests.exceptions.ConnectionError(),
+                      http_error(502)):
+            assert policy.should_retry('core_group_get_course_groups', error, 1)
+
+    def test_permanent_errors_not_retried(self):
+        """Test that 4xx responses and last attempts are not retried."""
+        policy = RetryPolicy(max_attempts=3)
+        assert not policy.should_retry('core_group_get_course_groups', http_error(404), 1)
+        assert not policy.should_retry('core_group_get_course_groups', http_error(401), 1)
+        assert not policy.should_retry('core_group_get_course_groups',
+                                       requests.exceptions.ReadTimeout(), 3)
+
+    def test_mutations(self):
+        """Test idempotency-aware retries of mutating functions."""
+        policy = RetryPolicy()
+        timeout = requests.exceptions.ReadTimeout()
+        assert not policy.should_retry('core_group_create_groups', timeout, 1)
+        assert policy.should_retry('core_group_create_groups', requests.exceptions.ConnectTimeout(), 1)
+        assert policy.should_retry('core_group_create_groups', http_error(503), 1)
+        assert policy.should_retry('core_group_add_group_members', timeout, 1)
+        assert RetryPolicy(retry_mutations=True).should_retry('core_group_create_groups', timeout, 1)
+
+    def test_grade_saves_retried_without_new_attempt(self):
+        """Test that grade saves are retried only when no call adds an attempt."""
+        policy = RetryPolicy()
+        timeout = requests.exceptions.ReadTimeout()
+        grades = [{'userid': 1, 'grade': 10, 'addattempt': 0}, {'userid': 2, 'grade': 12, 'addattempt': 0}]
+
+        assert policy.should_retry('mod_assign_save_grades', timeout, 1,
+                                   {'assignmentid': 5, 'grades': grades})
+        assert policy.should_retry('mod_assign_save_grade', timeout, 1, {'userid': 1, 'addattempt': '0'})
+        grades[1]['addattempt'] = 1
+        assert not policy.should_retry('mod_assign_save_grades', timeout, 1,
+                                       {'assignmentid': 5, 'grades': grades})
+        assert not policy.should_retry('mod_assign_save_grade', timeout, 1,
+                                       {'grades[0][addattempt]': 'true'})
+        assert not policy.should_retry('mod_assign_save_grade', timeout, 1)
+
+    def test_backoff_bounded(self):
+        """Test that jittered delays stay within the exponential ceiling."""
+        policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+        for attempt, ceiling in ((1, 1.0), (2, 2.0), (3, 4.0), (6, 5.0)):
+            assert all(0 <= policy.delay(attempt) <= ceiling for _ in range(50))
+
+    def test_retry_after_honoured(self):
+        """Test that Retry-After is used and capped."""
+        policy = RetryPolicy(max_delay=10.0)
+        assert policy.delay(1, http_error(429, {'Retry-After': '3'})) == 3.0
+        assert policy.delay(1, http_error(429, {'Retry-After': '120'})) == 10.0
+
+    def test_invalid_configuration(self):
+        """Test that invalid settings are rejected."""
+        with pytest.raises(ValueError):
+            RetryPolicy(max_attempts=0)
+
+
+class TestRequestRetries:
+    """Tests for retries in _request."""
+
+    def test_read_recovers(self, groups):
+        """Test that a read succeeds after transient failures."""
+        groups.transport.post.side_effect = [
+            requests.exceptions.ConnectionError("reset"),
+            Mock(raise_for_status=Mock(side_effect=http_error(504))),
+            ok_response([{'id': 1}]),
+        ]
+
+        assert groups.get_course_groups(12) == [{'id': 1}]
+        assert groups.transport.post.call_count == 3
+        assert groups.sleep.call_count == 2
+        assert groups.retry.stats == {'retries': 2, 'recovered': 1, 'exhausted': 0}
+        assert groups.retry.retries_by_function['core_group_get_course_groups'] == 2
+
+    def test_read_exhausted(self, groups):
+        """Test that the original error is raised once attempts run out."""
+        groups.transport.post.side_effect = requests.exceptions.ReadTimeout()
+
+        with pytest.raises(TimeoutError):
+            groups.get_course_groups(12)
+
+        assert groups.transport.post.call_count == 3
+        assert groups.retry.stats['exhausted'] == 1
+
+    def test_unsafe_mutation_not_retried(self, groups):
+        """Test that a mutation which may have run is not sent twice."""
+        groups.transport.post.side_effect = requests.exceptions.ReadTimeout()
+
+        with pytest.raises(TimeoutError):
+            groups.call_api('core_group_create_groups',
+                            {'groups': [{'courseid': 12, 'name': 'A'}]})
+
+        groups.transport.post.assert_called_once()
+        assert groups.retry.stats['retries'] == 0
+
+    def test_moodle_exception_not_retried(self, groups):
+        """Test that errors reported by Moodle itself are not retried."""
+        groups.transport.post.return_value = ok_response(
+            {'exception': 'invalid_parameter_exception', 'errorcode': 'invalidparameter',
+             'message': 'Invalid parameter value detected'})
+
+        with pytest.raises(MoodleAPIError):
+            groups.get_course_groups(12)
+
+        groups.transport.post.assert_called_once()
+
+    def test_policy_shared_by_modules(self):
+        """Test that MoodleAPI shares one policy across modules."""
+        policy = RetryPolicy(max_attempts=5)
+        moodle = MoodleAPI("https://test.moodle.com", "test_token", retry=policy)
+
+        assert moodle.retry is policy
+        assert all(module.retry is policy for module in
+                   (moodle.courses, moodle.groups, moodle.assignments, moodle.grades, moodle.users))
@@ -0,0 +1,161 @@
+"""
+Unit tests for the shared HTTP transport.
+"""
+import pytest
+import threading
+from unittest.mock import Mock, patch
+from edutools_moodle import (
+    MoodleAPI, MoodleGroups, MoodleTransport, RateLimiter, AdaptiveConcurrencyLimiter
+)
+
+
+class TestMoodleTransport:
+    """Tests for MoodleTransport."""
+
+    def test_pool_size_applied_to_adapters(self):
+        """Test that the configured pool size is used for both schemes."""
+        transport = MoodleTransport(pool_maxsize=25)
+        adapter = transport.session.get_adapter('https://moodle.example.com')
+
+        assert adapter._pool_maxsize == 25
+        assert transport.session.get_adapter('http://moodle.example.com') is adapter
+
+    def test_invalid_pool_size(self):
+        """Test that non-positive pool sizes are rejected."""
+        with pytest.raises(ValueError):
+            MoodleTransport(pool_maxsize=0)
+
+    def test_close_resets_session(self):
+        """Test that closing the transport drops the session."""
+        transport = MoodleTransport()
+        first = transport.session
+        transport.close()
+
+        assert transport.session is not first
+
+
+class TestSharedTransport:
+    """Tests for transport sharing between modules."""
+
+    def test_modules_share_one_transport(self):
+        """Test that every MoodleAPI module uses the same transport."""
+        moodle = MoodleAPI("https://test.moodle.com", "test_token", pool_maxsize=16)
+        modules = [moodle.courses, moodle.groups, moodle.assignments,
+                   moodle.grades, moodle.users]
+
+        assert all(module.transport is moodle.transport for module in modules)
+        assert moodle.transport.pool_maxsize == 16
+        assert moodle.groups.session is moodle.grades.session
+
+    def test_module_does_not_close_shared_transport(self):
+        """Test that a module leaves a shared transport open."""
+        transport = Mock(spec=MoodleTransport)
+        groups = MoodleGroups("https://test.moodle.com", "test_token", transport=transport)
+        groups.close()
+
+        transport.close.assert_not_called()
+
+    def test_call_api_posts_through_transport(self):
+        """Test that call_api sends requests via the transport."""
+        transport = Mock(spec=MoodleTransport)
+        transport.post.return_value.json.return_value = [{'id': 1}]
+        groups = MoodleGroups("https://test.moodle.com", "test_token", transport=transport)
+
+        result = groups.get_course_groups(123)
+
+        assert result == [{'id': 1}]
+        url = transport.post.call_args[0][0]
+        assert url == "https://test.moodle.com/webservice/rest/server.php"
+
+
+class TestRateLimiter:
+    """Tests for RateLimiter."""
+
+    def test_burst_then_paced(self):
+        """Test that requests beyond the burst wait for new tokens."""
+        limiter = RateLimiter(rate=10, burst=2)
+        with patch('edutools_moodle.throttle.time.sleep') as sleep:
+            limiter.acquire()
+            limiter.acquire()
+            sleep.assert_not_called()
+            with patch('edutools_moodle.throttle.time.monotonic',
+                       side_effect=[limiter._updated, limiter._updated + 0.1]):
+                limiter.acquire()
+
+        sleep.assert_called_once()
+        assert sleep.call_args[0][0] == pytest.approx(0.1, abs=1e-3)
+
+    def test_invalid_rate(self):
+        """Test that non-positive rates are rejected."""
+        with pytest.raises(ValueError):
+            RateLimiter(rate=0)
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """Tests for AdaptiveConcurrencyLimiter."""
+
+    def test_additive_increase(self):
+        """Test that a window of successes raises the limit by about one."""
+        limiter = AdaptiveConcurrencyLimiter(initial=4, max_limit=10)
+        for _ in range(4):
+            limiter.release(limiter.acquire())
+
+        assert 4.8 < limiter.limit < 5.0
+
+    def test_multiplicative_decrease_once_per_burst(self):
+        """Test that simultaneous failures halve the limit only once."""
+        limiter = AdaptiveConcurrencyLimiter(initial=8)
+        slots = [limiter.acquire() for _ in range(4)]
+        for started in slots:
+            limiter.release(started, failed=True)
+
+        assert limiter.limit == 4
+        assert limiter.stats['decreases'] == 1
+
+    def test_bounds(self):
+        """Test that the limit stays within min_limit and max_limit."""
+        limiter = AdaptiveConcurrencyLimiter(initial=2, min_limit=2, max_limit=3)
+        limiter.release(limiter.acquire(), failed=True)
+        assert limiter.limit == 2
+        for _ in range(20):
+            limiter.release(limiter.acquire())
+        assert limiter.limit == 3
+
+    def test_slow_responses_signal_congestion(self):
+        """Test that latency far above a function's baseline cuts the limit."""
+        limiter = AdaptiveConcurrencyLimiter(initial=8, min_samples=2)
+        with patch('edutools_moodle.throttle.time.monotonic') as clock:
+            for now in (1.0, 2.0, 3.0):
+                clock.return_value = now + 0.1
+                limiter.release(now, function_name='core_group_get_course_groups')
+            before = limiter.limit
+            clock.return_value = 15.0
+            limiter.release(10.0, function_name='core_group_get_course_groups')
+
+        assert limiter.limit == pytest.approx(before / 2)
+
+    def test_blocks_at_limit(self):
+        """Test that acquire waits while the limit is reached."""
+        limiter = AdaptiveConcurrencyLimiter(initial=1, max_limit=1)
+        started = limiter.acquire()
+        acquired = threading.Event()
+        thread = threading.Thread(target=lambda: limiter.acquire() and acquired.set())
+        thread.start()
+
+        assert not acquired.wait(0.05)
+        limiter.release(started)
+        assert acquired.wait(1)
+        thread.join()
+
+    def test_transport_reports_outcomes(self):
+        """Test that the transport feeds 5xx responses to the limiter."""
+        limiter = AdaptiveConcurrencyLimiter(initial=4)
+        transport = MoodleTransport(concurrency=limiter)
+        transport._session = Mock()
+        transport._session.post.return_value = Mock(status_code=503)
+
+        transport.post('https://test.moodle.com', data='', timeout=5,
+                       function_name='core_group_get_course_groups')
+
+        assert limiter.limit == 2
+        assert limiter.in_flight == 0